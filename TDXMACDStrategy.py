@@ -4,12 +4,17 @@ import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 from opentdx.client.quotationClient import QuotationClient
 from opentdx.const import MARKET, PERIOD
+from opentdx.store import KlineStore
 
 class TDXMACDStrategy:
-    def __init__(self, market, code):
+    def __init__(self, market, code, store_dir=None):
+        """
+        :param store_dir: 指定时日线保存在该目录下，每次只下载新增的 K 线；不指定时不写本地文件
+        """
         self.market = market
         self.code = code
         self.client = QuotationClient()
+        self.store = KlineStore(store_dir, client=self.client) if store_dir else None
         success = self.client.connect().login(show_info=True)
         if success:
             print("登录成功")
@@ -26,15 +31,13 @@ class TDXMACDStrategy:
             print(f"市场: {self.market}, 代码: {self.code}, 周期: PERIOD.DAILY")
 
             # 获取日线数据 (PERIOD.DAILY)
-            self.data = self.client.get_kline(
-                market=self.market,
-                code=self.code,
-                period=PERIOD.DAILY,
-                start=0,
-                count=800
-            )
+            if self.store is not None:
+                self.store.sync([(self.market, self.code)], PERIOD.DAILY, count=800)
+                self.data = self.store.read(self.market, self.code, PERIOD.DAILY)
+            else:
+                self.data = self.client.get_kline(self.market, self.code, PERIOD.DAILY, start=0, count=800, as_arrays=True)
 
-            if not self.data:
+            if not self.data or len(self.data['datetime']) == 0:
                 print(f"获取 {self.code} 的数据失败，返回空数据")
                 return False
 
@@ -0,0 +1,229 @@
+"""
+解析器微基准：每个注册的用例在 small / medium / large 三种大小的响应体上运行，
+报告每次调用耗时、每秒解析记录数和内存分配，并与保存的基线比较
+
+    python -m benchmarks.bench_parsers                  # 运行并与 baseline.json 比较
+    python -m benchmarks.bench_parsers -k kline         # 只运行名称包含 kline 的用例
+    python -m benchmarks.bench_parsers --save           # 保存为新的基线
+    python -m benchmarks.bench_parsers --payloads DIR   # 加入 mock_server 录制的响应
+
+比较时耗时超过基线 threshold 倍的用例视为退化，命令以非 0 状态退出
+"""
+import argparse
+import json
+import os
+import platform
+import struct
+import sys
+import timeit
+import tracemalloc
+
+from opentdx.const import CATEGORY, EX_MARKET, MARKET, PERIOD
+from opentdx.parser import ex_quotation, mac_quotation, quotation
+from opentdx.utils.help import get_price, get_prices
+
+from . import payloads
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 1.3
+
+# 名称 -> (解码函数, {大小: 记录数}, 构造响应体的函数, msg_id)
+CASES = {}
+
+
+def benchmark(name: str, sizes: dict, build, msg_id: int = None):
+    """注册用例，被装饰的函数接收响应体并完成一次解码"""
+    def decorator(fn):
+        CASES[name] = (fn, sizes, build, msg_id)
+        return fn
+    return decorator
+
+
+@benchmark('K_Line', {'small': 10, 'medium': 200, 'large': 800}, payloads.kline, quotation.K_Line.msg_id)
+def kline_rows(data):
+    return quotation.K_Line(MARKET.SZ, '000001', PERIOD.DAILY).deserialize(data)
+
+
+@benchmark('K_Line.as_arrays', {'small': 10, 'medium': 200, 'large': 800}, payloads.kline)
+def kline_arrays(data):
+    return quotation.K_Line(MARKET.SZ, '000001', PERIOD.DAILY, as_arrays=True).deserialize(data)
+
+
+@benchmark('QuotesList', {'small': 1, 'medium': 20, 'large': 80}, payloads.quotes_list, quotation.QuotesList.msg_id)
+def quotes_list(data):
+    return quotation.QuotesList(CATEGORY.A).deserialize(data)
+
+
+@benchmark('Transaction', {'small': 10, 'medium': 300, 'large': 1800}, payloads.transaction, quotation.Transaction.msg_id)
+def transaction_rows(data):
+    return quotation.Transaction(MARKET.SZ, '000001', 0, 1800).deserialize(data)
+
+
+@benchmark('Transaction.as_arrays', {'small': 10, 'medium': 300, 'large': 1800}, payloads.transaction)
+def transaction_arrays(data):
+    return quotation.Transaction(MARKET.SZ, '000001', 0, 1800, True).deserialize(data)
+
+
+@benchmark('Transaction.get_price', {'small': 10, 'medium': 300, 'large': 1800}, payloads.transaction)
+def transaction_reference(data):
+    """逐个 get_price 的分笔解码，作为 Transaction 向量化解码的对照"""
+    count, = struct.unpack('<H', data[:2])
+    pos = 2
+    rows = []
+    for _ in range(count):
+        minute, = struct.unpack('<H', data[pos:pos + 2])
+        pos += 2
+        row = [minute]
+        for _ in range(5):
+            value, pos = get_price(data, pos)
+            row.append(value)
+        rows.append(row)
+    return rows
+
+
+@benchmark('BoardMembersQuotes', {'small': 10, 'medium': 80, 'large': 500}, payloads.board_members_quotes, mac_quotation.BoardMembersQuotes.msg_id)
+def board_members_quotes(data):
+    return mac_quotation.BoardMembersQuotes().deserialize(data)
+
+
+@benchmark('unpack_futures', {'small': 1, 'medium': 20, 'large': 80}, payloads.ex_quotes, ex_quotation.Quotes.msg_id)
+def ex_quotes(data):
+    return ex_quotation.Quotes([(EX_MARKET.HK_MAIN_BOARD, '00700')]).deserialize(data)
+
+
+@benchmark('get_price', {'small': 100, 'medium': 10000, 'large': 100000}, payloads.prices)
+def price_loop(data):
+    values, pos, end = [], 0, len(data)
+    while pos < end:
+        value, pos = get_price(data, pos)
+        values.append(value)
+    return values
+
+
+@benchmark('get_prices', {'small': 100, 'medium': 10000, 'large': 100000}, payloads.prices)
+def price_vector(data):
+    return get_prices(data)[0]
+
+
+def count_records(result) -> int:
+    if isinstance(result, dict) and 'stocks' in result:
+        return len(result['stocks'])
+    if isinstance(result, dict):
+        return len(next(iter(result.values()), ()))
+    return len(result)
+
+
+def measure(fn, data: bytes, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """最快一轮的单次耗时，以及单次调用的峰值内存和调用后仍存活的分配块数"""
+    timer = timeit.Timer(lambda: fn(data))
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    seconds = min(timer.repeat(repeat, number)) / number
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = fn(data)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    records = count_records(result)
+    return {
+        'records': records,
+        'bytes': len(data),
+        'us_per_call': seconds * 1e6,
+        'records_per_sec': records / seconds if seconds else 0.0,
+        'alloc_peak_kb': peak / 1024,
+        'alloc_blocks': blocks,
+    }
+
+
+def load_captured(path: str) -> dict:
+    """{msg_id: [响应体]}，文件名为 mock_server 保存的 {msg_id:04x}_{序号}.bin"""
+    captured = {}
+    for name in sorted(os.listdir(path)):
+        msg_id, _, _ = os.path.splitext(name)[0].partition('_')
+        if name.endswith('.bin'):
+            with open(os.path.join(path, name), 'rb') as f:
+                captured.setdefault(int(msg_id, 16), []).append(f.read())
+    return captured
+
+
+def run(pattern: str = None, captured: dict = None, repeat: int = 5) -> dict:
+    results = {}
+    for name, (fn, sizes, build, msg_id) in CASES.items():
+        if pattern and pattern.lower() not in name.lower():
+            continue
+        inputs = [(size, build(count)) for size, count in sizes.items()]
+        inputs += [('captured%d' % i, data) for i, data in enumerate((captured or {}).get(msg_id, []))] if msg_id is not None else []
+        for size, data in inputs:
+            results[f'{name}/{size}'] = measure(fn, data, repeat)
+    return results
+
+
+def load_baseline(path: str = BASELINE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(results: dict, path: str = BASELINE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': {key: {k: round(v, 3) if isinstance(v, float) else v for k, v in value.items()} for key, value in sorted(results.items())},
+        }, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def report(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """打印结果表格，返回退化的用例"""
+    regressions = []
+    print('%-32s %8s %12s %14s %10s %8s %8s' % ('case', 'records', 'us/call', 'records/s', 'peak KB', 'blocks', 'vs base'))
+    for key, value in results.items():
+        base = baseline.get(key)
+        ratio = value['us_per_call'] / base['us_per_call'] if base and base.get('us_per_call') else None
+        flag = ''
+        if ratio is not None and ratio > threshold:
+            regressions.append(key)
+            flag = ' !'
+        print('%-32s %8d %12.1f %14.0f %10.1f %8d %8s%s' % (
+            key, value['records'], value['us_per_call'], value['records_per_sec'], value['alloc_peak_kb'],
+            value['alloc_blocks'], '%.2fx' % ratio if ratio is not None else '-', flag,
+        ))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='opentdx 解析器微基准')
+    parser.add_argument('-k', dest='pattern', help='只运行名称包含该字符串的用例')
+    parser.add_argument('--payloads', help='mock_server 录制的响应目录')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='把结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='耗时超过基线的倍数视为退化')
+    args = parser.parse_args(argv)
+
+    captured = load_captured(args.payloads) if args.payloads else None
+    results = run(args.pattern, captured, args.repeat)
+    if args.save:
+        # 只运行部分用例时保留基线中的其它用例
+        merged = load_baseline(args.baseline)
+        merged.update(results)
+        save_baseline(merged, args.baseline)
+        report(results, {}, args.threshold)
+        return 0
+    regressions = report(results, load_baseline(args.baseline), args.threshold)
+    if regressions:
+        print('regressions: %s' % ', '.join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+各解析器的代表性响应体，按记录数构造，内容固定（同样的参数得到同样的字节）
+
+也可以用 tests/mock_server.py 的代理模式从真实服务器录制响应，保存的 {msg_id:04x}_{序号}.bin
+通过 bench_parsers --payloads 目录 加入测试
+"""
+import struct
+
+from opentdx.const import EX_MARKET, MARKET
+
+from tests.test_help import encode_price
+from tests.test_parsers import kline_body
+
+# 默认位图：与 BoardMembersQuotes(filter=0) 请求的字段一致
+BOARD_FIELD_BITMAP = bytes.fromhex('ff fce1 cc3f 0803 01 00 00 00 00 00 00 00 0000 0000 00')
+
+
+def kline(count: int) -> bytes:
+    """日 K 线，价格为相对前一根的差值"""
+    return kline_body([
+        (20000101 + i % 28, (10000 + i % 50, 30 - i % 61, 50 + i % 13, -20 - i % 17), 1e6 + i, 1e8 + i * 10)
+        for i in range(count)
+    ])
+
+
+def transaction(count: int) -> bytes:
+    data = struct.pack('<H', count)
+    for i in range(count):
+        delta = 1000 if i == 0 else (i % 5) - 2
+        data += struct.pack('<H', 570 + i // 20) + encode_price(delta) + b''.join(encode_price(v) for v in (100 + i % 997, 1 + i % 7, i % 3, 0))
+    return data
+
+
+def quotes_list(count: int) -> bytes:
+    data = struct.pack('<HH', 0, count)
+    for i in range(count):
+        data += struct.pack('<B6sH', MARKET.SZ.value, ('%06d' % i).encode(), i % 100)
+        # close, pre_close, open, high, low, server_time, neg_price, vol, cur_vol
+        data += b''.join(encode_price(v) for v in (1000 + i, -10, 5, 20, -15, 14999123, 0, 100000 + i, 10 + i % 50))
+        data += struct.pack('<f', 1e7 + i)
+        # in_vol, out_vol, s_amount, open_amount, bid, ask, bid_vol, ask_vol
+        data += b''.join(encode_price(v) for v in (50000 + i, 50000 - i, 0, 100, -1, 1, 300, 400))
+        data += struct.pack('<Hhhfh10sff24sH', 0, i % 300, i % 50, 1e5, 0, b'', 0.5, 12.5, b'', 0)
+    return data
+
+
+def board_members_quotes(count: int) -> bytes:
+    fields = int.from_bytes(BOARD_FIELD_BITMAP, 'little').bit_count()
+    data = struct.pack('<20sIH', BOARD_FIELD_BITMAP, count, count)
+    for i in range(count):
+        data += struct.pack('<H22s44s', i % 3, ('%06d' % i).encode(), ('股票%d' % i).encode('gbk'))
+        data += struct.pack('<%df' % fields, *(float(i + j) for j in range(fields)))
+    return data
+
+
+def futures_record(i: int, code_len: int = 23) -> bytes:
+    """unpack_futures 的一条记录"""
+    data = struct.pack('<B%ds' % code_len, EX_MARKET.HK_MAIN_BOARD.value, ('%05d' % i).encode())
+    data += struct.pack('<I5f4If4I', i, 10.0, 10.1, 10.5, 9.9, 10.2, 100, 5, 1000 + i, 10, 1e6, 500, 500, 0, 200)
+    data += struct.pack('<5f5I5f5I', *([10.1] * 5 + [10] * 5 + [10.2] * 5 + [20] * 5))
+    data += struct.pack('<HfIffIIIIf', 0, 10.0, 0, 10.1, 10.0, 0, 0, 0, 0, 10.0)
+    data += struct.pack('<12sff12sff25sfIIff24sHB', b'', 900.0, 0.0, b'', 0.0, 1.5, b'', 10.0, 20240102, 0, 0.1, 0.0, b'', 0, 0)
+    return data
+
+
+def ex_quotes(count: int) -> bytes:
+    return struct.pack('<IIH', 0, 0, count) + b''.join(futures_record(i) for i in range(count))
+
+
+def prices(count: int) -> bytes:
+    """连续的变长整数，长度从 1 到 4 字节"""
+    return b''.join(encode_price(((i * 7919) % 2_000_000) * (-1 if i % 3 == 0 else 1)) for i in range(count))
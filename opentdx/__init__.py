@@ -2,6 +2,11 @@ from .tdxClient import TdxClient
 from .client.quotationClient import QuotationClient
 from .client.exQuotationClient import exQuotationClient
 from .client.macQuotationClient import macQuotationClient, macExQuotationClient
+from .client.asyncQuotationClient import AsyncQuotationClient
+from .client.asyncExQuotationClient import AsyncExQuotationClient
+from .client.connectionPool import ConnectionPool
+from .utils.metrics import ClientMetrics, client_metrics
+from .utils.cache import disable_disk_cache, enable_disk_cache
 from .const import (
     MARKET,
     CATEGORY,
@@ -21,6 +26,13 @@ __all__ = [
     "exQuotationClient",
     "macQuotationClient",
     "macExQuotationClient",
+    "AsyncQuotationClient",
+    "AsyncExQuotationClient",
+    "ConnectionPool",
+    "ClientMetrics",
+    "client_metrics",
+    "enable_disk_cache",
+    "disable_disk_cache",
     "MARKET",
     "CATEGORY",
     "PERIOD",
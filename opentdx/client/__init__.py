@@ -2,5 +2,8 @@ from .quotationClient import QuotationClient
 from .exQuotationClient import exQuotationClient
 from .macQuotationClient import macQuotationClient, macExQuotationClient
 from .baseStockClient import BaseStockClient
+from .asyncQuotationClient import AsyncQuotationClient
+from .asyncExQuotationClient import AsyncExQuotationClient
+from .connectionPool import ConnectionPool
 
-__all__ = ['QuotationClient', 'exQuotationClient', 'macQuotationClient', 'macExQuotationClient', 'BaseStockClient']
+__all__ = ['QuotationClient', 'exQuotationClient', 'macQuotationClient', 'macExQuotationClient', 'BaseStockClient', 'AsyncQuotationClient', 'AsyncExQuotationClient', 'ConnectionPool']
@@ -0,0 +1,270 @@
+import asyncio
+import struct
+import time
+import zlib
+
+from opentdx.parser.baseParser import BaseParser
+from opentdx.utils.heartbeat import DEFAULT_HEARTBEAT_INTERVAL
+from opentdx.utils.log import log
+from opentdx.utils.metrics import client_metrics
+
+from .baseStockClient import CONNECT_TIMEOUT, PIPELINE_DEPTH, RSP_HEADER_LEN, DefaultRetryStrategy
+
+
+class AsyncBaseStockClient():
+    """
+    基于 asyncio streams 的客户端，协议帧与 BaseStockClient 完全一致，
+    直接复用 BaseParser.serialize()/deserialize()。
+
+    请求以流水线方式发送：每个请求的 customize 字段写入递增序号，
+    由后台读取任务按 customize 将响应分发给对应的等待者，
+    单个连接最多 max_inflight 个请求同时在途。
+    """
+    hosts = []
+    # 请求统计，None 表示不统计
+    metrics = client_metrics
+    def __init__(self, heartbeat=False, auto_retry=False, raise_exception=False, max_inflight=PIPELINE_DEPTH):
+        self.reader: asyncio.StreamReader = None
+        self.writer: asyncio.StreamWriter = None
+        self.ip = None
+        self.port = None
+        self.connected = False
+        # 等待单个响应的超时时间（秒），与同步客户端的 socket 超时一致
+        self.time_out = CONNECT_TIMEOUT
+
+        self.inflight = asyncio.Semaphore(max_inflight)
+        self.read_task = None
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._seq = 0
+        # 当前连接上服务器是否回显过 customize，回显过就不再按先进先出匹配
+        self._echoed = False
+        self.heartbeat = heartbeat
+        self.heartbeat_task = None
+        self.last_ack_time = time.time()
+
+        # 是否重试
+        self.auto_retry = auto_retry
+        # 可以覆盖这个属性，使用新的重试策略
+        self.retry_strategy = DefaultRetryStrategy()
+        # 是否在函数调用出错的时候抛出异常
+        self.raise_exception = raise_exception
+
+    async def __aenter__(self):
+        await self.connect()
+        await self.login()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    async def login(self, show_info=False) -> bool:
+        """子类实现登录"""
+        return True
+
+    async def doHeartBeat(self):
+        """
+        子类可以覆盖这个方法，实现自己的心跳包
+        :return:
+        """
+        pass
+
+    async def call(self, parser: BaseParser):
+        self.last_ack_time = time.time()
+        try:
+            resp = await self._exchange(parser)
+        except Exception as e:
+            log.debug("hit exception on req exception is " + str(e))
+            resp = None
+            current_exception = e
+            if self.auto_retry:
+                for time_interval in self.retry_strategy.gen():
+                    try:
+                        await asyncio.sleep(time_interval)
+                        await self.disconnect()
+                        await self.connect(self.ip, self.port)
+                        await self.login()
+                        resp = await self._exchange(parser)
+                        break
+                    except Exception as retry_e:
+                        current_exception = retry_e
+                        log.debug("hit exception on *retry* req exception is " + str(retry_e))
+            if resp is None:
+                if self.metrics is not None:
+                    self.metrics.observe_error(parser)
+                if self.raise_exception:
+                    to_raise = Exception("calling function error")
+                    to_raise.original_exception = current_exception
+                    raise to_raise
+                return None
+        body, info, rtt = resp
+        if self.metrics is None:
+            return parser.deserialize(body)
+        started = time.perf_counter()
+        result = parser.deserialize(body)
+        self.metrics.observe(parser, rtt, info, time.perf_counter() - started)
+        return result
+
+    async def connect(self, ip=None, port=7709, time_out=CONNECT_TIMEOUT):
+        if ip is None:
+            # 选择延迟最低的服务器连接
+            async def get_latency(target_ip, target_port):
+                start_time = time.time()
+                try:
+                    _, writer = await asyncio.wait_for(asyncio.open_connection(target_ip, target_port), 1)
+                except Exception:
+                    return None
+                latency = time.time() - start_time
+                writer.close()
+                return (latency, target_ip, target_port)
+
+            infos = await asyncio.gather(*(get_latency(host[1], host[2]) for host in self.hosts))
+            infos = sorted(info for info in infos if info is not None)
+            if len(infos) == 0:
+                raise Exception("no available server")
+            _, ip, port = infos[0]
+
+        log.debug("connecting to server : %s on port :%d" % (ip, port))
+        self.ip = ip
+        self.port = port
+        self.time_out = time_out
+        try:
+            self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(ip, port), time_out)
+        except Exception as e:
+            self.reader, self.writer = None, None
+            self.connected = False
+            log.debug("connection failed: %s", e)
+            if self.raise_exception:
+                raise Exception("connection error", e)
+            return None
+
+        log.debug("connected!")
+        self.connected = True
+        self._echoed = False
+        self.read_task = asyncio.create_task(self._read_loop(self.reader))
+        if self.heartbeat and self.heartbeat_task is None:
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        return self
+
+    async def disconnect(self):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+
+        if self.read_task is not None:
+            self.read_task.cancel()
+            self.read_task = None
+        self._fail_waiters(Exception("disconnected"))
+
+        if self.writer is not None:
+            log.debug("disconnecting")
+            try:
+                self.writer.close()
+                await self.writer.wait_closed()
+            except Exception as e:
+                log.debug(str(e))
+            self.reader, self.writer = None, None
+            log.debug("disconnected")
+        self.connected = False
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(DEFAULT_HEARTBEAT_INTERVAL)
+            # 只有在超过心跳间隔没有新请求时才发送心跳
+            if time.time() - self.last_ack_time > DEFAULT_HEARTBEAT_INTERVAL:
+                try:
+                    await self.doHeartBeat()
+                except Exception as e:
+                    log.debug(str(e))
+
+    def _next_seq(self):
+        self._seq = (self._seq % 0xffffffff) + 1
+        return self._seq
+
+    def _fail_waiters(self, exc):
+        waiters, self._waiters = self._waiters, {}
+        for future in waiters.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def send(self, parser: BaseParser):
+        body, _, _ = await self._exchange(parser)
+        return body
+
+    async def _exchange(self, parser: BaseParser):
+        """:return: (body, (线上字节数, 解压后字节数, 解压耗时), 往返耗时)"""
+        async with self.inflight:
+            started = time.perf_counter()
+            body, info, received = await self._send(parser)
+            return body, info, received - started
+
+    async def _send(self, parser: BaseParser):
+        if self.writer is None:
+            raise Exception("not connected")
+
+        seq = self._next_seq()
+        parser.customize = seq
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[seq] = future
+        try:
+            self.writer.write(parser.serialize())
+            await self.writer.drain()
+        except Exception:
+            self._waiters.pop(seq, None)
+            self._drop_connection()
+            raise
+        try:
+            return await asyncio.wait_for(future, self.time_out)
+        except asyncio.TimeoutError:
+            # 服务器不再响应：关闭连接，同一连接上其它等待中的请求一并失败
+            log.debug("request timeout: msg_id=0x%x", parser.msg_id)
+            self._waiters.pop(seq, None)
+            if self.read_task is not None:
+                self.read_task.cancel()
+                self.read_task = None
+            self._drop_connection()
+            self._fail_waiters(Exception("request timeout"))
+            raise Exception("request timeout")
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                head_buf = await reader.readexactly(RSP_HEADER_LEN)
+                # prefix: b1 cb 74 00 固定响应头
+                prefix, zipped, customize, unknown, msg_id, zipsize, unzip_size = struct.unpack('<IBIBHHH', head_buf)
+
+                body_buf = await reader.readexactly(zipsize)
+                decompress_seconds = 0.0
+                if zipsize != unzip_size:
+                    started = time.perf_counter()
+                    body_buf = zlib.decompress(body_buf)
+                    decompress_seconds = time.perf_counter() - started
+                info = (RSP_HEADER_LEN + zipsize, len(body_buf), decompress_seconds)
+
+                future = self._waiters.pop(customize, None)
+                if future is not None:
+                    self._echoed = True
+                elif not self._echoed and self._waiters:
+                    # 服务器从未回显 customize 时按先进先出匹配
+                    future = self._waiters.pop(next(iter(self._waiters)))
+                else:
+                    log.debug("丢弃无法匹配的响应: customize=%d msg_id=0x%x", customize, msg_id)
+                if future is not None and not future.done():
+                    future.set_result((body_buf, info, time.perf_counter()))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.debug("read loop stopped: %s", e)
+            # 已重新连接时不影响新的连接
+            if reader is self.reader:
+                self._drop_connection()
+                self._fail_waiters(e)
+
+    def _drop_connection(self):
+        """连接出错后关闭并丢弃 writer，之后的请求需要重新连接"""
+        self.connected = False
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception as e:
+                log.debug(str(e))
+        self.reader, self.writer = None, None
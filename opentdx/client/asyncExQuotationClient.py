@@ -0,0 +1,58 @@
+from datetime import date
+
+from opentdx._typing import override
+from opentdx.const import EX_MARKET, PERIOD, SORT_TYPE, ex_hosts
+from opentdx.parser import ex_quotation
+from opentdx.utils.log import log
+
+from .asyncBaseStockClient import AsyncBaseStockClient
+from .asyncQuotationClient import _paginate
+from .baseStockClient import PIPELINE_DEPTH, _normalize_code_list
+
+
+class AsyncExQuotationClient(AsyncBaseStockClient):
+    def __init__(self, heartbeat=False, auto_retry=False, raise_exception=False, max_inflight=PIPELINE_DEPTH):
+        super().__init__(heartbeat, auto_retry, raise_exception, max_inflight)
+        self.hosts = ex_hosts
+
+    @override
+    async def login(self, show_info=False) -> bool:
+        try:
+            info = await self.call(ex_quotation.Login())
+            if show_info:
+                log.info("login info: %s", info)
+            return True
+        except Exception as e:
+            log.error("login failed: %s", e)
+            return False
+
+    async def get_count(self) -> int:
+        return await self.call(ex_quotation.Count())
+
+    async def get_category_list(self) -> list[dict]:
+        return await self.call(ex_quotation.CategoryList())
+
+    async def get_list(self, start: int = 0, count: int = 2000) -> list[dict]:
+        return await self.call(ex_quotation.List(start, count))
+
+    async def get_quotes_list(self, market: EX_MARKET, start: int = 0, count: int = 100, sortType: SORT_TYPE = SORT_TYPE.CODE, reverse: bool = False) -> list[dict]:
+        return await _paginate(
+            lambda s, c: self.call(ex_quotation.QuotesList(market, s, c, sortType, reverse)),
+            100, count, start,
+        )
+
+    async def get_quotes(self, code_list, code=None) -> list[dict]:
+        code_list = _normalize_code_list(code_list, code)
+        return await self.call(ex_quotation.Quotes(code_list))
+
+    async def get_kline(self, market: EX_MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1, as_arrays: bool = False) -> list[dict] | dict:
+        return await self.call(ex_quotation.K_Line(market, code, period, times, start, count, as_arrays))
+
+    async def get_history_transaction(self, market: EX_MARKET, code: str, date: date) -> list[dict]:
+        return await self.call(ex_quotation.HistoryTransaction(market, code, date))
+
+    async def get_tick_chart(self, market: EX_MARKET, code: str, date: date = None) -> list[dict]:
+        if date is None:
+            return await self.call(ex_quotation.TickChart(market, code))
+        else:
+            return await self.call(ex_quotation.HistoryTickChart(market, code, date))
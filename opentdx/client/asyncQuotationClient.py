@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import Optional
+
+from opentdx._typing import override
+from opentdx.const import CATEGORY, FILTER_TYPE, PERIOD, MARKET, SORT_TYPE, ADJUST, main_hosts
+from opentdx.parser import quotation
+from opentdx.utils.cache import finance_cache, finance_store
+from opentdx.utils.help import concat_columns, seconds_until_rollover
+from opentdx.utils.log import log
+
+from .asyncBaseStockClient import AsyncBaseStockClient
+from .baseStockClient import PIPELINE_DEPTH, _normalize_code_list
+from .quotationClient import apply_turnover, format_quotes_list, scale_kline, scale_kline_arrays, scale_quotes, scale_tick_chart, scale_transaction
+
+
+async def _paginate(fetch_fn, page_size, count, start=0):
+    """通用分页（协程版）：fetch_fn(start, page_size) -> list，count=0 表示取全部"""
+    results = []
+    remaining = count if count != 0 else float('inf')
+    while remaining > 0:
+        req_count = min(remaining, page_size)
+        part = await fetch_fn(start, req_count)
+        if part is None:
+            # 请求失败（raise_exception=False）
+            return None
+        results.extend(part)
+        if len(part) < req_count:
+            break
+        remaining -= len(part)
+        start += len(part)
+    return results
+
+
+class AsyncQuotationClient(AsyncBaseStockClient):
+    def __init__(self, heartbeat=False, auto_retry=False, raise_exception=False, max_inflight=PIPELINE_DEPTH):
+        super().__init__(heartbeat, auto_retry, raise_exception, max_inflight)
+        self.hosts = main_hosts
+
+    @override
+    async def login(self, show_info=False) -> bool:
+        try:
+            info = await self.call(quotation.Login())
+            if show_info:
+                log.info("login info: %s", info)
+            return True
+        except Exception as e:
+            log.error("login failed: %s", e)
+            return False
+
+    @override
+    async def doHeartBeat(self):
+        return await self.call(quotation.HeartBeat())
+
+    async def get_finance(self, market: MARKET, code: str) -> dict:
+        cache_key = f"{market.value}_{code}"
+        finance = finance_store.get(cache_key)
+        if finance is None:
+            finance = await self.call(quotation.Finance(market, code))
+            if finance:
+                finance_store.set(cache_key, finance)
+        return finance
+
+    async def _get_float_shares(self, market: MARKET, code: str):
+        cache_key = f"{market.value}_{code}"
+        float_shares = finance_cache.get(cache_key)
+        if float_shares is None:
+            finance = await self.get_finance(market, code)
+            float_shares = finance.get('liutongguben') if finance else None
+            if float_shares:
+                finance_cache.set(cache_key, float_shares, seconds_until_rollover())
+        return float_shares
+
+    async def prefetch_float_shares(self, symbols: list[tuple[MARKET, str]]) -> dict:
+        """并发获取缺失的流通股本，返回 {(market, code): 流通股本}"""
+        symbols = list(dict.fromkeys(symbols))
+
+        async def fetch(market, code):
+            try:
+                return await self._get_float_shares(market, code)
+            except Exception as e:
+                log.debug("获取流通股本失败 %s: %s", code, e)
+                return None
+
+        values = await asyncio.gather(*(fetch(market, code) for market, code in symbols))
+        return {symbol: value for symbol, value in zip(symbols, values) if value}
+
+    async def quotes_adjustment(self, quotes_list: list[dict]) -> list[dict]:
+        scale_quotes(quotes_list)
+        symbols = [(quotes['market'], quotes['code']) for quotes in quotes_list if quotes.get('market') and quotes.get('code') and quotes.get('vol')]
+        return apply_turnover(quotes_list, await self.prefetch_float_shares(symbols))
+
+    async def get_count(self, market: MARKET) -> int:
+        return await self.call(quotation.Count(market))
+
+    async def get_list(self, market: MARKET, start=0, count=0) -> list[dict]:
+        return await _paginate(
+            lambda s, c: self.call(quotation.List(market, s, c)),
+            1600, count, start,
+        )
+
+    async def get_kline(self, market: MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE, as_arrays: bool = False) -> list[dict] | dict:
+        MAX_KLINE_COUNT = 800
+        # 各页请求同时发出，由连接按 customize 匹配响应
+        pages = await asyncio.gather(*(
+            self.call(quotation.K_Line(market, code, period, times, page_start, min(count - (page_start - start), MAX_KLINE_COUNT), adjust, as_arrays))
+            for page_start in range(start, start + count, MAX_KLINE_COUNT)
+        ))
+        parts = []
+        for part in pages:
+            if not part or (as_arrays and len(part['open']) == 0):
+                break
+            parts.append(part)
+
+        if not parts:
+            return {} if as_arrays else []
+
+        float_shares = None
+        try:
+            float_shares = await self._get_float_shares(market, code)
+        except Exception as e:
+            log.warning("获取流通股本失败: %s", e)
+
+        if as_arrays:
+            return scale_kline_arrays(concat_columns(parts[::-1]), float_shares)
+        return scale_kline([bar for part in reversed(parts) for bar in part], float_shares)
+
+    async def get_tick_chart(self, market: MARKET, code: str, date: date = None, start: int = 0, count: int = 0xba00) -> list[dict]:
+        if date is None:
+            data = await self.call(quotation.TickChart(market, code, start, count))
+        else:
+            data = await self.call(quotation.HistoryTickChart(market, code, date))
+            if data is not None and (start != 0 or count != 0xba00):
+                data = data[start:start + count]
+        return None if data is None else scale_tick_chart(data)
+
+    async def get_stock_quotes_details(self, code_list: MARKET | list[tuple[MARKET, str]], code=None) -> list[dict]:
+        code_list = _normalize_code_list(code_list, code)
+        quotes_list = await self.call(quotation.QuotesDetail(code_list))
+        if quotes_list is None:
+            return None
+        return await self.quotes_adjustment(quotes_list)
+
+    async def get_stock_quotes_list(self, category: CATEGORY, start:int = 0, count: int = 80, sortType: SORT_TYPE = SORT_TYPE.CODE, reverse: bool = False, filter: Optional[list[FILTER_TYPE]] = None) -> list[dict]:
+        if filter is None:
+            filter = []
+        results = await _paginate(
+            lambda s, c: self.call(quotation.QuotesList(category, s, c, sortType, reverse, filter)),
+            80, count, start,
+        )
+        if results is None:
+            return None
+        return await self.quotes_adjustment(format_quotes_list(results))
+
+    async def get_quotes(self, all_stock, code=None) -> list[dict]:
+        all_stock = _normalize_code_list(all_stock, code)
+        quotes_list = await self.call(quotation.Quotes(all_stock))
+        if quotes_list is None:
+            return None
+        return await self.quotes_adjustment(format_quotes_list(quotes_list))
+
+    async def get_transaction(self, market: MARKET, code: str, date: date = None) -> list[dict]:
+        MAX_TRANSACTION_COUNT = 1800 if date is None else 2000
+        start = 0
+        parts = []
+        while True:
+            if date is None:
+                part = await self.call(quotation.Transaction(market, code, start, MAX_TRANSACTION_COUNT))
+            else:
+                part = await self.call(quotation.HistoryTransaction(market, code, date, start, MAX_TRANSACTION_COUNT))
+            if not part:
+                break
+            parts.append(part)
+            if len(part) < MAX_TRANSACTION_COUNT:
+                break
+            start = start + len(part)
+        return scale_transaction([item for part in reversed(parts) for item in part])
@@ -1,4 +1,7 @@
 
+import hashlib
+import itertools
+import os
 import socket
 import threading
 import time
@@ -6,6 +9,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from opentdx.parser.baseParser import BaseParser
 from opentdx.utils.log import log
 from opentdx.utils.heartbeat import HeartBeatThread
+from opentdx.utils.metrics import client_metrics
 
 import zlib
 import struct
@@ -14,6 +18,8 @@ import functools
 CONNECT_TIMEOUT = 5.000
 RECV_HEADER_LEN = 0x10
 RSP_HEADER_LEN = 0x10
+PIPELINE_DEPTH = 8   # 流水线最大在途请求数
+FILE_CHUNK_SIZE = 0x7530    # 文件下载每块的大小
 
 def update_last_ack_time(func):
     @functools.wraps(func)
@@ -52,18 +58,45 @@ def update_last_ack_time(func):
         return ret
     return wrapper
 
-def _paginate(fetch_fn, page_size, count, start=0):
-    """通用分页：fetch_fn(start, page_size) -> list，count=0 表示取全部"""
-    results = []
+def _iter_pages(client, make_parser, page_size, count, start=0, size=len):
+    """
+    逐页产出分页请求的结果：make_parser(start, page_size) -> parser，count=0 表示取全部，遇到空页或不满的页结束。
+    count 已知时各页通过 client.call_many 流水线发送；count=0 时先只请求一页，
+    收到满页后每批请求的页数翻倍直到 PIPELINE_DEPTH，数据只有一页时不会多发请求。
+    请求出错导致一批的结果不全时抛出异常。
+    """
+    page_start = start
     remaining = count if count != 0 else float('inf')
+    depth = PIPELINE_DEPTH if count != 0 else 1
     while remaining > 0:
-        req_count = min(remaining, page_size)
-        part = fetch_fn(start, req_count)
+        batch = []
+        while remaining > 0 and len(batch) < depth:
+            req_count = min(remaining, page_size)
+            batch.append((make_parser(page_start, req_count), req_count))
+            remaining -= req_count
+            page_start += req_count
+        received = 0
+        for part, (_, req_count) in zip(client.call_many([parser for parser, _ in batch]), batch):
+            received += 1
+            part_size = size(part) if part else 0
+            if part_size == 0:
+                return
+            yield part
+            if part_size < req_count:
+                return
+        if received < len(batch):
+            # 连接出错时 call_many 提前结束（raise_exception=False），不再继续发送后面的页
+            raise Exception("分页请求中断: 收到 %d/%d 页" % (received, len(batch)))
+        depth = min(depth * 2, PIPELINE_DEPTH)
+
+def _paginate(client, make_parser, page_size, count, start=0):
+    """
+    通用分页：make_parser(start, page_size) -> parser，count=0 表示取全部。
+    各页请求通过 client.call_many 流水线发送，不再每页等待一个往返，见 _iter_pages。
+    """
+    results = []
+    for part in _iter_pages(client, make_parser, page_size, count, start):
         results.extend(part)
-        if len(part) < req_count:
-            break
-        remaining -= len(part)
-        start += len(part)
     return results
 
 def _normalize_code_list(code_list, code=None):
@@ -75,6 +108,73 @@ def _normalize_code_list(code_list, code=None):
         return [code_list]
     return code_list
 
+def probe_hosts(hosts, timeout=1) -> list[dict]:
+    """测试服务器连接延迟，返回按延迟升序排列的 [{'ip', 'port', 'time'}, ...]，不可用的服务器被剔除"""
+    infos = []
+    def get_latency(target_ip, target_port, timeout):
+        client = None
+        try:
+            start_time = time.time()
+            family = socket.AF_INET6 if ":" in target_ip else socket.AF_INET
+            client = socket.socket(family, socket.SOCK_STREAM)
+            client.settimeout(timeout)
+            client.connect((target_ip, target_port))
+            infos.append({
+                'ip': target_ip,
+                'port': target_port,
+                'time': time.time() - start_time,
+            })
+        except Exception:
+            pass
+        finally:
+            if client is not None:
+                try:
+                    client.close()
+                except OSError:
+                    pass
+    if not hosts:
+        return infos
+    # 限制并发数避免端口耗尽
+    max_workers = min(10, len(hosts))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(get_latency, host[1], host[2], timeout): host
+            for host in hosts
+        }
+        for f in as_completed(futures):
+            pass  # results collected via infos list
+
+    infos.sort(key=lambda x: x['time'])
+    return infos
+
+def _pwrite(fd, data, offset):
+    """按偏移写入，不依赖文件位置，多个线程可以同时写同一个文件"""
+    view = memoryview(data)
+    while view:
+        if hasattr(os, 'pwrite'):
+            written = os.pwrite(fd, view, offset)
+        else:
+            # Windows 没有 pwrite
+            with _seek_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+_seek_lock = threading.Lock()
+
+
+def _check_hash(md5, hash_value) -> bool:
+    """与 FileMeta 的 hash_value（32 位十六进制 md5）比较，无法识别的 hash_value 无法校验，视为校验失败"""
+    try:
+        expected = bytes(hash_value).rstrip(b'\x00').decode('ascii').lower()
+        int(expected, 16)
+    except (ValueError, TypeError):
+        log.warning("无法识别的 hash_value，无法校验: %r", hash_value)
+        return False
+    return md5.hexdigest() == expected
+
+
 class DefaultRetryStrategy():
     """
     默认的重试策略，您可以通过写自己的重试策略替代本策略, 改策略主要实现gen方法，该方法是一个生成器，
@@ -89,6 +189,8 @@ class DefaultRetryStrategy():
 
 class BaseStockClient():
     hosts = []
+    # 请求统计，None 表示不统计
+    metrics = client_metrics
     def __init__(self, multithread=False, heartbeat=False, auto_retry=False, raise_exception=False): 
 
         self.client = None
@@ -103,6 +205,11 @@ class BaseStockClient():
         self.heartbeat_thread = None
         self.stop_event = None
         self.connected = False
+        self._seq = 0
+        # 当前连接上服务器是否回显过 customize，回显过就不再按先进先出匹配
+        self._echoed = False
+        # 当前线程最近一次读取响应的 (线上字节数, 解压后字节数, 解压耗时)
+        self._recv_local = threading.local()
 
         # 是否重试
         self.auto_retry = auto_retry
@@ -112,48 +219,29 @@ class BaseStockClient():
         self.raise_exception = raise_exception
 
     def call(self, parser: BaseParser):
-        resp = self.send(parser.serialize())
+        metrics = self.metrics
+        if metrics is None:
+            resp = self.send(parser.serialize())
+            return None if resp is None else parser.deserialize(resp)
+
+        started = time.perf_counter()
+        try:
+            resp = self.send(parser.serialize())
+        except Exception:
+            metrics.observe_error(parser)
+            raise
         if resp is None:
+            metrics.observe_error(parser)
             return None
-        else:
-            return parser.deserialize(resp)
+        received = time.perf_counter()
+        result = parser.deserialize(resp)
+        metrics.observe(parser, received - started, getattr(self._recv_local, 'info', None), time.perf_counter() - received)
+        return result
 
     def connect(self, ip=None, port=7709, time_out=5, bind_port=None, bind_ip='0.0.0.0'):
         if ip is None:
             # 选择延迟最低的服务器连接
-            infos = []
-            def get_latency(target_ip, target_port, timeout):
-                client = None
-                try:
-                    start_time = time.time()
-                    family = socket.AF_INET6 if ":" in target_ip else socket.AF_INET
-                    client = socket.socket(family, socket.SOCK_STREAM)
-                    client.settimeout(timeout)
-                    client.connect((target_ip, target_port))
-                    infos.append({
-                        'ip': target_ip,
-                        'port': target_port,
-                        'time': time.time() - start_time,
-                    })
-                except Exception:
-                    pass
-                finally:
-                    if client is not None:
-                        try:
-                            client.close()
-                        except OSError:
-                            pass
-            # 限制并发数避免端口耗尽
-            max_workers = min(10, len(self.hosts))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(get_latency, host[1], host[2], 1): host
-                    for host in self.hosts
-                }
-                for f in as_completed(futures):
-                    pass  # results collected via infos list
-            
-            infos.sort(key=lambda x: x['time'])
+            infos = probe_hosts(self.hosts)
             if len(infos) == 0:
                 raise Exception("no available server")
 
@@ -201,6 +289,7 @@ class BaseStockClient():
 
         log.debug("connected!")
         self.connected = True
+        self._echoed = False
 
         if self.heartbeat and not (self.heartbeat_thread and self.heartbeat_thread.is_alive()):
             self.stop_event = threading.Event()
@@ -270,23 +359,7 @@ class BaseStockClient():
                 if self.raise_exception:
                     raise Exception("send data error")
             else:
-                head_buf = self.client.recv(RSP_HEADER_LEN)
-                
-                # prefix: b1 cb 74 00 固定响应头
-                prefix, zipped, customize, unknown, msg_id, zipsize, unzip_size = struct.unpack('<IBIBHHH', head_buf)
-                # log.debug("recv Header: zipped: %s, customize: %s, control: %s, msg_id: %s, zipsize: %d, unzip_size: %d" % (hex(zipped), hex(customize), hex(unknown), hex(msg_id), zipsize, unzip_size))
-
-                need_unzip_size = zipsize != unzip_size
-                body_buf = bytearray()
-                while zipsize > 0:
-                    data_buf = self.client.recv(zipsize)
-                    if not data_buf:
-                        raise Exception("connection closed while receiving data")
-                    body_buf.extend(data_buf)
-                    zipsize -= len(data_buf)
-                if need_unzip_size:
-                    body_buf = zlib.decompress(body_buf)
-
+                _, body_buf, self._recv_local.info = self._recv()
                 return body_buf
         except Exception as e:
             log.debug(str(e))
@@ -295,24 +368,259 @@ class BaseStockClient():
             if self.raise_exception:
                 raise Exception("send error")
 
+    def _recv_exactly(self, size):
+        buf = bytearray()
+        while size > 0:
+            data_buf = self.client.recv(size)
+            if not data_buf:
+                raise Exception("connection closed while receiving data")
+            buf.extend(data_buf)
+            size -= len(data_buf)
+        return buf
+
+    def _recv(self):
+        """
+        读取一个完整响应
+        :return: (customize, body, (线上字节数, 解压后字节数, 解压耗时))
+        """
+        head_buf = self._recv_exactly(RSP_HEADER_LEN)
+
+        # prefix: b1 cb 74 00 固定响应头
+        prefix, zipped, customize, unknown, msg_id, zipsize, unzip_size = struct.unpack('<IBIBHHH', head_buf)
+        # log.debug("recv Header: zipped: %s, customize: %s, control: %s, msg_id: %s, zipsize: %d, unzip_size: %d" % (hex(zipped), hex(customize), hex(unknown), hex(msg_id), zipsize, unzip_size))
+
+        body_buf = self._recv_exactly(zipsize)
+        decompress_seconds = 0.0
+        if zipsize != unzip_size:
+            started = time.perf_counter()
+            body_buf = zlib.decompress(body_buf)
+            decompress_seconds = time.perf_counter() - started
+        return customize, body_buf, (RSP_HEADER_LEN + zipsize, len(body_buf), decompress_seconds)
+
+    def _next_seq(self):
+        self._seq = (self._seq % 0xffffffff) + 1
+        return self._seq
+
+    def call_many(self, parsers, depth=PIPELINE_DEPTH):
+        """
+        流水线请求：每批最多 depth 个请求在同一连接上连续发送，
+        每个请求的 customize 字段写入递增序号，响应按 customize 匹配，结果按请求顺序逐个产出。
+        一批的响应全部读完并释放连接锁后才产出这一批的结果，所以迭代过程中可以用同一个客户端发起其它请求，
+        提前结束迭代也不会在连接上留下未读的响应。parsers 可以是惰性（甚至无限）的可迭代对象，按批取出。
+        """
+        parsers = iter(parsers)
+        metrics = self.metrics
+        while True:
+            batch = list(itertools.islice(parsers, depth))
+            if not batch:
+                return
+            if self.lock:
+                with self.lock:
+                    responses = self._exchange_batch(batch)
+            else:
+                responses = self._exchange_batch(batch)
+            if responses is None:
+                return
+
+            for parser, (body, info, rtt) in zip(batch, responses):
+                if metrics is None:
+                    yield parser.deserialize(body)
+                    continue
+                started = time.perf_counter()
+                result = parser.deserialize(body)
+                metrics.observe(parser, rtt, info, time.perf_counter() - started)
+                yield result
+
+    def _exchange_batch(self, batch):
+        """
+        连续发送一批请求并读完全部响应
+        :return: 按请求顺序的 [(body, 读取统计, 往返耗时)]，出错且不抛出异常时返回 None
+        """
+        if not self.client:
+            log.debug("not connected")
+            if self.raise_exception:
+                raise Exception("not connected")
+            return None
+
+        pending = {}    # seq -> 发送时间，按发送顺序
+        ready = {}      # seq -> (body, 读取统计, 往返耗时)
+        seqs = []
+        try:
+            for parser in batch:
+                seq = self._next_seq()
+                parser.customize = seq
+                self.client.sendall(parser.serialize())
+                pending[seq] = time.perf_counter()
+                seqs.append(seq)
+
+            while pending:
+                customize, body, info = self._recv()
+                if customize in pending:
+                    self._echoed = True
+                elif not self._echoed:
+                    # 服务器从未回显 customize 时按先进先出匹配
+                    customize = next(iter(pending))
+                else:
+                    raise Exception("无法匹配的响应: customize=%d" % customize)
+                ready[customize] = (body, info, time.perf_counter() - pending.pop(customize))
+        except Exception as e:
+            log.debug(str(e))
+            self.connected = False
+            self.client = None
+            if self.metrics is not None:
+                failed = [parser for i, parser in enumerate(batch) if i >= len(seqs) or seqs[i] not in ready]
+                self.metrics.observe_error(failed[0])
+            if self.raise_exception:
+                raise Exception("send error")
+            return None
+        return [ready[seq] for seq in seqs]
+
     @update_last_ack_time
-    def download_file(self, fetch_fn, filename: str, filesize=0, report_hook=None):
-        file_content = bytearray()
-        current_downloaded_size = 0
-        get_zero_length_package_times = 0
-        while current_downloaded_size < filesize or filesize == 0:
-            response = self.call(fetch_fn(filename, current_downloaded_size))
-            if not response:
-                break
-            if response["size"] > 0:
-                current_downloaded_size += response["size"]
-                file_content.extend(response["data"])
+    def download_file(self, fetch_fn, filename: str, filesize=0, report_hook=None, pool=None, path=None, hash_value=None, fileobj=None):
+        """
+        下载文件
+        filesize 为 0 时逐块顺序下载直到服务器返回空块；已知大小时按块以流水线方式请求，
+        pool 不为空时把各块分散到连接池的多个连接上并发下载，数据直接写入对应偏移
+        :param path: 写入该文件并返回 path，否则返回 bytearray。下载中的数据保存在 path.part，
+                     已完成的块记录在 path.part.done，中断后再次调用只下载缺少的块
+        :param hash_value: FileMeta 返回的 hash_value，下载完成后校验 md5
+        :param fileobj: 按顺序把每块写入该文件对象并返回它，不在内存中保留整个文件
+        """
+        if filesize and fileobj is None:
+            return self._download_ranges(fetch_fn, filename, filesize, report_hook, pool, path, hash_value)
+
+        if fileobj is None and path is None:
+            file_content = bytearray()
+            write = file_content.extend
+        else:
+            f = fileobj if fileobj is not None else open(path, 'wb')
+            write = f.write
+        md5 = hashlib.md5()
+        downloaded = 0
+        try:
+            for chunk in self._iter_file(fetch_fn, filename, filesize):
+                write(chunk)
+                md5.update(chunk)
+                downloaded += len(chunk)
                 if report_hook is not None:
-                    report_hook(current_downloaded_size, filesize)
-            else:
-                get_zero_length_package_times += 1
-                if filesize == 0:
-                    break
-                elif get_zero_length_package_times > 2:
+                    report_hook(downloaded, filesize)
+        finally:
+            if fileobj is None and path is not None:
+                f.close()
+        if hash_value is not None and not _check_hash(md5, hash_value):
+            raise Exception("文件校验失败: %s" % filename)
+        if fileobj is not None:
+            return fileobj
+        return file_content if path is None else path
+
+    def _iter_file(self, fetch_fn, filename: str, filesize=0):
+        """
+        按顺序逐块产出文件内容
+        filesize 为 0 时逐块顺序请求直到服务器返回空块，已知大小时以流水线方式请求
+        """
+        if filesize == 0:
+            start = 0
+            while True:
+                response = self.call(fetch_fn(filename, start))
+                if not response or response["size"] == 0:
+                    return
+                start += response["size"]
+                yield response["data"]
+
+        offsets = range(0, filesize, FILE_CHUNK_SIZE)
+        results = self.call_many(fetch_fn(filename, offset, min(FILE_CHUNK_SIZE, filesize - offset)) for offset in offsets)
+        received = 0
+        try:
+            for offset, response in zip(offsets, results):
+                size = min(FILE_CHUNK_SIZE, filesize - offset)
+                if not response or response['size'] < size:
                     break
-        return file_content
+                received += 1
+                yield response['data'][:size]
+        finally:
+            results.close()
+        if received < len(offsets):
+            raise Exception("下载文件失败: %s offset %d" % (filename, offsets[received]))
+
+    def _download_ranges(self, fetch_fn, filename: str, filesize: int, report_hook, pool, path, hash_value):
+        offsets = range(0, filesize, FILE_CHUNK_SIZE)
+        lock = threading.Lock()
+        done = set()
+        if path is not None:
+            part_path, done_path = path + '.part', path + '.part.done'
+            if os.path.exists(part_path) and os.path.getsize(part_path) == filesize and os.path.exists(done_path):
+                with open(done_path, 'rb') as f:
+                    data = f.read()
+                done = {offset for (offset,) in struct.iter_unpack('<Q', data[:len(data) // 8 * 8])}
+            fd = os.open(part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+            os.ftruncate(fd, filesize)
+            done_file = open(done_path, 'ab' if done else 'wb')
+
+            def write(offset, data):
+                _pwrite(fd, data, offset)
+                # 块写入后再记录，中断时最多重新下载正在写的块
+                with lock:
+                    done_file.write(struct.pack('<Q', offset))
+                    done_file.flush()
+        else:
+            file_content = bytearray(filesize)
+            view = memoryview(file_content)
+
+            def write(offset, data):
+                view[offset:offset + len(data)] = data
+
+        todo = [offset for offset in offsets if offset not in done]
+        downloaded = [filesize - sum(min(FILE_CHUNK_SIZE, filesize - offset) for offset in todo)]
+
+        def fetch(client, group):
+            results = client.call_many(fetch_fn(filename, offset, min(FILE_CHUNK_SIZE, filesize - offset)) for offset in group)
+            received = 0
+            try:
+                for offset, response in zip(group, results):
+                    size = min(FILE_CHUNK_SIZE, filesize - offset)
+                    if not response or response['size'] < size:
+                        break
+                    write(offset, response['data'][:size])
+                    received += 1
+                    if report_hook is not None:
+                        with lock:
+                            downloaded[0] += size
+                            report_hook(downloaded[0], filesize)
+            finally:
+                results.close()
+            if received < len(group):
+                raise Exception("下载文件失败: %s offset %d" % (filename, group[received]))
+
+        try:
+            if pool is not None and len(todo) > 1:
+                # 每个连接负责连续的一段，段内流水线请求
+                step = -(-len(todo) // pool.size)
+                pool.map(fetch, [todo[i:i + step] for i in range(0, len(todo), step)])
+            elif todo:
+                fetch(self, todo)
+        except Exception:
+            if path is not None:
+                done_file.close()
+                os.close(fd)
+            raise
+
+        if path is None:
+            if hash_value is not None and not _check_hash(hashlib.md5(file_content), hash_value):
+                raise Exception("文件校验失败: %s" % filename)
+            return file_content
+
+        done_file.close()
+        os.close(fd)
+        if hash_value is not None:
+            md5 = hashlib.md5()
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    md5.update(chunk)
+            if not _check_hash(md5, hash_value):
+                # 删除有误的数据，下次重新下载
+                os.remove(part_path)
+                os.remove(done_path)
+                raise Exception("文件校验失败: %s" % filename)
+        os.replace(part_path, path)
+        os.remove(done_path)
+        return path
@@ -5,6 +5,7 @@ import pandas as pd
 from .baseStockClient import update_last_ack_time
 from opentdx.const import ADJUST, BOARD_TYPE, CATEGORY, EX_CATEGORY, MARKET, PERIOD, EX_BOARD_TYPE, SORT_TYPE, SORT_ORDER, mac_hosts, mac_ex_hosts
 from opentdx.parser.mac_quotation import BoardCount, BoardList, BoardMembers, BoardMembersQuotes, SymbolBar, SymbolBelongBoard
+from opentdx.utils.help import concat_columns
 from opentdx.utils.log import log
 from functools import wraps
 
@@ -142,7 +143,7 @@ class CommonClientMixin:
     @require_sp_mode    
     @update_last_ack_time
     def get_symbol_bars(
-        self, market: MARKET, code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 800, fq: ADJUST = ADJUST.NONE
+        self, market: MARKET, code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 800, fq: ADJUST = ADJUST.NONE, as_arrays: bool = False
     ):
         MAX_LIST_COUNT = 700
         page_size = min(count, MAX_LIST_COUNT)
@@ -156,14 +157,20 @@ class CommonClientMixin:
             # 计算本次请求的实际数量，最后一次根据剩余数据减少
             current_count = min(page_size, count - start)
 
-            parser = SymbolBar(market=market, code=code, period=period, times=times, start=start, count=current_count, fq=fq)
+            parser = SymbolBar(market=market, code=code, period=period, times=times, start=start, count=current_count, fq=fq, as_arrays=as_arrays)
             part = self.call(parser)
+            part_len = len(part['open']) if as_arrays else len(part)
 
-            if len(part) > 0:
-                security_list.extend(part)
+            if part_len > 0:
+                if as_arrays:
+                    security_list.append(part)
+                else:
+                    security_list.extend(part)
 
-            if len(part) < current_count:
+            if part_len < current_count:
                 log.debug(f"{msg} 数据量不足,获取结束")
                 break
 
+        if as_arrays:
+            return concat_columns(security_list)
         return security_list
\ No newline at end of file
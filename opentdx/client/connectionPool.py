@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from opentdx.utils.heartbeat import DEFAULT_HEARTBEAT_INTERVAL
+from opentdx.utils.log import log
+
+from .baseStockClient import CONNECT_TIMEOUT, probe_hosts
+
+MAINTAIN_INTERVAL = 1.0 # 后台维护线程的巡检间隔（秒）
+
+
+class ConnectionPool:
+    """
+    多连接池：维护 size 个已登录的连接，按延迟分散在最快的若干个服务器上。
+
+    - lease() 借出一个空闲连接，用完自动归还
+    - 后台线程给空闲超过 heartbeat_interval 的连接发送心跳
+    - 断开的连接（connected=False 或心跳失败）在后台被替换；全部连接失效且无法重新连接时，
+      等待中的 acquire() / lease() / submit() 抛出异常而不是一直等待
+
+    用法::
+
+        with ConnectionPool(QuotationClient, size=8) as pool:
+            with pool.lease() as client:
+                client.get_quotes(MARKET.SZ, '000001')
+            results = pool.map(lambda c, s: c.get_kline(*s, PERIOD.DAILY), symbols)
+    """
+
+    def __init__(self, client_cls, size: int = 4, hosts=None, sp: bool = False,
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL, time_out: float = CONNECT_TIMEOUT):
+        """
+        :param client_cls: 连接类型，如 QuotationClient / exQuotationClient / macQuotationClient
+        :param size: 连接数
+        :param hosts: 服务器列表，默认使用 client_cls 自带的 hosts（main_hosts / ex_hosts / mac_hosts）
+        :param sp: 是否对每个连接启用 sp 模式
+        :param heartbeat_interval: 空闲连接的心跳间隔
+        :param time_out: 连接超时时间
+        """
+        self.client_cls = client_cls
+        self.size = size
+        self.sp = sp
+        self.heartbeat_interval = heartbeat_interval
+        self.time_out = time_out
+        if hosts is None:
+            hosts = client_cls().hosts if not sp else client_cls().sp().hosts
+        self.hosts = hosts
+
+        self._ranked = []           # 按延迟排序的 (ip, port)
+        self._next_host = 0
+        self._idle = deque()        # (client, last_used)
+        self._members = 0           # 存活的连接数（含借出）
+        self._unavailable = False   # 全部连接失效且重新连接失败
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._executor = None
+        self.closed = True
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        infos = probe_hosts(self.hosts)
+        if len(infos) == 0:
+            raise Exception("no available server")
+        # 只在最快的 size 个服务器之间分散连接
+        self._ranked = [(info['ip'], info['port']) for info in infos[:self.size]]
+        self.closed = False
+        self._unavailable = False
+        self._stop_event.clear()
+
+        for _ in range(self.size):
+            client = self._new_client()
+            if client is not None:
+                with self._cond:
+                    self._members += 1
+                    self._idle.append((client, time.time()))
+                    self._cond.notify()
+        if self._members == 0:
+            self.closed = True
+            raise Exception("no available server")
+
+        self._thread = threading.Thread(target=self._maintain, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.closed = True
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._cond:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._cond:
+            while self._idle:
+                client, _ = self._idle.popleft()
+                self._drop(client)
+            self._cond.notify_all()
+
+    def _new_client(self):
+        """依次轮换服务器，创建并登录一个新连接，失败返回 None"""
+        for _ in range(len(self._ranked)):
+            ip, port = self._ranked[self._next_host % len(self._ranked)]
+            self._next_host += 1
+            client = self.client_cls()
+            if self.sp:
+                client.sp(self.hosts)
+            try:
+                if client.connect(ip, port, self.time_out) is None:
+                    continue
+                client.login()
+            except Exception as e:
+                log.debug("pool connect %s:%d failed: %s", ip, port, e)
+                continue
+            if client.connected:
+                return client
+        return None
+
+    def _drop(self, client):
+        try:
+            if client.connected:
+                client.disconnect()
+        except Exception as e:
+            log.debug(str(e))
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """借出一个连接，with 块结束后归还；连接失效时由后台线程替换"""
+        client = self.acquire(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def acquire(self, timeout: float = None):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self._idle:
+                if self.closed:
+                    raise Exception("connection pool closed")
+                if self._unavailable and self._members == 0:
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise Exception("no available connection")
+                self._cond.wait(remaining)
+            else:
+                client, _ = self._idle.popleft()
+                return client
+
+        # 全部连接失效且后台重连失败：直接再尝试一次，仍然失败时抛出异常
+        client = self._new_client()
+        if client is None:
+            raise Exception("no available server")
+        with self._cond:
+            self._members += 1
+            self._unavailable = False
+        return client
+
+    def release(self, client):
+        with self._cond:
+            if client.connected and not self.closed:
+                self._idle.append((client, time.time()))
+                self._cond.notify()
+                return
+            self._members -= 1
+        # 失效或已关闭的连接直接断开，由维护线程补足
+        self._drop(client)
+
+    def _maintain(self):
+        while not self._stop_event.wait(MAINTAIN_INTERVAL):
+            # 补足失效的连接
+            while self._members < self.size and not self._stop_event.is_set():
+                client = self._new_client()
+                with self._cond:
+                    if client is None:
+                        # 没有存活的连接时唤醒等待者，让它们抛出异常
+                        self._unavailable = self._members == 0
+                        self._cond.notify_all()
+                        break
+                    self._members += 1
+                    self._unavailable = False
+                    self._idle.append((client, time.time()))
+                    self._cond.notify()
+
+            # 给空闲过久的连接发送心跳
+            now = time.time()
+            with self._cond:
+                stale = [item for item in self._idle if now - item[1] > self.heartbeat_interval]
+                for item in stale:
+                    self._idle.remove(item)
+            for client, _ in stale:
+                try:
+                    client.doHeartBeat()
+                except Exception as e:
+                    log.debug("pool heartbeat failed: %s", e)
+                self.release(client)
+
+    def submit(self, fn, *args, **kwargs):
+        """在池内线程上执行 fn(client, *args, **kwargs)，返回 Future"""
+        with self._cond:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size)
+
+        def run():
+            with self.lease() as client:
+                return fn(client, *args, **kwargs)
+        return self._executor.submit(run)
+
+    def map(self, fn, items) -> list:
+        """并发执行 fn(client, item)，按 items 顺序返回结果；任一失败则抛出该异常"""
+        futures = [self.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
@@ -1,10 +1,14 @@
 from datetime import date
+from functools import partial
 
+from opentdx._typing import override
 from opentdx.parser import ex_quotation
 
 from .baseStockClient import BaseStockClient, update_last_ack_time, _paginate, _normalize_code_list
 from .commonClientMixin import CommonClientMixin
+from .connectionPool import ConnectionPool
 from opentdx.const import EX_MARKET, PERIOD, SORT_TYPE, ex_hosts
+from opentdx.utils.help import iter_lines
 from opentdx.utils.log import log
 
 class exQuotationClient(BaseStockClient, CommonClientMixin):
@@ -12,6 +16,25 @@ class exQuotationClient(BaseStockClient, CommonClientMixin):
         super().__init__(multithread, heartbeat, auto_retry, raise_exception)
         self.hosts = ex_hosts
         self._sp_mode_enabled = False
+        self._table_index = {}     # get_table_index 的缓存
+        # 并发下载使用的连接池，首次调用时创建
+        self.pool: ConnectionPool = None
+
+    @override
+    def disconnect(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        super().disconnect()
+
+    def get_pool(self, size: int = 4) -> ConnectionPool:
+        """并发下载共用的连接池，连接数变化时重建"""
+        if self.pool is not None and (self.pool.size != size or self.pool.closed):
+            self.pool.close()
+            self.pool = None
+        if self.pool is None:
+            self.pool = ConnectionPool(partial(type(self), raise_exception=True), size=size, hosts=self.hosts, sp=self._sp_mode_enabled).start()
+        return self.pool
 
     def login(self, show_info=False) -> bool:
         try:
@@ -46,7 +69,7 @@ class exQuotationClient(BaseStockClient, CommonClientMixin):
     @update_last_ack_time
     def get_quotes_list(self, market: EX_MARKET, start: int = 0, count: int = 100, sortType: SORT_TYPE = SORT_TYPE.CODE, reverse: bool = False) -> list[dict]:
         return _paginate(
-            lambda s, c: self.call(ex_quotation.QuotesList(market, s, c, sortType, reverse)),
+            self, lambda s, c: ex_quotation.QuotesList(market, s, c, sortType, reverse),
             100, count, start,
         )
 
@@ -65,36 +88,52 @@ class exQuotationClient(BaseStockClient, CommonClientMixin):
         return self.call(ex_quotation.Quotes2(code_list))
 
     @update_last_ack_time
-    def get_kline(self, market: EX_MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1) -> list[dict]:
-        return self.call(ex_quotation.K_Line(market, code, period, times, start, count))
+    def get_kline(self, market: EX_MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1, as_arrays: bool = False) -> list[dict] | dict:
+        return self.call(ex_quotation.K_Line(market, code, period, times, start, count, as_arrays))
 
     @update_last_ack_time
     def get_history_transaction(self, market: EX_MARKET, code: str, date: date) -> list[dict]:
         return self.call(ex_quotation.HistoryTransaction(market, code, date))
 
-    @update_last_ack_time
-    def get_table(self):
+    def iter_table(self, detail: bool = False):
+        """逐页产出商品表文本"""
+        parser_cls = ex_quotation.TableDetail if detail else ex_quotation.Table
         start = 0
-        result = ''
         while True:
-            _, count, context = self.call(ex_quotation.Table(start))
-            start += count
-            result += context
+            _, count, context = self.call(parser_cls(start))
+            if context:
+                yield context
             if count <= 0:
                 break
-        return result
+            start += count
+
+    def iter_table_rows(self, detail: bool = False, sep: str = '|'):
+        """逐行产出商品表按 sep 切分后的字段"""
+        for line in iter_lines(self.iter_table(detail)):
+            if line.strip():
+                yield line.rstrip('\r').split(sep)
+
+    @update_last_ack_time
+    def get_table(self):
+        return ''.join(self.iter_table())
 
     @update_last_ack_time
     def get_table_detail(self):
-        start = 0
-        result = ''
-        while True:
-            _, count, context = self.call(ex_quotation.TableDetail(start))
-            start += count
-            result += context
-            if count <= 0:
-                break
-        return result
+        return ''.join(self.iter_table(detail=True))
+
+    @update_last_ack_time
+    def get_table_index(self, detail: bool = False, code_column: int = 1, sep: str = '|', refresh: bool = False) -> dict[str, list[str]]:
+        """
+        以代码为键的商品表，同一个连接只下载一次
+        :param code_column: 代码所在的列
+        :param refresh: 重新下载
+        """
+        key = (detail, code_column, sep)
+        index = self._table_index.get(key)
+        if index is None or refresh:
+            index = {row[code_column]: row for row in self.iter_table_rows(detail, sep) if len(row) > code_column}
+            self._table_index[key] = index
+        return index
 
     @update_last_ack_time
     def get_tick_chart(self, market: EX_MARKET, code: str, date: date = None) -> list[dict]:
@@ -108,5 +147,23 @@ class exQuotationClient(BaseStockClient, CommonClientMixin):
         return self.call(ex_quotation.ChartSampling(market, code))
 
     @update_last_ack_time
-    def download_file(self, filename: str, filesize=0, report_hook=None):
-        return super().download_file(ex_quotation.FileDownload, filename, filesize, report_hook)
+    def download_file(self, filename: str, filesize=0, report_hook=None, workers: int = 1, path: str = None, verify: bool = False, fileobj=None):
+        """
+        :param workers: 大于 1 时按块分散到连接池的多个连接上并发下载
+        :param path: 写入该文件并返回 path，支持断点续传
+        :param verify: 用 FileMeta 的 hash_value 校验下载的文件
+        :param fileobj: 按顺序写入该文件对象并返回它，内存占用与文件大小无关
+        """
+        hash_value = None
+        if verify or (filesize == 0 and (workers > 1 or path is not None)):
+            # 按块下载需要先知道文件大小
+            meta = self.call(ex_quotation.FileMeta(filename))
+            if meta:
+                filesize = filesize or meta['size']
+                hash_value = meta['hash_value'] if verify else None
+        pool = self.get_pool(workers) if workers > 1 and filesize else None
+        return super().download_file(ex_quotation.FileDownload, filename, filesize, report_hook, pool, path, hash_value, fileobj)
+
+    def iter_file(self, filename: str, filesize=0):
+        """逐块产出文件内容，filesize 已知时以流水线方式请求"""
+        return self._iter_file(ex_quotation.FileDownload, filename, filesize)
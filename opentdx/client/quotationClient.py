@@ -1,22 +1,168 @@
 from __future__ import annotations
 
 from datetime import date
-import math
+from functools import partial
 from typing import Optional
+
+import numpy as np
+import pandas as pd
 from opentdx._typing import override
 
-from .baseStockClient import BaseStockClient, update_last_ack_time, _paginate, _normalize_code_list
+from .baseStockClient import BaseStockClient, update_last_ack_time, _iter_pages, _paginate, _normalize_code_list
 from .commonClientMixin import CommonClientMixin
+from .connectionPool import ConnectionPool
 from opentdx.utils.block_reader import BlockReader, BlockReader_TYPE_FLAT
 from opentdx.const import BLOCK_FILE_TYPE, CATEGORY, FILTER_TYPE, PERIOD, MARKET, SORT_TYPE, ADJUST, main_hosts, mac_hosts
 from opentdx.parser import quotation
+from opentdx.stream import TransactionFollower
 from opentdx.utils.log import log
-from opentdx.utils.cache import finance_cache
+from opentdx.utils.cache import company_content_cache, finance_cache, finance_store, xdxr_store
+from opentdx.utils.help import concat_columns, iter_lines, seconds_until_rollover, trading_day
+
+# 整市场预取流通股本时只请求 A 股代码
+A_SHARE_PREFIXES = {
+    MARKET.SZ: ('00', '30'),
+    MARKET.SH: ('60', '68'),
+    MARKET.BJ: ('4', '8', '92'),
+}
+# 缺失的流通股本超过这个数量时，分散到连接池上并发请求
+PREFETCH_POOL_THRESHOLD = 500
+# 各市场已整体预取流通股本的交易日
+float_shares_loaded: dict[MARKET, date] = {}
+# 单个 Quotes 请求最多包含的股票数
+QUOTES_BATCH_SIZE = 80
+
+def scale_quotes(quotes_list: list[dict]) -> list[dict]:
+    """行情价格还原（/100）"""
+    for quotes in quotes_list:
+        for item in ['high', 'low', 'open', 'close', 'pre_close', 'neg_price']:
+            quotes[item] /= 100
+
+        quotes['open_amount'] *= 100
+        quotes['rise_speed'] = f'{(quotes["rise_speed"] / 100):.2f}%'
+        for bid in quotes['handicap']['bid']:
+            bid['price'] /= 100
+        for ask in quotes['handicap']['ask']:
+            ask['price'] /= 100
+    return quotes_list
+
+def format_quotes_list(results: list[dict]) -> list[dict]:
+    for quotes in results:
+        quotes['short_turnover'] = f"{(quotes['short_turnover'] / 100):.2f}%"
+        quotes['opening_rush'] = f"{(quotes['opening_rush'] / 100):.2f}%"
+        quotes['vol_rise_speed'] = f"{quotes['vol_rise_speed']:.2f}%"
+        quotes['depth'] = f'{(quotes["depth"]):.2f}%'
+    return results
+
+def apply_turnover(quotes_list: list[dict], float_shares: dict) -> list[dict]:
+    """按 {(market, code): 流通股本} 批量计算换手率，缺少流通股本的行不设置"""
+    rows = [quotes for quotes in quotes_list if (quotes.get('market'), quotes.get('code')) in float_shares and quotes.get('vol')]
+    if not rows:
+        return quotes_list
+    vol = np.array([quotes['vol'] for quotes in rows], dtype=np.float64)
+    shares = np.array([float_shares[(quotes['market'], quotes['code'])] for quotes in rows], dtype=np.float64)
+    for quotes, turnover in zip(rows, np.round(vol * 100 / shares * 100, 2).tolist()):
+        quotes['turnover'] = turnover
+    return quotes_list
+
+def quotes_columns(quotes_list: list[dict]) -> dict:
+    """Quotes 解析结果转换为 {列名: numpy 数组}，一档买卖盘展开为 bid1/bid_vol1/ask1/ask_vol1"""
+    columns = {
+        'market': np.array([quotes['market'].value for quotes in quotes_list], dtype=np.int64),
+        'code': np.array([quotes['code'] for quotes in quotes_list], dtype='U6'),
+    }
+    for key in ('close', 'open', 'high', 'low', 'pre_close', 'neg_price', 'vol', 'cur_vol', 'amount', 'in_vol', 'out_vol',
+                's_amount', 'open_amount', 'rise_speed', 'short_turnover', 'min2_amount', 'opening_rush', 'vol_rise_speed', 'depth'):
+        columns[key] = np.array([quotes[key] for quotes in quotes_list], dtype=np.float64)
+    for side in ('bid', 'ask'):
+        columns[f'{side}1'] = np.array([quotes['handicap'][side][0]['price'] for quotes in quotes_list], dtype=np.float64)
+        columns[f'{side}_vol1'] = np.array([quotes['handicap'][side][0]['vol'] for quotes in quotes_list], dtype=np.float64)
+    columns['active'] = np.array([quotes['active'] for quotes in quotes_list], dtype=np.int64)
+    columns['server_time'] = np.array([quotes['server_time'] for quotes in quotes_list], dtype=object)
+    return columns
+
+def scale_quotes_arrays(columns: dict, float_shares: dict) -> dict:
+    """scale_quotes + format_quotes_list + apply_turnover 的列式版本，百分比字段为数值（单位 %），缺少流通股本的换手率为 NaN"""
+    for key in ('close', 'open', 'high', 'low', 'pre_close', 'neg_price', 'bid1', 'ask1'):
+        columns[key] = columns[key] / 100
+    columns['open_amount'] = columns['open_amount'] * 100
+    for key in ('rise_speed', 'short_turnover', 'opening_rush'):
+        columns[key] = columns[key] / 100
+    shares = np.array([float_shares.get((MARKET(market), code), np.nan) for market, code in zip(columns['market'].tolist(), columns['code'].tolist())], dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns['turnover'] = np.where(columns['vol'] > 0, np.round(columns['vol'] * 100 / shares * 100, 2), np.nan)
+    return columns
+
+def scale_kline(bars: list[dict], float_shares=None) -> list[dict]:
+    """K线价格还原（/1000）并计算换手率"""
+    for bar in bars:
+        bar['open'] /= 1000
+        bar['close'] /= 1000
+        bar['high'] /= 1000
+        bar['low'] /= 1000
+        bar['turnover'] = round(bar['vol'] / float_shares * 100, 2) if float_shares and bar['vol'] else 0
+    return bars
+
+def scale_kline_arrays(columns: dict, float_shares=None) -> dict:
+    """scale_kline 的列式版本"""
+    for item in ['open', 'close', 'high', 'low']:
+        columns[item] = columns[item] / 1000
+    vol = columns['vol']
+    columns['turnover'] = np.round(vol / float_shares * 100, 2) if float_shares else np.zeros(len(vol))
+    return columns
+
+def scale_tick_chart(data: list[dict]) -> list[dict]:
+    for item in data:
+        item['price'] /= 100
+        item['avg'] /= 10000
+    return data
+
+def scale_transaction(transaction: list[dict]) -> list[dict]:
+    for item in transaction:
+        item['price'] = item['price'] / 100
+    return transaction
+
+def scale_transaction_arrays(columns: dict) -> dict:
+    columns['price'] = columns['price'] / 100
+    return columns
+
+def kline_frame(result: dict) -> pd.DataFrame:
+    """{(market, code): {列名: 数组}} 转换为带 market、code 列的长表"""
+    frames = []
+    for (market, code), columns in result.items():
+        if not columns:
+            continue
+        frame = pd.DataFrame(columns)
+        frame.insert(0, 'code', code)
+        frame.insert(0, 'market', market)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
 
 class QuotationClient(BaseStockClient, CommonClientMixin):
     def __init__(self, multithread=False, heartbeat=False, auto_retry=False, raise_exception=False):
         super().__init__(multithread, heartbeat, auto_retry, raise_exception)
         self.hosts = main_hosts
+        # 批量接口使用的连接池，首次调用时创建
+        self.pool: ConnectionPool = None
+
+    @override
+    def disconnect(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        super().disconnect()
+
+    def get_pool(self, size: int = 4) -> ConnectionPool:
+        """批量接口共用的连接池，连接数变化时重建"""
+        if self.pool is not None and (self.pool.size != size or self.pool.closed):
+            self.pool.close()
+            self.pool = None
+        if self.pool is None:
+            # 池内连接出错时抛出异常，便于批量接口逐个记录失败；sp 模式和服务器与当前客户端一致
+            self.pool = ConnectionPool(partial(type(self), raise_exception=True), size=size, hosts=self.hosts, sp=self._sp_mode_enabled).start()
+        return self.pool
         
     def login(self, show_info=False) -> bool:
         try:
@@ -32,47 +178,140 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
     def doHeartBeat(self):
         return self.call(quotation.HeartBeat())
 
-    def quotes_adjustment(self, quotes_list: list[dict]) -> list[dict]:
-        for quotes in quotes_list:
-            for item in ['high', 'low', 'open', 'close', 'pre_close', 'neg_price']:
-                quotes[item] /= 100
-
-            quotes['open_amount'] *= 100
-            quotes['rise_speed'] = f'{(quotes["rise_speed"] / 100):.2f}%'
-            for bid in quotes['handicap']['bid']:
-                bid['price'] /= 100
-            for ask in quotes['handicap']['ask']:
-                ask['price'] /= 100
-
-            market = quotes.get('market')
-            code = quotes.get('code')
-            vol = quotes.get('vol')
-
-            if market and code and vol:
-                cache_key = f"{market.value}_{code}"
+    @update_last_ack_time
+    def get_finance(self, market: MARKET, code: str) -> dict:
+        """财务及股本信息，按交易日缓存在内存和磁盘"""
+        cache_key = f"{market.value}_{code}"
+        finance = finance_store.get(cache_key)
+        if finance is None:
+            finance = self.call(quotation.Finance(market, code))
+            if finance:
+                finance_store.set(cache_key, finance)
+        return finance
+
+    @update_last_ack_time
+    def get_xdxr(self, market: MARKET, code: str) -> list[dict]:
+        """除权除息信息，按交易日缓存在内存和磁盘"""
+        cache_key = f"{market.value}_{code}"
+        xdxr = xdxr_store.get(cache_key)
+        if xdxr is None:
+            xdxr = self.call(quotation.XDXR(market, code))
+            if xdxr is not None:
+                xdxr_store.set(cache_key, xdxr)
+        return xdxr
+
+    def _get_float_shares(self, market: MARKET, code: str):
+        cache_key = f"{market.value}_{code}"
+        float_shares = finance_cache.get(cache_key)
+        if float_shares is None:
+            finance = self.get_finance(market, code)
+            float_shares = finance.get('liutongguben') if finance else None
+            if float_shares:
+                finance_cache.set(cache_key, float_shares, seconds_until_rollover())
+        return float_shares
+
+    def prefetch_finance(self, symbols: list[tuple[MARKET, str]], workers: int = 1, refresh: bool = False) -> dict:
+        """
+        以流水线方式批量获取财务信息并写入缓存，已缓存的不再请求
+        :param workers: 缺失较多时分散到 workers 个连接上并发请求
+        :param refresh: 忽略缓存重新请求
+        :return: {(market, code): 财务信息}
+        """
+        keys = {symbol: f"{symbol[0].value}_{symbol[1]}" for symbol in dict.fromkeys(symbols)}
+        cached = {} if refresh else finance_store.get_many(keys.values())
+        finances = {symbol: cached[key] for symbol, key in keys.items() if key in cached}
+        missing = [symbol for symbol in keys if symbol not in finances]
+        if not missing:
+            return finances
+
+        if workers > 1 and len(missing) > PREFETCH_POOL_THRESHOLD:
+            pool = self.get_pool(workers)
+            chunks = [missing[i::workers] for i in range(workers)]
+            for future in [pool.submit(lambda client, chunk: client.prefetch_finance(chunk, refresh=True), chunk) for chunk in chunks]:
                 try:
-                    float_shares = finance_cache.get(cache_key)
-                    if float_shares is None:
-                        finance_data = self.call(quotation.Finance(market, code))
-                        if finance_data:
-                            float_shares = finance_data.get('liutongguben')
-                            if float_shares:
-                                finance_cache.set(cache_key, float_shares)
-
-                    if float_shares:
-                        quotes['turnover'] = round(vol * 100 / float_shares * 100, 2)
+                    finances.update(future.result())
                 except Exception as e:
-                    log.debug("获取流通股本失败 %s: %s", code, e)
+                    log.warning("批量获取财务信息失败: %s", e)
+            return finances
 
-        return quotes_list
+        fetched = {}
+        results = self.call_many(quotation.Finance(market, code) for market, code in missing)
+        try:
+            for symbol, finance in zip(missing, results):
+                if finance:
+                    fetched[keys[symbol]] = finance
+                    finances[symbol] = finance
+        finally:
+            results.close()
+            finance_store.set_many(fetched)
+        return finances
+
+    def prefetch_xdxr(self, symbols: list[tuple[MARKET, str]], refresh: bool = False) -> dict:
+        """
+        以流水线方式批量获取除权除息信息并写入缓存，已缓存的不再请求
+        :return: {(market, code): 除权除息信息}
+        """
+        keys = {symbol: f"{symbol[0].value}_{symbol[1]}" for symbol in dict.fromkeys(symbols)}
+        cached = {} if refresh else xdxr_store.get_many(keys.values())
+        xdxrs = {symbol: cached[key] for symbol, key in keys.items() if key in cached}
+        missing = [symbol for symbol in keys if symbol not in xdxrs]
+        if not missing:
+            return xdxrs
+
+        fetched = {}
+        results = self.call_many(quotation.XDXR(market, code) for market, code in missing)
+        try:
+            for symbol, xdxr in zip(missing, results):
+                if xdxr is not None:
+                    fetched[keys[symbol]] = xdxr
+                    xdxrs[symbol] = xdxr
+        finally:
+            results.close()
+            xdxr_store.set_many(fetched)
+        return xdxrs
+
+    def prefetch_float_shares(self, symbols: list[tuple[MARKET, str]], workers: int = 1, refresh: bool = False) -> dict:
+        """
+        批量获取流通股本，参数同 prefetch_finance
+        :return: {(market, code): 流通股本}
+        """
+        finances = self.prefetch_finance(symbols, workers, refresh)
+        float_shares = {symbol: finance['liutongguben'] for symbol, finance in finances.items() if finance.get('liutongguben')}
+        ttl = seconds_until_rollover()
+        for (market, code), value in float_shares.items():
+            finance_cache.set(f"{market.value}_{code}", value, ttl)
+        return float_shares
+
+    def load_float_shares(self, markets: list[MARKET] = (MARKET.SZ, MARKET.SH, MARKET.BJ), workers: int = 4) -> int:
+        """
+        整市场预取 A 股财务信息（含流通股本），每个市场每个交易日只请求一次，
+        磁盘缓存中已有当日数据的股票不会重复请求
+        :return: 本交易日需要预取的股票数
+        """
+        day = trading_day()
+        markets = [market for market in markets if float_shares_loaded.get(market) != day]
+        symbols = []
+        for market in markets:
+            symbols.extend((market, item['code']) for item in self.get_list(market) if item['code'].startswith(A_SHARE_PREFIXES[market]))
+        if symbols:
+            self.prefetch_finance(symbols, workers)
+        for market in markets:
+            float_shares_loaded[market] = day
+        return len(symbols)
+
+    def quotes_adjustment(self, quotes_list: list[dict]) -> list[dict]:
+        scale_quotes(quotes_list)
+        symbols = [(quotes['market'], quotes['code']) for quotes in quotes_list if quotes.get('market') and quotes.get('code') and quotes.get('vol')]
+        float_shares = {}
+        try:
+            # 缺失的流通股本一次性流水线请求，而不是逐行请求；整市场并发预取见 load_float_shares
+            float_shares = self.prefetch_float_shares(symbols)
+        except Exception as e:
+            log.debug("获取流通股本失败: %s", e)
+        return apply_turnover(quotes_list, float_shares)
 
     def _adjust_quotes_list(self, results: list[dict]) -> list[dict]:
-        for quotes in results:
-            quotes['short_turnover'] = f"{(quotes['short_turnover'] / 100):.2f}%"
-            quotes['opening_rush'] = f"{(quotes['opening_rush'] / 100):.2f}%"
-            quotes['vol_rise_speed'] = f"{quotes['vol_rise_speed']:.2f}%"
-            quotes['depth'] = f'{(quotes["depth"]):.2f}%'
-        return self.quotes_adjustment(results)
+        return self.quotes_adjustment(format_quotes_list(results))
 
     @update_last_ack_time
     def get_count(self, market: MARKET) -> int:
@@ -81,7 +320,7 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
     @update_last_ack_time
     def get_list(self, market: MARKET, start=0, count=0) -> list[dict]:
         return _paginate(
-            lambda s, c: self.call(quotation.List(market, s, c)),
+            self, lambda s, c: quotation.List(market, s, c),
             1600, count, start,
         )
 
@@ -107,39 +346,72 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
 
         return index_infos
 
-    def get_kline(self, market: MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE) -> list[dict]:
+    def iter_kline(self, market: MARKET, code: str, period: PERIOD, start: int = 0, count: int | None = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE, as_arrays: bool = False):
+        """
+        逐页返回 K 线（已还原价格），页按到达顺序产出：第一页最新，往后越来越早，页内按时间升序。
+        流通股本在收到第一页非空数据后才请求，没有数据的代码不会多一个往返。
+        迭代过程中可以用同一个客户端发起其它请求，也可以中途停止迭代
+        :param count: 为 0 时不发请求、没有任何页；为 None 时一直翻页到没有更早的数据为止
+        """
         MAX_KLINE_COUNT = 800
-        bars = []
-        while len(bars) < count:
-            part = self.call(quotation.K_Line(market, code, period, times, start + len(bars), min((count - len(bars)), MAX_KLINE_COUNT), adjust))
-            if not part:
-                break
-            bars = [*part, *bars]
-
-        if not bars:
-            return []
-
-        cache_key = f"{market.value}_{code}"
+        if count == 0:
+            return
+        scale = scale_kline_arrays if as_arrays else scale_kline
+        pages = _iter_pages(
+            self, lambda s, c: quotation.K_Line(market, code, period, times, s, c, adjust, as_arrays),
+            MAX_KLINE_COUNT, 0 if count is None else count, start, size=(lambda part: len(part['open'])) if as_arrays else len,
+        )
         float_shares = None
+        for i, part in enumerate(pages):
+            if i == 0:
+                try:
+                    float_shares = self._get_float_shares(market, code)
+                except Exception as e:
+                    log.warning("获取流通股本失败: %s", e)
+            yield scale(part, float_shares)
+
+    def get_kline(self, market: MARKET, code: str, period: PERIOD, start: int = 0, count: int | None = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE, as_arrays: bool = False) -> list[dict] | dict:
+        """
+        :param count: 为 0 时返回空结果；为 None 时取全部历史
+        :param as_arrays: 为 True 时返回 {列名: numpy 数组}，datetime 为 datetime64[m]，价格为 float64
+        """
+        # 越往后的页越早，最后倒序拼接一次
+        parts = list(self.iter_kline(market, code, period, start, count, times, adjust, as_arrays))[::-1]
+        if as_arrays:
+            return concat_columns(parts)
+        return [bar for part in parts for bar in part]
+
+    def get_kline_batch(self, symbols: list[tuple[MARKET, str]], period: PERIOD, count: int = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE, workers: int = 4, as_frame: bool = False):
+        """
+        批量获取多只股票的 K 线，请求分散在 workers 个连接上并发执行，单只失败不影响其它
+        :param as_frame: 为 True 时结果为带 market、code 列的长表 DataFrame
+        :return: (结果, 失败)。结果为 {(market, code): {列名: numpy 数组}}，失败为 {(market, code): 异常}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        pool = self.get_pool(workers)
+
+        # 预先批量获取流通股本，避免每只股票单独请求一次 Finance
         try:
-            float_shares = finance_cache.get(cache_key)
-            if float_shares is None:
-                finance_data = self.call(quotation.Finance(market, code))
-                if finance_data:
-                    float_shares = finance_data.get('liutongguben')
-                    if float_shares:
-                        finance_cache.set(cache_key, float_shares)
+            self.prefetch_float_shares(symbols, workers)
         except Exception as e:
-            log.warning("获取流通股本失败: %s", e)
-
-        for bar in bars:
-            bar['open'] /= 1000
-            bar['close'] /= 1000
-            bar['high'] /= 1000
-            bar['low'] /= 1000
-            bar['turnover'] = round(bar['vol'] / float_shares * 100, 2) if float_shares and bar['vol'] else 0
-
-        return bars
+            log.warning("批量获取流通股本失败: %s", e)
+
+        futures = {
+            symbol: pool.submit(lambda client, s: client.get_kline(s[0], s[1], period, 0, count, times, adjust, True), symbol)
+            for symbol in symbols
+        }
+        result = {}
+        errors = {}
+        for symbol, future in futures.items():
+            try:
+                result[symbol] = future.result()
+            except Exception as e:
+                log.debug("获取K线失败 %s: %s", symbol, e)
+                errors[symbol] = e
+
+        if as_frame:
+            return kline_frame(result), errors
+        return result, errors
 
     @update_last_ack_time
     def get_tick_chart(self, market: MARKET, code: str, date: date = None, start: int = 0, count: int = 0xba00) -> list[dict]:
@@ -149,10 +421,7 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
             data = self.call(quotation.HistoryTickChart(market, code, date))
             if start != 0 or count != 0xba00:
                 data = data[start:start + count]
-        for item in data:
-            item['price'] /= 100
-            item['avg'] /= 10000
-        return data
+        return scale_tick_chart(data)
 
     @update_last_ack_time
     def get_stock_quotes_details(self, code_list: MARKET | list[tuple[MARKET, str]], code=None) -> list[dict]:
@@ -173,7 +442,7 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
         if filter is None:
             filter = []
         results = _paginate(
-            lambda s, c: self.call(quotation.QuotesList(category, s, c, sortType, reverse, filter)),
+            self, lambda s, c: quotation.QuotesList(category, s, c, sortType, reverse, filter),
             80, count, start,
         )
         return self._adjust_quotes_list(results)
@@ -184,10 +453,44 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
         quotes_list = self.call(quotation.Quotes(all_stock))
         return self._adjust_quotes_list(quotes_list)
 
+    def snapshot(self, symbols: list[tuple[MARKET, str]], workers: int = 4, as_frame: bool = False) -> dict | pd.DataFrame:
+        """
+        全市场行情快照：按 QUOTES_BATCH_SIZE 分批，分散到 workers 个连接上，每个连接内以流水线方式请求
+        :return: {列名: numpy 数组}，行顺序与请求一致（服务器不返回的代码会缺失）；as_frame 为 True 时返回 DataFrame
+        """
+        symbols = list(dict.fromkeys(symbols))
+        chunks = [symbols[i:i + QUOTES_BATCH_SIZE] for i in range(0, len(symbols), QUOTES_BATCH_SIZE)]
+        if workers > 1 and len(chunks) > 1:
+            pool = self.get_pool(workers)
+            # 每个连接负责连续的若干批，拼接后保持原有顺序
+            step = -(-len(chunks) // pool.size)
+            parts = pool.map(lambda client, group: client._fetch_quotes(group), [chunks[i:i + step] for i in range(0, len(chunks), step)])
+        else:
+            parts = [self._fetch_quotes(chunks)]
+        quotes_list = [quotes for part in parts for quotes in part]
+
+        float_shares = {}
+        try:
+            float_shares = self.prefetch_float_shares([(quotes['market'], quotes['code']) for quotes in quotes_list if quotes['vol']], workers)
+        except Exception as e:
+            log.debug("获取流通股本失败: %s", e)
+        columns = scale_quotes_arrays(quotes_columns(quotes_list), float_shares)
+        return pd.DataFrame(columns) if as_frame else columns
+
+    def _fetch_quotes(self, chunks: list[list[tuple[MARKET, str]]]) -> list[dict]:
+        results = self.call_many(quotation.Quotes(chunk) for chunk in chunks)
+        quotes_list = []
+        try:
+            for part in results:
+                quotes_list.extend(part or [])
+        finally:
+            results.close()
+        return quotes_list
+
     @update_last_ack_time
     def get_unusual(self, market: MARKET, start: int = 0, count: int = 0) -> list[dict]:
         return _paginate(
-            lambda s, c: self.call(quotation.Unusual(market, s, c)),
+            self, lambda s, c: quotation.Unusual(market, s, c),
             600, count, start,
         )
 
@@ -202,25 +505,34 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
             item['price'] = item['price'] / 100
         return data
 
-    @update_last_ack_time
-    def get_transaction(self, market: MARKET, code: str, date: date = None) -> list[dict]:
+    def iter_transaction(self, market: MARKET, code: str, date: date = None, as_arrays: bool = False):
+        """
+        逐页返回分笔成交（已还原价格），第一页为最近的成交，往后越来越早，页内按时间升序。
+        先只请求一页，收到满页后才流水线请求更多页，见 _iter_pages；
+        迭代过程中可以用同一个客户端发起其它请求，也可以中途停止迭代
+        """
         MAX_TRANSACTION_COUNT = 1800 if date is None else 2000
-        start = 0
-        transaction = []
-        while True:
-            if date is None:
-                part = self.call(quotation.Transaction(market, code, start, MAX_TRANSACTION_COUNT))
-            else:
-                part = self.call(quotation.HistoryTransaction(market, code, date, start, MAX_TRANSACTION_COUNT))
-            if not part:
-                break
-            transaction = [*part, *transaction]
-            if len(part) < MAX_TRANSACTION_COUNT:
-                break
-            start = start + len(part)
-        for item in transaction:
-            item['price'] = item['price'] / 100
-        return transaction
+        if date is None:
+            make_parser = lambda s, c: quotation.Transaction(market, code, s, c, as_arrays)
+        else:
+            make_parser = lambda s, c: quotation.HistoryTransaction(market, code, date, s, c, as_arrays)
+        scale = scale_transaction_arrays if as_arrays else scale_transaction
+        for part in _iter_pages(self, make_parser, MAX_TRANSACTION_COUNT, 0, size=(lambda part: len(part['price'])) if as_arrays else len):
+            yield scale(part)
+
+    @update_last_ack_time
+    def get_transaction(self, market: MARKET, code: str, date: date = None, as_arrays: bool = False) -> list[dict] | dict:
+        parts = list(self.iter_transaction(market, code, date, as_arrays))[::-1]
+        if as_arrays:
+            return concat_columns(parts)
+        return [item for part in parts for item in part]
+
+    def follow_transactions(self, symbols: list[tuple[MARKET, str]], interval: float = 3.0, workers: int = 1, history: bool = True) -> TransactionFollower:
+        """
+        增量跟踪当日分笔成交，每次轮询只请求最新的一小页并推送新增的成交，见 TransactionFollower
+        :param history: 第一次轮询是否推送当日已有的成交
+        """
+        return TransactionFollower(self, symbols, interval, workers, history=history)
 
     @update_last_ack_time
     def get_chart_sampling(self, market: MARKET, code: str) -> list[float]:
@@ -228,33 +540,93 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
 
     @update_last_ack_time
     def get_company_info(self, market: MARKET, code: str) -> list[dict]:
-        category = self.call(quotation.CompanyCategory(market, code))
-
-        info = []
-        for part in category:
-            content = self.call(quotation.CompanyContent(market, code, part['filename'], part['start'], part['length']))
-            info.append({
+        return self._company_info([(market, code)])[(market, code)]
+
+    def get_company_info_batch(self, symbols: list[tuple[MARKET, str]], workers: int = 4):
+        """
+        批量获取 F10，股票分散在 workers 个连接上，每个连接内以流水线方式请求
+        :return: (结果, 失败)。结果为 {(market, code): get_company_info 的结果}，失败为 {(market, code): 异常}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        result = {}
+        errors = {}
+        if workers <= 1 or len(symbols) <= 1:
+            chunks = [symbols]
+            futures = None
+        else:
+            pool = self.get_pool(workers)
+            chunks = [symbols[i::workers] for i in range(workers) if symbols[i::workers]]
+            futures = [pool.submit(lambda client, chunk: client._company_info(chunk), chunk) for chunk in chunks]
+
+        for i, chunk in enumerate(chunks):
+            try:
+                result.update(futures[i].result() if futures else self._company_info(chunk))
+            except Exception as e:
+                log.debug("获取F10失败 %s: %s", chunk, e)
+                errors.update((symbol, e) for symbol in chunk)
+        return result, errors
+
+    def _company_info(self, symbols: list[tuple[MARKET, str]]) -> dict:
+        """依次以流水线方式请求全部目录、缺少的章节内容、除权除息和财报，往返次数与股票和章节数量无关"""
+        results = self.call_many(quotation.CompanyCategory(market, code) for market, code in symbols)
+        try:
+            categories = dict(zip(symbols, results))
+        finally:
+            results.close()
+
+        sections = [(symbol, part) for symbol in symbols for part in categories.get(symbol) or []]
+        contents = self._company_contents(sections)
+        xdxrs = self.prefetch_xdxr(symbols)
+        finances = self.prefetch_finance(symbols)
+
+        infos = {symbol: [] for symbol in symbols}
+        for (symbol, part), content in zip(sections, contents):
+            infos[symbol].append({
                 'name': part['name'],
-                'content': content['content'],
-            })
-
-        xdxr = self.call(quotation.XDXR(market, code))
-        if xdxr:
-            info.append({
-                'name': '除权分红',
-                'content': xdxr,
-            })
-
-        finance = self.call(quotation.Finance(market, code))
-        if finance:
-            info.append({
-                'name': '财报',
-                'content': finance,
+                'content': content,
             })
-        return info
+        for symbol, info in infos.items():
+            if xdxrs.get(symbol):
+                info.append({
+                    'name': '除权分红',
+                    'content': xdxrs[symbol],
+                })
+            if finances.get(symbol):
+                info.append({
+                    'name': '财报',
+                    'content': finances[symbol],
+                })
+        return infos
+
+    def _company_contents(self, sections: list[tuple[tuple[MARKET, str], dict]]) -> list[str]:
+        """按 (文件名, 起始, 长度) 缓存的章节内容，缺少的以流水线方式请求"""
+        keys = [f"{part['filename']}_{part['start']}_{part['length']}" for _, part in sections]
+        contents = [company_content_cache.get(key) for key in keys]
+        missing = [i for i, content in enumerate(contents) if content is None]
+        if not missing:
+            return contents
+
+        results = self.call_many(
+            quotation.CompanyContent(sections[i][0][0], sections[i][0][1], sections[i][1]['filename'], sections[i][1]['start'], sections[i][1]['length'])
+            for i in missing
+        )
+        ttl = seconds_until_rollover()
+        try:
+            for i, content in zip(missing, results):
+                contents[i] = content['content']
+                company_content_cache.set(keys[i], contents[i], ttl)
+        finally:
+            results.close()
+        if any(content is None for content in contents):
+            raise Exception("获取F10内容失败")
+        return contents
 
     @update_last_ack_time
-    def get_block_file(self, block_file_type: BLOCK_FILE_TYPE):
+    def get_block_file(self, block_file_type: BLOCK_FILE_TYPE, workers: int = 1, verify: bool = False):
+        """
+        :param workers: 大于 1 时通过连接池并发下载
+        :param verify: 用 FileMeta 的 hash_value 校验下载的文件
+        """
         try:
             meta = self.call(quotation.FileMeta(block_file_type.value))
         except Exception as e:
@@ -264,22 +636,44 @@ class QuotationClient(BaseStockClient, CommonClientMixin):
         if not meta:
             return None
 
-        size = meta['size']
-        one_chunk = 0x7530
-
-        file_content = bytearray()
-        for seg in range(math.ceil(size / one_chunk)):
-            start = seg * one_chunk
-            piece_data = self.call(quotation.Block(block_file_type, start, one_chunk))["data"]
-            file_content.extend(piece_data)
-
+        pool = self.get_pool(workers) if workers > 1 else None
+        file_content = super().download_file(quotation.FileDownload, block_file_type.value, meta['size'],
+                                             pool=pool, hash_value=meta['hash_value'] if verify else None)
         return BlockReader().get_data(file_content, BlockReader_TYPE_FLAT)
 
     @update_last_ack_time
-    def download_file(self, filename: str, filesize=0, report_hook=None) -> bytearray:
-        return super().download_file(quotation.FileDownload, filename, filesize, report_hook)
+    def get_file_meta(self, filename: str) -> dict:
+        """文件大小和 hash_value"""
+        return self.call(quotation.FileMeta(filename))
+
+    @update_last_ack_time
+    def download_file(self, filename: str, filesize=0, report_hook=None, workers: int = 1, path: str = None, verify: bool = False, fileobj=None):
+        """
+        :param workers: 大于 1 时按块分散到连接池的多个连接上并发下载
+        :param path: 写入该文件并返回 path，支持断点续传
+        :param verify: 用 FileMeta 的 hash_value 校验下载的文件
+        :param fileobj: 按顺序写入该文件对象并返回它，内存占用与文件大小无关
+        """
+        hash_value = None
+        if verify or (filesize == 0 and (workers > 1 or path is not None)):
+            # 按块下载需要先知道文件大小
+            meta = self.get_file_meta(filename)
+            if meta:
+                filesize = filesize or meta['size']
+                hash_value = meta['hash_value'] if verify else None
+        pool = self.get_pool(workers) if workers > 1 and filesize else None
+        return super().download_file(quotation.FileDownload, filename, filesize, report_hook, pool, path, hash_value, fileobj)
+
+    def iter_file(self, filename: str, filesize=0):
+        """逐块产出文件内容，filesize 已知时以流水线方式请求"""
+        return self._iter_file(quotation.FileDownload, filename, filesize)
+
+    def iter_text_file(self, filename: str, sep: str = '|', filesize=0):
+        """逐行产出 GBK 文本文件按 sep 切分后的字段，内存占用与文件大小无关"""
+        for line in iter_lines(self.iter_file(filename, filesize)):
+            if line.strip():
+                yield line.split(sep)
 
     @update_last_ack_time
-    def get_text_file(self, filename: str, sep: str = '|') -> list[str]:
-        file_content = self.download_file(filename).decode("gbk", errors="replace")
-        return [line.split(sep) for line in file_content.split('\n') if line.strip()]
+    def get_text_file(self, filename: str, sep: str = '|') -> list[list[str]]:
+        return list(self.iter_text_file(filename, sep))
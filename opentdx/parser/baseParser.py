@@ -6,6 +6,7 @@ class BaseParser:
     head = 0xc
     customize = 0
     need_zip = False
+    as_arrays = False   # True 时 deserialize 返回 {列名: numpy 数组}
     body = bytearray()
     
     def __init__(self):
@@ -1,14 +1,22 @@
 import struct
+
+import numpy as np
 from opentdx._typing import override
 
 from opentdx.const import EX_MARKET, PERIOD
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import to_datetime
+from opentdx.utils.help import columns_to_rows, to_datetime64
+
+BAR_DTYPE = np.dtype([
+    ('date', '<u4'), ('open', '<f4'), ('high', '<f4'), ('low', '<f4'), ('close', '<f4'),
+    ('amount', '<f4'), ('vol', '<u4'), ('unknown', '<u4'),
+])
 
 @register_parser(0x2489, 1)
 class K_Line2(BaseParser):
-    def __init__(self, market: EX_MARKET, code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 800):
+    def __init__(self, market: EX_MARKET, code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 800, as_arrays: bool = False):
         self.body = struct.pack('<B23sHHII16x', market.value, code.encode('gbk'), period.value, times, start, count)
+        self.as_arrays = as_arrays
 
     @override
     def deserialize(self, data):
@@ -16,17 +24,16 @@ class K_Line2(BaseParser):
 
         minute_category = period < 4 or period == 7 or period == 8
 
-        results = []
-        for i in range(count):
-            date_num, open, high, low, close, amount, vol, _ = struct.unpack('<IfffffII', data[42 + 32 * i: 42 + 32 * i + 32])
-            
-            results.append({
-                'time': to_datetime(date_num, minute_category),
-                'open': open,
-                'high': high,
-                'low': low,
-                'close': close,
-                'amount': amount,
-                'vol': vol,
-            })
-        return results
\ No newline at end of file
+        bars = np.frombuffer(data, dtype=BAR_DTYPE, count=count, offset=42)
+        columns = {
+            'time': to_datetime64(bars['date'], minute_category),
+            'open': bars['open'].astype(np.float64),
+            'high': bars['high'].astype(np.float64),
+            'low': bars['low'].astype(np.float64),
+            'close': bars['close'].astype(np.float64),
+            'amount': bars['amount'].astype(np.float64),
+            'vol': bars['vol'].astype(np.int64),
+        }
+        if self.as_arrays:
+            return columns
+        return columns_to_rows(columns)
@@ -1,40 +1,36 @@
 import struct
-from datetime import datetime, timedelta
 from typing import Union
+
+import numpy as np
 from opentdx._typing import override
 
 from opentdx.const import EX_MARKET, MARKET, PERIOD, ADJUST
 from opentdx.parser.baseParser import BaseParser, register_parser
+from opentdx.utils.help import columns_to_rows, ymd_to_datetime64
 
 
+BAR_DTYPE = np.dtype([
+    ('ymd', '<u4'), ('seconds', '<u4'), ('open', '<f4'), ('high', '<f4'), ('low', '<f4'), ('close', '<f4'),
+    ('amount', '<f4'), ('vol', '<f4'), ('float_shares', '<f4'),
+])
 
-# TODO 转移到公共类
-def combine_to_datetime(ymd, date_num, format_tdx_time=False):
-    # 解析日期
-    date_str = str(ymd)
-    year = int(date_str[:4])
-    month = int(date_str[4:6])
-    day = int(date_str[6:8])
-
-    # date_num 是从午夜开始的秒数
-    seconds = date_num
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-
-    dt = datetime(year, month, day, hours, minutes)
+def combine_to_datetime64(ymd: np.ndarray, seconds: np.ndarray, format_tdx_time=False) -> np.ndarray:
+    """ymd 日期与当天秒数合成 datetime64[m] 数组"""
+    ymd = ymd.astype(np.int64)
+    minutes = seconds.astype(np.int64) // 60
+    days = ymd_to_datetime64(ymd // 10000, ymd % 10000 // 100, ymd % 100)
     if format_tdx_time:
-        if 0 <= dt.hour <= 5:
-            dt = dt + timedelta(days=1)  # 或者 timedelta(hours=24)
-        else:
-            dt = dt
-    return dt
+        # 夜盘 0~5 点的 K 线归属下一个自然日
+        days = days + (minutes < 6 * 60).astype('timedelta64[D]')
+    return days.astype('datetime64[m]') + minutes.astype('timedelta64[m]')
 
 
 @register_parser(0x122E, 1)
 class SymbolBar(BaseParser):
-    def __init__(self, market: Union[MARKET, EX_MARKET], code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 700, fq: ADJUST = ADJUST.NONE):
+    def __init__(self, market: Union[MARKET, EX_MARKET], code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 700, fq: ADJUST = ADJUST.NONE, as_arrays: bool = False):
         self.body = struct.pack("<H22sHH I HH bbb bH4s", market.value, code.encode("gbk"), period.value, times, start, count, fq.value, 1, 1, 0, 1, 0, b"")
         self.period = period
+        self.as_arrays = as_arrays
         # print("16进制: " + " ".join(f"{b:02x}" for b in self.body))
         # #debug 31 00700
         # pkg = bytearray.fromhex(f"1f00 3030 3730 3000 0000 0000 0000 0000 \
@@ -48,7 +44,6 @@ class SymbolBar(BaseParser):
 
     @override
     def deserialize(self, data):
-        row_length = 36
         header_length = 33
 
         header = data[:header_length]
@@ -60,29 +55,19 @@ class SymbolBar(BaseParser):
         # 判断是否是分钟K线
         format_tdx_time = period < 4 or period == 7 or period == 8
 
-        bars = []
-        # print(f"总行数 {row_count}")
-        for i in range(count):
-            row_data = data[header_length + row_length * i : header_length + row_length * (i + 1)]
-
-            fmt = "II7f"
-            # fmt_length = struct.calcsize(fmt)
-            # ymd 是 20201201. time_num是从当天 00:00:00 开始的秒数
-            ymd, time_num, open, high, low, close, amount, vol, float_shares = struct.unpack(fmt, row_data)
-
-            # 如果是美股或者期货, time_num是中国时间, 但ymd是美国日期. 例如 2026-03-26 22:30:00 的k线, TDX数据返回的是 2026-03-25 22:30:00 
-
-            datetime = combine_to_datetime(ymd, time_num, format_tdx_time)
-            bar = {
-                "datetime": datetime,
-                "open": open,
-                "high": high,
-                "low": low,
-                "close": close,
-                "vol": vol,
-                "amount": amount,
-                "float_shares": float_shares,  # 流通股
-            }
-            bars.append(bar)
-
-        return bars
+        # ymd 是 20201201. seconds 是从当天 00:00:00 开始的秒数
+        # 如果是美股或者期货, seconds 是中国时间, 但 ymd 是美国日期. 例如 2026-03-26 22:30:00 的k线, TDX数据返回的是 2026-03-25 22:30:00
+        rows = np.frombuffer(data, dtype=BAR_DTYPE, count=count, offset=header_length)
+        columns = {
+            "datetime": combine_to_datetime64(rows["ymd"], rows["seconds"], format_tdx_time),
+            "open": rows["open"].astype(np.float64),
+            "high": rows["high"].astype(np.float64),
+            "low": rows["low"].astype(np.float64),
+            "close": rows["close"].astype(np.float64),
+            "vol": rows["vol"].astype(np.float64),
+            "amount": rows["amount"].astype(np.float64),
+            "float_shares": rows["float_shares"].astype(np.float64),  # 流通股
+        }
+        if self.as_arrays:
+            return columns
+        return columns_to_rows(columns)
@@ -1,8 +1,15 @@
 import struct
+
+import numpy as np
 from opentdx._typing import override
 from opentdx.const import MARKET
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import to_datetime
+from opentdx.utils.help import to_datetime64
+
+CATEGORY_DTYPE = np.dtype([('name', 'S64'), ('filename', 'S80'), ('start', '<u4'), ('length', '<u4')])
+XDXR_DTYPE = np.dtype([
+    ('market', 'u1'), ('code', 'S6'), ('unknown', 'u1'), ('date', '<u4'), ('category', 'u1'), ('values', '<f4', (4,)),
+])
 
 @register_parser(0x2cf)
 class Category(BaseParser):
@@ -25,17 +32,13 @@ class Category(BaseParser):
                 return 'unknown str'
 
 
-        categories = []
-        for i in range(count):
-            category_buf = data[2 + i * 152:2 + (i + 1) * 152]
-
-            name, filename, start, length = struct.unpack("<64s80sII", category_buf)
-            categories.append({
-                'name': get_str(name),
-                'filename': get_str(filename),
-                'start': start,
-                'length': length,
-            })
+        rows = np.frombuffer(data, dtype=CATEGORY_DTYPE, count=count, offset=2)
+        categories = [{
+            'name': get_str(name),
+            'filename': get_str(filename),
+            'start': start,
+            'length': length,
+        } for name, filename, start, length in rows.tolist()]
 
         return categories
 
@@ -159,36 +162,38 @@ class Finance(BaseParser):
 
 @register_parser(0xf)
 class XDXR(BaseParser):
-    def __init__(self, market: MARKET, code: str):
+    def __init__(self, market: MARKET, code: str, as_arrays: bool = False):
         if isinstance(code, str):
             code = code.encode("utf-8")
         self.body = struct.pack('<HB6s', 1, market.value, code)
+        self.as_arrays = as_arrays
 
     @override
     def deserialize(self, data):
         (market, marketOR, code, count) = struct.unpack('<HB6sH', data[:11])
 
-        xdxrs = []
-        for i in range(count):
-            pos = 11 + i * 29
-            (market, code, unknown, date, category) = struct.unpack('<B6sBIB', data[pos: pos + 13])
-            date = to_datetime(date)
+        # 每条 29 字节：market, code, unknown, date, category + 4 个 float，float 的含义由 category 决定
+        rows = np.frombuffer(data, dtype=XDXR_DTYPE, count=count, offset=11)
+        if self.as_arrays:
+            return self._to_arrays(rows)
 
+        dates = to_datetime64(rows['date']).tolist()
+        xdxrs = []
+        for (market, code, _, _, category, values), date in zip(rows.tolist(), dates):
             name = XDXR_CATEGORY_MAPPING.get(category, category)
 
-            left_data = data[pos + 13: pos + 29]
             fenhong, peigujia, songzhuangu, peigu = None, None, None, None
             suogu = None
             xingquanjia, fenshu = None, None
             panqianliutong, qianzongguben, panhouliutong, houzongguben = None, None, None, None
             if category == 1:
-                fenhong, peigujia, songzhuangu, peigu  = struct.unpack("<ffff", left_data)
+                fenhong, peigujia, songzhuangu, peigu = values
             elif category in [11, 12]:
-                _, _, suogu, _ = struct.unpack("<ffff", left_data)
+                _, _, suogu, _ = values
             elif category in [13, 14]:
-                xingquanjia, _, fenshu, _ = struct.unpack("<ffff", left_data)
+                xingquanjia, _, fenshu, _ = values
             else:
-                panqianliutong, qianzongguben, panhouliutong, houzongguben = struct.unpack("<ffff", left_data)
+                panqianliutong, qianzongguben, panhouliutong, houzongguben = values
 
             xdxrs.append({
                 'market': MARKET(market),
@@ -209,6 +214,37 @@ class XDXR(BaseParser):
             })
         return xdxrs
 
+    @staticmethod
+    def _to_arrays(rows) -> dict:
+        """列式结果，不适用于该类别的字段为 NaN"""
+        category = rows['category'].astype(np.int64)
+        values = rows['values'].astype(np.float64)
+        dividend = category == 1
+        shrink = np.isin(category, [11, 12])
+        warrant = np.isin(category, [13, 14])
+        capital = ~(dividend | shrink | warrant)
+
+        def pick(mask, index):
+            return np.where(mask, values[:, index], np.nan)
+
+        return {
+            'market': rows['market'].astype(np.int64),
+            'code': rows['code'].astype('U6'),
+            'date': to_datetime64(rows['date']),
+            'category': category,
+            'fenhong': pick(dividend, 0),
+            'peigujia': pick(dividend, 1),
+            'songzhuangu': pick(dividend, 2),
+            'peigu': pick(dividend, 3),
+            'suogu': pick(shrink, 2),
+            'xingquanjia': pick(warrant, 0),
+            'fenshu': pick(warrant, 2),
+            'panqianliutong': pick(capital, 0),
+            'qianzongguben': pick(capital, 1),
+            'panhouliutong': pick(capital, 2),
+            'houzongguben': pick(capital, 3),
+        }
+
 XDXR_CATEGORY_MAPPING = {
     1 : "除权除息",
     2 : "送配股上市",
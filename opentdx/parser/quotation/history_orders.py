@@ -4,32 +4,30 @@ from opentdx._typing import override
 
 from opentdx.const import MARKET
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import get_price
+from opentdx.utils.help import get_price_records
 
 
 @register_parser(0xfb4)
 class HistoryOrders(BaseParser):
-    def __init__(self, market: MARKET, code: str, date: date):
+    def __init__(self, market: MARKET, code: str, date: date, as_arrays: bool = False):
         date = date.year * 10000 + date.month * 100 + date.day
         self.body = struct.pack(u'<IB6s', date, market.value, code.encode('gbk'))
+        self.as_arrays = as_arrays
 
     @override
     def deserialize(self, data):
         count, pre_close = struct.unpack('<Hf', data[:6])
         pos = 6
 
-        orders = []
-        last_price = 0
-        for _ in range(count):
-            price, pos = get_price(data, pos)
-            unknown, pos = get_price(data, pos)
-            vol, pos = get_price(data, pos)
+        values, _, _ = get_price_records(data, pos, count, 3)
+        price = values[:, 0].cumsum()
+        unknown = values[:, 1] # 像是大单笔数？
+        vol = values[:, 2]
+        if self.as_arrays:
+            return {'price': price, 'unknown': unknown, 'vol': vol}
 
-            last_price += price
-
-            orders.append({
-                'price': last_price,
-                'unknown': unknown, # 像是大单笔数？
-                'vol': vol,
-            })
-        return orders
\ No newline at end of file
+        return [{
+            'price': p,
+            'unknown': u,
+            'vol': v,
+        } for p, u, v in zip(price.tolist(), unknown.tolist(), vol.tolist())]
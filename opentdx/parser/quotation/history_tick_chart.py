@@ -4,35 +4,30 @@ from opentdx._typing import override
 
 from opentdx.const import MARKET
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import get_price
+from opentdx.utils.help import add_first_base, get_price_records
 
 
 @register_parser(0xfeb)
 class HistoryTickChart(BaseParser):
-    def __init__(self, market: MARKET, code: str, date: date):
+    def __init__(self, market: MARKET, code: str, date: date, as_arrays: bool = False):
         date = -date.year * 10000 - date.month * 100 - date.day
         self.body = struct.pack(u'<iB6s', date, market.value, code.encode('gbk'))
+        self.as_arrays = as_arrays
 
     @override
     def deserialize(self, data):
         count, m, n = struct.unpack('<HII', data[:10])
         pos = 10
 
-        result = []
-        start_price = 0
-        avg_price = 0
-        for _ in range(count):
-            price, pos = get_price(data, pos)
-            avg, pos = get_price(data, pos)
-            vol, pos = get_price(data, pos)
+        values, _, _ = get_price_records(data, pos, count, 3)
+        price = add_first_base(values[:, 0])
+        avg = add_first_base(values[:, 1])
+        vol = values[:, 2]
+        if self.as_arrays:
+            return {'price': price, 'avg': avg, 'vol': vol}
 
-            result.append({
-                'price': start_price + price,
-                'avg': avg_price + avg,
-                'vol': vol,
-            })
-            if start_price == 0:
-                start_price = price
-            if avg_price == 0:
-                avg_price = avg
-        return result
\ No newline at end of file
+        return [{
+            'price': p,
+            'avg': a,
+            'vol': v,
+        } for p, a, v in zip(price.tolist(), avg.tolist(), vol.tolist())]
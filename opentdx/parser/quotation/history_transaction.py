@@ -1,41 +1,42 @@
-from datetime import date, time
+from datetime import date
 import struct
 from opentdx._typing import override
 
 from opentdx.const import MARKET
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import get_price
+from opentdx.parser.quotation.transaction import ACTIONS, MINUTE_TIMES
+from opentdx.utils.help import get_price_records, get_uint16_at
 
 
 @register_parser(0xfb5)
 class HistoryTransaction(BaseParser):
-    def __init__(self, market: MARKET, code: str, date: date, start: int, count: int):
+    def __init__(self, market: MARKET, code: str, date: date, start: int, count: int, as_arrays: bool = False):
         date = date.year * 10000 + date.month * 100 + date.day
         self.body = struct.pack(u'<IH6sHH', date, market.value, code.encode('gbk'), start, count)
+        self.as_arrays = as_arrays
 
     @override
     def deserialize(self, data):
         count, pre_close = struct.unpack('<Hf', data[:6])
-        pos = 6
 
-        last_price = 0
-        transactions = []
-        for _ in range(count):
-            minutes, = struct.unpack('<H', data[pos: pos + 2])
-            pos += 2
-
-            price, pos = get_price(data, pos)
-            vol, pos = get_price(data, pos)
-            buy_sell, pos = get_price(data, pos)
-            unknown, pos = get_price(data, pos)
-
-            last_price += price
-            transactions.append({
-                'time': time(minutes // 60 % 24, minutes % 60),
-                'price': last_price,
-                'vol': vol,
-                'action': ['BUY', 'SELL', 'NEUTRAL'][buy_sell],
-                'unknown': unknown,
-            })
-
-        return transactions
\ No newline at end of file
+        # 每条记录: 2 字节分钟数 + price, vol, buy_sell, unknown 四个变长整数
+        values, offsets, _ = get_price_records(data, 6, count, 4, prefix=2)
+        minutes = get_uint16_at(data, offsets) % (24 * 60)
+        price = values[:, 0].cumsum()
+        if self.as_arrays:
+            # action: 0 BUY, 1 SELL, 2 NEUTRAL
+            return {
+                'time': minutes.astype('timedelta64[m]'),
+                'price': price,
+                'vol': values[:, 1],
+                'action': values[:, 2],
+                'unknown': values[:, 3],
+            }
+
+        return [{
+            'time': MINUTE_TIMES[m],
+            'price': p,
+            'vol': vol,
+            'action': ACTIONS[buy_sell],
+            'unknown': unknown,
+        } for m, p, (_, vol, buy_sell, unknown) in zip(minutes.tolist(), price.tolist(), values.tolist())]
@@ -1,20 +1,83 @@
 import struct
+
+import numpy as np
 from opentdx._typing import override
 
 from opentdx.const import MARKET, PERIOD, ADJUST
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import get_price, to_datetime
+from opentdx.utils.help import get_price, get_price_records, get_uint16_at, to_datetime, to_datetime64
+
+# 指数、板块代码前缀，这些代码的 K 线每条记录后带有涨跌家数
+INDEX_PREFIXES = {
+    MARKET.SZ: ('399',),
+    MARKET.SH: ('000', '880', '881', '999'),
+    MARKET.BJ: ('899',),
+}
+
+def is_index(market: MARKET, code: str) -> bool:
+    return code.startswith(INDEX_PREFIXES.get(market, ()))
 
 
 @register_parser(0x523)
 class K_Line(BaseParser):
-    def __init__(self, market: MARKET, code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 800, adjust: ADJUST= ADJUST.NONE):
+    def __init__(self, market: MARKET, code: str, period: PERIOD, times: int = 1, start: int = 0, count: int = 800, adjust: ADJUST= ADJUST.NONE, as_arrays: bool = False):
         self.body = struct.pack(u'<H6sHHHHH8s', market.value, code.encode('gbk'), period.value, times, start, count, adjust.value, b'')
         
         self.period = period
+        self.as_arrays = as_arrays
+        self.index = is_index(market, code)
         
     @override
     def deserialize(self, data):
+        if self.as_arrays:
+            return self._deserialize_arrays(data)
+        return self._deserialize_rows(data)
+
+    def _deserialize_arrays(self, data):
+        if self.index:
+            # 指数 K 线带有涨跌家数，按逐条解析的结果转换
+            return self._rows_to_arrays(self._deserialize_rows(data))
+
+        count, = struct.unpack('<H', data[:2])
+        minute_category = self.period.value < 4 or self.period.value == 7 or self.period.value == 8
+
+        # 每条记录: 4 字节日期 + open, close, high, low 四个变长整数 + 8 字节 vol, amount
+        values, offsets, pos = get_price_records(data, 2, count, 4, prefix=4, suffix=8)
+        if pos != len(data):
+            raise ValueError("K 线数据长度不符: %d 条记录应为 %d 字节，实际 %d 字节" % (count, pos, len(data)))
+
+        buf = np.frombuffer(data, dtype=np.uint8)
+        date_nums = get_uint16_at(data, offsets) | (get_uint16_at(data, offsets + 2) << 16)
+        # vol, amount 紧跟在最后一个变长整数之后，即下一条记录起始前 8 字节
+        tail = np.append(offsets[1:], pos)[:count] - 8
+        floats = buf[tail[:, None] + np.arange(8)].copy().view('<f4')
+        return {
+            'datetime': to_datetime64(date_nums, minute_category),
+            'open': values[:, 0],
+            'close': values[:, 1],
+            'high': values[:, 2],
+            'low': values[:, 3],
+            'vol': floats[:, 0].astype(np.float64),
+            'amount': floats[:, 1].astype(np.float64),
+        }
+
+    @staticmethod
+    def _rows_to_arrays(bars):
+        columns = {
+            'datetime': np.array([bar['datetime'] for bar in bars], dtype='datetime64[m]'),
+            'open': np.array([bar['open'] for bar in bars], dtype=np.int64),
+            'close': np.array([bar['close'] for bar in bars], dtype=np.int64),
+            'high': np.array([bar['high'] for bar in bars], dtype=np.int64),
+            'low': np.array([bar['low'] for bar in bars], dtype=np.int64),
+            'vol': np.array([bar['vol'] for bar in bars], dtype=np.float64),
+            'amount': np.array([bar['amount'] for bar in bars], dtype=np.float64),
+        }
+        if any('up_count' in bar for bar in bars):
+            columns['up_count'] = np.array([bar.get('up_count', 0) for bar in bars], dtype=np.int64)
+            columns['down_count'] = np.array([bar.get('down_count', 0) for bar in bars], dtype=np.int64)
+        return columns
+
+    def _deserialize_rows(self, data):
         data_len = len(data)
         count, = struct.unpack('<H', data[:2])
         pos = 2
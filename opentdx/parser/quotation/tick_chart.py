@@ -3,34 +3,28 @@ from opentdx._typing import override
 
 from opentdx.const import MARKET
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import get_price
+from opentdx.utils.help import add_first_base, get_price_records
 
 
 @register_parser(0x537)
 class TickChart(BaseParser):
-    def __init__(self, market: MARKET, code: str, start: int = 0, count: int = 0xba00):
+    def __init__(self, market: MARKET, code: str, start: int = 0, count: int = 0xba00, as_arrays: bool = False):
         self.body = bytearray(struct.pack('<H6sHH', market.value, code.encode('gbk'), start, count))
+        self.as_arrays = as_arrays
         
     @override
     def deserialize(self, data):
         num, _ = struct.unpack('<HH', data[:4])
 
-        result = []
-        pos = 4
-        start_price = 0
-        start_avg = 0
-        for _ in range(num):
-            price, pos = get_price(data, pos)
-            avg, pos = get_price(data, pos)
-            vol, pos = get_price(data, pos)
+        values, _, _ = get_price_records(data, 4, num, 3)
+        price = add_first_base(values[:, 0])
+        avg = add_first_base(values[:, 1])
+        vol = values[:, 2]
+        if self.as_arrays:
+            return {'price': price, 'avg': avg, 'vol': vol}
 
-            result.append({
-                'price': start_price + price,
-                'avg': start_avg + avg,
-                'vol': vol,
-            })
-            if start_price == 0:
-                start_price = price
-            if start_avg == 0:
-                start_avg = avg
-        return result
\ No newline at end of file
+        return [{
+            'price': p,
+            'avg': a,
+            'vol': v,
+        } for p, a, v in zip(price.tolist(), avg.tolist(), vol.tolist())]
@@ -4,39 +4,43 @@ from opentdx._typing import override
 
 from opentdx.const import MARKET
 from opentdx.parser.baseParser import BaseParser, register_parser
-from opentdx.utils.help import get_price
+from opentdx.utils.help import get_price_records, get_uint16_at
+
+ACTIONS = ['BUY', 'SELL', 'NEUTRAL']
+# 一天内每分钟对应的 time 对象，避免逐条构造
+MINUTE_TIMES = [time(m // 60, m % 60) for m in range(24 * 60)]
 
 
 @register_parser(0xfc5)
 class Transaction(BaseParser):
-    def __init__(self, market: MARKET, code: str, start: int, count: int):
+    def __init__(self, market: MARKET, code: str, start: int, count: int, as_arrays: bool = False):
         self.body = struct.pack(u'<H6sHH', market.value, code.encode('gbk'), start, count)
+        self.as_arrays = as_arrays
 
     @override
     def deserialize(self, data):
         count, = struct.unpack('<H', data[:2])
-        pos = 2
-
-        last_price = 0
-        transactions = []
-        for _ in range(count):
-            minutes, = struct.unpack('<H', data[pos: pos + 2])
-            pos += 2
-
-            price, pos = get_price(data, pos)
-            vol, pos = get_price(data, pos)
-            trans, pos = get_price(data, pos)
-            buy_sell, pos = get_price(data, pos)
-            unknown, pos = get_price(data, pos)
-
-            last_price += price
-            transactions.append({
-                'time': time(minutes // 60 % 24, minutes % 60),
-                'price': last_price,
-                'vol': vol,
-                'trans': trans,
-                'action': ['BUY', 'SELL', 'NEUTRAL'][buy_sell],
-                'unknown': unknown,
-            })
 
-        return transactions
\ No newline at end of file
+        # 每条记录: 2 字节分钟数 + price, vol, trans, buy_sell, unknown 五个变长整数
+        values, offsets, _ = get_price_records(data, 2, count, 5, prefix=2)
+        minutes = get_uint16_at(data, offsets) % (24 * 60)
+        price = values[:, 0].cumsum()
+        if self.as_arrays:
+            # action: 0 BUY, 1 SELL, 2 NEUTRAL
+            return {
+                'time': minutes.astype('timedelta64[m]'),
+                'price': price,
+                'vol': values[:, 1],
+                'trans': values[:, 2],
+                'action': values[:, 3],
+                'unknown': values[:, 4],
+            }
+
+        return [{
+            'time': MINUTE_TIMES[m],
+            'price': p,
+            'vol': vol,
+            'trans': trans,
+            'action': ACTIONS[buy_sell],
+            'unknown': unknown,
+        } for m, p, (_, vol, trans, buy_sell, unknown) in zip(minutes.tolist(), price.tolist(), values.tolist())]
@@ -0,0 +1,5 @@
+from .kline_store import KlineStore
+
+__all__ = [
+    "KlineStore",
+]
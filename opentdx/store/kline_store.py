@@ -0,0 +1,203 @@
+import os
+import threading
+
+import numpy as np
+
+from opentdx.const import ADJUST, MARKET, PERIOD
+from opentdx.utils.adjust import adjust_kline
+from opentdx.utils.cache import get_disk_cache_dir
+from opentdx.utils.log import log
+
+# 每列一个定长数组文件，只追加；需要覆盖时整体替换，不在原文件上截断
+COLUMNS = {
+    'datetime': np.dtype('datetime64[m]'),
+    'open': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'vol': np.dtype('<f8'),
+    'amount': np.dtype('<f8'),
+}
+
+SYNC_FIRST_COUNT = 16  # 增量同步时第一次请求的 K 线数量
+
+
+class KlineStore:
+    """
+    本地 K 线存储：每只股票、每个周期一个目录，每列一个定长文件，读取时以 memmap 映射。
+
+    - read() 返回 {列名: 只读 numpy.memmap}，不复制数据；之后的写入不会截断已映射的文件
+    - sync() 只向服务器请求比本地最后一根更新的 K 线；最后一根可能是盘中未完成的 K 线，同步时会被覆盖
+    - 只保存不复权数据，read(adjust=...) 按除权除息数据在本地复权
+
+    用法::
+
+        store = KlineStore('data/kline', client=client)
+        store.sync([(MARKET.SZ, '000001')], PERIOD.DAILY)
+        bars = store.read(MARKET.SZ, '000001', PERIOD.DAILY)
+    """
+
+    def __init__(self, root: str = None, client=None):
+        """
+        :param root: 存储目录；不传时需已开启磁盘缓存（enable_disk_cache() 或 OPENTDX_DISK_CACHE=1），使用缓存目录下的 kline
+        :param client: sync 使用的 QuotationClient
+        """
+        if root is None:
+            cache_dir = get_disk_cache_dir()
+            if cache_dir is None:
+                raise Exception("KlineStore 需要指定 root，或先调用 enable_disk_cache()")
+            root = os.path.join(cache_dir, 'kline')
+        self.root = root
+        self.client = client
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _path(self, market: MARKET, code: str, period: PERIOD) -> str:
+        return os.path.join(self.root, period.name, f"{market.name}_{code}")
+
+    def _lock(self, path: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _length(self, path: str) -> int:
+        """各列文件中完整记录数的最小值（写入中断时以最短的列为准）"""
+        lengths = []
+        for name, dtype in COLUMNS.items():
+            file = os.path.join(path, name)
+            lengths.append(os.path.getsize(file) // dtype.itemsize if os.path.exists(file) else 0)
+        return min(lengths)
+
+    def __len__(self):
+        return sum(len(symbols) for symbols in self.symbols().values())
+
+    def symbols(self) -> dict[PERIOD, list[tuple[MARKET, str]]]:
+        """已保存的 {周期: [(market, code)]}"""
+        result = {}
+        if not os.path.isdir(self.root):
+            return result
+        for period_name in sorted(os.listdir(self.root)):
+            if period_name not in PERIOD.__members__:
+                continue
+            symbols = []
+            for name in sorted(os.listdir(os.path.join(self.root, period_name))):
+                market, _, code = name.partition('_')
+                if market in MARKET.__members__:
+                    symbols.append((MARKET[market], code))
+            result[PERIOD[period_name]] = symbols
+        return result
+
+    def read(self, market: MARKET, code: str, period: PERIOD, adjust: ADJUST = ADJUST.NONE) -> dict:
+        """
+        读取本地 K 线，返回 {列名: 只读数组}，没有数据时各列为空数组
+        :param adjust: 前/后复权时用 client 的除权除息数据在本地计算，价格列为新数组
+        """
+        path = self._path(market, code, period)
+        length = self._length(path)
+        if length == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        columns = {
+            name: np.memmap(os.path.join(path, name), dtype=dtype, mode='r', shape=(length,))
+            for name, dtype in COLUMNS.items()
+        }
+        if adjust != ADJUST.NONE:
+            if self.client is None:
+                raise Exception("KlineStore 复权需要 client")
+            columns = adjust_kline(columns, self.client.get_xdxr(market, code), adjust)
+        return columns
+
+    def last_datetime(self, market: MARKET, code: str, period: PERIOD):
+        """本地最后一根 K 线的时间（datetime64[m]），没有数据时返回 None"""
+        path = self._path(market, code, period)
+        length = self._length(path)
+        if length == 0:
+            return None
+        dtype = COLUMNS['datetime']
+        with open(os.path.join(path, 'datetime'), 'rb') as f:
+            f.seek((length - 1) * dtype.itemsize)
+            return np.frombuffer(f.read(dtype.itemsize), dtype=dtype)[0]
+
+    def append(self, market: MARKET, code: str, period: PERIOD, columns: dict) -> int:
+        """
+        追加 K 线（需按时间升序）。早于本地最后一根的数据被忽略，与最后一根时间相同的会覆盖它
+        :return: 写入的记录数
+        """
+        datetimes = np.asarray(columns['datetime'], dtype=COLUMNS['datetime'])
+        path = self._path(market, code, period)
+        with self._lock(path):
+            os.makedirs(path, exist_ok=True)
+            length = self._length(path)
+            last = self.last_datetime(market, code, period)
+            keep = length
+            if last is not None:
+                mask = datetimes >= last
+                datetimes = datetimes[mask]
+                columns = {name: np.asarray(columns[name])[mask] for name in COLUMNS if name != 'datetime'}
+                if len(datetimes) and datetimes[0] == last:
+                    keep = length - 1
+            if len(datetimes) == 0:
+                return 0
+
+            for name, dtype in COLUMNS.items():
+                file = os.path.join(path, name)
+                values = datetimes if name == 'datetime' else np.asarray(columns[name], dtype=dtype)
+                data = values.astype(dtype, copy=False).tobytes()
+                size = keep * dtype.itemsize
+                if not os.path.exists(file) or os.path.getsize(file) == size:
+                    with open(file, 'ab') as f:
+                        f.write(data)
+                    continue
+                # 需要丢弃未写完整的记录或覆盖最后一根：写到临时文件再替换，
+                # 其它地方 memmap 着的旧文件不会被截断（截断已映射的文件会在访问时触发 SIGBUS）
+                tmp = file + '.tmp'
+                with open(file, 'rb') as src, open(tmp, 'wb') as dst:
+                    dst.write(src.read(size))
+                    dst.write(data)
+                os.replace(tmp, file)
+            return len(datetimes)
+
+    def sync(self, symbols: list[tuple[MARKET, str]], period: PERIOD, count: int = 800, client=None, workers: int = 1) -> dict:
+        """
+        从服务器补齐本地 K 线
+        :param count: 本地没有数据时下载的数量，也是增量同步单次请求的最大数量
+        :param workers: 大于 1 时通过 client 的连接池并发同步
+        :return: {(market, code): 写入的记录数}，失败的为异常对象
+        """
+        client = client or self.client
+        if client is None:
+            raise Exception("KlineStore.sync 需要 client")
+        symbols = list(dict.fromkeys(symbols))
+
+        def sync_one(c, symbol):
+            try:
+                return self._sync_one(c, symbol[0], symbol[1], period, count)
+            except Exception as e:
+                log.debug("同步K线失败 %s: %s", symbol, e)
+                return e
+
+        if workers > 1:
+            results = client.get_pool(workers).map(sync_one, symbols)
+        else:
+            results = [sync_one(client, symbol) for symbol in symbols]
+        return dict(zip(symbols, results))
+
+    def _sync_one(self, client, market: MARKET, code: str, period: PERIOD, count: int) -> int:
+        last = self.last_datetime(market, code, period)
+        parts = []
+        if last is None:
+            parts = list(client.iter_kline(market, code, period, count=count, as_arrays=True))
+        else:
+            # 增量同步：先请求少量最新的 K 线，没有接上本地数据时再逐步扩大窗口
+            start, size = 0, SYNC_FIRST_COUNT
+            while True:
+                pages = list(client.iter_kline(market, code, period, start=start, count=size, as_arrays=True))
+                parts.extend(pages)
+                fetched = sum(len(page['datetime']) for page in pages)
+                if fetched < size or any(page['datetime'][0] <= last for page in pages):
+                    break
+                start += size
+                size = min(size * 4, count)
+        if not parts:
+            return 0
+        # 页按从新到旧排列，倒序后按时间升序写入
+        columns = {name: np.concatenate([part[name] for part in reversed(parts)]) for name in COLUMNS}
+        return self.append(market, code, period, columns)
@@ -0,0 +1,11 @@
+from .bar_aggregator import BarAggregator
+from .base import PollingStream
+from .quote_stream import QuoteStream
+from .transaction_follower import TransactionFollower
+
+__all__ = [
+    "BarAggregator",
+    "PollingStream",
+    "QuoteStream",
+    "TransactionFollower",
+]
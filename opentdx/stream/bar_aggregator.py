@@ -0,0 +1,245 @@
+import threading
+from datetime import date
+
+import numpy as np
+
+from opentdx.const import MARKET, PERIOD
+from opentdx.utils.help import trading_day
+from opentdx.utils.log import log
+
+# 支持的周期及其分钟数
+AGGREGATE_PERIODS = {
+    PERIOD.MIN_1: 1,
+    PERIOD.MIN_5: 5,
+    PERIOD.MIN_15: 15,
+    PERIOD.MIN_30: 30,
+    PERIOD.MIN_60: 60,
+}
+BAR_COLUMNS = ('datetime', 'open', 'close', 'high', 'low', 'vol', 'amount')
+
+# 上午 9:30-11:30，下午 13:00-15:00（自 0 点起的分钟数）
+MORNING_OPEN, MORNING_CLOSE = 570, 690
+AFTERNOON_OPEN, AFTERNOON_CLOSE = 780, 900
+
+
+def bar_minutes(minutes, size: int = 1) -> np.ndarray:
+    """
+    成交所在分钟（自 0 点起）对应的 K 线结束分钟，与通达信一致：
+    9:30 之前的集合竞价计入 9:31，11:30、15:00 收盘时的成交计入最后一根，60 分钟线为 10:30 / 11:30 / 14:00 / 15:00
+    """
+    minutes = np.asarray(minutes, dtype=np.int64)
+    afternoon = minutes >= AFTERNOON_OPEN
+    session_open = np.where(afternoon, AFTERNOON_OPEN, MORNING_OPEN)
+    session_close = np.where(afternoon, AFTERNOON_CLOSE, MORNING_CLOSE)
+    elapsed = np.clip(minutes + 1, session_open + 1, session_close) - session_open
+    return session_open + np.minimum(-(-elapsed // size) * size, session_close - session_open)
+
+
+def _aggregate(labels, open_, close, high, low, vol, amount) -> dict:
+    """按时间升序的记录中，相邻且 labels 相同的合并为一根 K 线"""
+    starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1]))) if len(labels) else np.empty(0, dtype=np.int64)
+    ends = np.append(starts[1:], len(labels)) - 1
+    return {
+        'datetime': labels[starts],
+        'open': open_[starts],
+        'close': close[ends],
+        'high': np.maximum.reduceat(high, starts) if len(starts) else high[:0],
+        'low': np.minimum.reduceat(low, starts) if len(starts) else low[:0],
+        'vol': np.add.reduceat(vol, starts) if len(starts) else vol[:0],
+        'amount': np.add.reduceat(amount, starts) if len(starts) else amount[:0],
+    }
+
+
+def _labels(datetimes, size: int) -> np.ndarray:
+    """K 线结束时间（datetime64[m]）换算为 size 分钟周期的结束时间"""
+    datetimes = np.asarray(datetimes, dtype='datetime64[m]')
+    days = datetimes.astype('datetime64[D]')
+    # 1 分钟线的结束时间减一分钟即为所在分钟
+    minutes = (datetimes - days).astype(np.int64) - 1
+    return days + bar_minutes(minutes, size).astype('timedelta64[m]')
+
+
+class BarBuffer:
+    """单只股票单个周期的 K 线，每列一个 numpy 数组，容量不足时翻倍"""
+
+    def __init__(self, capacity: int = 256):
+        self._data = {
+            name: np.empty(capacity, dtype='datetime64[m]' if name == 'datetime' else np.float64)
+            for name in BAR_COLUMNS
+        }
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def columns(self) -> dict:
+        """当前全部 K 线的视图（不复制）"""
+        return {name: values[:self.length] for name, values in self._data.items()}
+
+    def last_datetime(self):
+        return self._data['datetime'][self.length - 1] if self.length else None
+
+    def merge(self, bars: dict) -> int:
+        """
+        合并按时间升序的 K 线：与最后一根同一时间的并入最后一根，更早的忽略，其余追加
+        :return: 更新的第一根 K 线的位置
+        """
+        labels = bars['datetime']
+        last = self.last_datetime()
+        first = self.length
+        if last is not None and len(labels):
+            keep = labels >= last
+            if not keep.all():
+                log.debug("忽略早于最后一根 K 线的成交 %s", labels[~keep][0])
+                bars = {name: values[keep] for name, values in bars.items()}
+                labels = bars['datetime']
+            if len(labels) and labels[0] == last:
+                i = self.length - 1
+                data = self._data
+                data['high'][i] = max(data['high'][i], bars['high'][0])
+                data['low'][i] = min(data['low'][i], bars['low'][0])
+                data['close'][i] = bars['close'][0]
+                data['vol'][i] += bars['vol'][0]
+                data['amount'][i] += bars['amount'][0]
+                bars = {name: values[1:] for name, values in bars.items()}
+                first = i
+
+        size = len(bars['datetime'])
+        if self.length + size > len(self._data['datetime']):
+            capacity = max(len(self._data['datetime']) * 2, self.length + size)
+            for name, values in self._data.items():
+                grown = np.empty(capacity, dtype=values.dtype)
+                grown[:self.length] = values[:self.length]
+                self._data[name] = grown
+        for name in BAR_COLUMNS:
+            self._data[name][self.length:self.length + size] = bars[name]
+        self.length += size
+        return first
+
+
+class BarAggregator:
+    """
+    用分笔成交在本地增量合成 1/5/15/30/60 分钟 K 线，不再反复请求整段 K 线。
+
+    - seed() 每只股票只请求一次最近的 1 分钟线作为起点，其它周期由 1 分钟线本地合并；
+      最后一根可能未走完，丢弃后由成交重新合成
+    - update() 接收列式分笔成交（TransactionFollower 推送的新成交、get_transaction(as_arrays=True) 的结果），
+      同一分钟内的成交合并后一次写入各周期的缓冲区
+    - 分笔成交只有分钟精度，不能合成 PERIOD.SECONDS 等秒级 K 线
+
+    用法::
+
+        aggregator = BarAggregator()
+        aggregator.seed(client, symbols)
+        follower = client.follow_transactions(symbols)   # 第一次推送当日全部成交，seed 已覆盖的分钟会被忽略
+        follower.subscribe(aggregator.on_trades)
+        follower.start()
+        bars = aggregator.bars(MARKET.SZ, '000001', PERIOD.MIN_5)
+    """
+    # 分笔成交量单位为手，K 线成交量单位为股
+    vol_unit = 100
+
+    def __init__(self, periods=tuple(AGGREGATE_PERIODS)):
+        for period in periods:
+            if period not in AGGREGATE_PERIODS:
+                raise Exception("不支持的周期 %s：分笔成交只有分钟精度，只能合成 %s" % (period, [p.name for p in AGGREGATE_PERIODS]))
+        self.periods = tuple(periods)
+        self._buffers: dict[tuple[MARKET, str], dict[PERIOD, BarBuffer]] = {}
+        self._cutoff: dict[tuple[MARKET, str], np.datetime64] = {}  # 早于这个时间的 1 分钟 K 线已由 seed 给出
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """注册回调 callback({(market, code): {period: 有变化的 K 线}})，返回 callback 便于作为装饰器使用"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _symbol_buffers(self, symbol) -> dict[PERIOD, BarBuffer]:
+        buffers = self._buffers.get(symbol)
+        if buffers is None:
+            buffers = self._buffers[symbol] = {period: BarBuffer() for period in self.periods}
+        return buffers
+
+    def bars(self, market: MARKET, code: str, period: PERIOD) -> dict:
+        """当前的 K 线 {列名: 数组}，没有数据时各列为空数组"""
+        with self._lock:
+            buffers = self._buffers.get((market, code))
+            buffer = buffers[period] if buffers else BarBuffer(0)
+            return {name: values.copy() for name, values in buffer.columns().items()}
+
+    def seed(self, client, symbols: list[tuple[MARKET, str]], count: int = 240):
+        """
+        每只股票请求一次最近 count 根 1 分钟线作为起点（只保留最后一个交易日），丢弃可能未走完的最后一根
+        """
+        for market, code in dict.fromkeys(symbols):
+            bars = client.get_kline(market, code, PERIOD.MIN_1, count=count, as_arrays=True)
+            self.seed_bars(market, code, bars)
+
+    def seed_bars(self, market: MARKET, code: str, bars: dict):
+        """用按时间升序的 1 分钟 K 线作为起点，已有的数据会被清空"""
+        symbol = (market, code)
+        with self._lock:
+            self._buffers.pop(symbol, None)
+            self._cutoff.pop(symbol, None)
+            if not bars or len(bars['datetime']) == 0:
+                return
+            datetimes = np.asarray(bars['datetime'], dtype='datetime64[m]')
+            days = datetimes.astype('datetime64[D]')
+            keep = slice(np.searchsorted(days, days[-1]), len(datetimes) - 1)
+            self._cutoff[symbol] = datetimes[-1]
+            columns = {name: np.asarray(bars[name], dtype=np.float64)[keep] for name in BAR_COLUMNS if name != 'datetime'}
+            for period, buffer in self._symbol_buffers(symbol).items():
+                labels = _labels(datetimes[keep], AGGREGATE_PERIODS[period])
+                buffer.merge(_aggregate(labels, columns['open'], columns['close'], columns['high'], columns['low'], columns['vol'], columns['amount']))
+
+    def update(self, market: MARKET, code: str, trades: dict, day: date = None) -> dict:
+        """
+        合并一批按时间升序的列式分笔成交
+        :param day: 成交所属日期，默认为当前交易日
+        :return: {period: 有变化的 K 线}，即更新过的最后一根及新增的 K 线
+        """
+        if not trades or len(trades['price']) == 0:
+            return {}
+        symbol = (market, code)
+        day = np.datetime64(day or trading_day(), 'D')
+        minutes = np.asarray(trades['time']).astype('timedelta64[m]').astype(np.int64)
+        price = np.asarray(trades['price'], dtype=np.float64)
+        vol = np.asarray(trades['vol'], dtype=np.float64) * self.vol_unit
+        amount = price * vol
+
+        with self._lock:
+            # seed 已给出的完整 K 线，对应的成交不再计入
+            labels = day + bar_minutes(minutes).astype('timedelta64[m]')
+            cutoff = self._cutoff.get(symbol)
+            if cutoff is not None:
+                keep = labels >= cutoff
+                minutes, price, vol, amount = minutes[keep], price[keep], vol[keep], amount[keep]
+            if len(price) == 0:
+                return {}
+
+            changed = {}
+            for period, buffer in self._symbol_buffers(symbol).items():
+                labels = day + bar_minutes(minutes, AGGREGATE_PERIODS[period]).astype('timedelta64[m]')
+                first = buffer.merge(_aggregate(labels, price, price, price, price, vol, amount))
+                changed[period] = {name: values[first:].copy() for name, values in buffer.columns().items()}
+        return changed
+
+    def on_trades(self, trades: dict, day: date = None):
+        """TransactionFollower 的回调：合并 {(market, code): 新成交} 并推送有变化的 K 线"""
+        changes = {}
+        for (market, code), columns in trades.items():
+            changed = self.update(market, code, columns, day)
+            if changed:
+                changes[(market, code)] = changed
+        if not changes:
+            return changes
+        for callback in list(self._subscribers):
+            try:
+                callback(changes)
+            except Exception as e:
+                log.warning("BarAggregator 推送回调出错: %s", e)
+        return changes
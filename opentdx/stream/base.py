@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+from opentdx.utils.log import log
+
+
+class PollingStream:
+    """
+    轮询类数据流的基类：子类实现 poll()，返回本次的新数据，并用 _publish() 推送给订阅者
+
+    - subscribe() 注册回调，start() / stop() 在后台线程中按 interval 轮询，也可以用 with
+    - async for 在线程池中轮询，逐次产出非空的结果
+    """
+    interval = 1.0
+    thread_name = 'PollingStream'
+
+    def __init__(self):
+        self._subscribers = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        raise NotImplementedError('not yet')
+
+    @staticmethod
+    def _is_empty(result) -> bool:
+        return not result
+
+    def subscribe(self, callback):
+        """注册回调 callback(result)，返回 callback 便于作为装饰器使用"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _publish(self, result):
+        if self._is_empty(result):
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(result)
+            except Exception as e:
+                log.warning("%s 推送回调出错: %s", self.thread_name, e)
+
+    def start(self):
+        """在后台线程中按 interval 轮询"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                self.poll()
+            except Exception as e:
+                log.warning("%s 轮询失败: %s", self.thread_name, e)
+            self._stop_event.wait(max(0.0, self.interval - (time.time() - started)))
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                result = await loop.run_in_executor(None, self.poll)
+            except Exception as e:
+                log.warning("%s 轮询失败: %s", self.thread_name, e)
+                result = None
+            if result is not None and not self._is_empty(result):
+                yield result
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
@@ -0,0 +1,90 @@
+import threading
+
+import numpy as np
+
+from opentdx.const import MARKET
+
+from .base import PollingStream
+
+# 默认比较的字段，任一字段变化即推送该行
+DEFAULT_FIELDS = ('close', 'open', 'high', 'low', 'vol', 'amount', 'bid1', 'ask1', 'bid_vol1', 'ask_vol1')
+
+
+def _symbol_keys(markets, codes) -> np.ndarray:
+    return np.char.add(np.asarray(markets).astype('U1'), np.asarray(codes, dtype='U6'))
+
+
+class QuoteStream(PollingStream):
+    """
+    按固定间隔轮询一组股票的行情快照（QuotationClient.snapshot），只把变化的行推送给订阅者。
+
+    - 上一次快照按股票保存为每个字段一个 float64 数组，比较和差值都是向量化计算
+    - 推送的结果为 {列名: numpy 数组}，只包含变化的行，另有 {字段}_delta 列为与上一次的差值（首次出现为 NaN）
+    - 可以用 subscribe() 注册回调并 start() 后台轮询，也可以 async for 迭代
+
+    用法::
+
+        stream = QuoteStream(client, symbols, interval=1.0)
+        stream.subscribe(lambda changes: print(changes['code'], changes['close']))
+        stream.start()
+        ...
+        stream.stop()
+
+        async for changes in QuoteStream(client, symbols):
+            ...
+    """
+    thread_name = 'QuoteStream'
+
+    def __init__(self, client, symbols: list[tuple[MARKET, str]], interval: float = 1.0, workers: int = 4, fields=DEFAULT_FIELDS):
+        """
+        :param client: QuotationClient
+        :param interval: 轮询间隔（秒）
+        :param workers: snapshot 使用的连接数
+        :param fields: 比较的字段
+        """
+        super().__init__()
+        self.client = client
+        self.symbols = list(dict.fromkeys(symbols))
+        self.interval = interval
+        self.workers = workers
+        self.fields = tuple(fields)
+
+        keys = _symbol_keys([market.value for market, _ in self.symbols], [code for _, code in self.symbols])
+        self._order = np.argsort(keys)
+        self._keys = keys[self._order]
+        self._last = {field: np.full(len(self.symbols), np.nan) for field in self.fields}
+        self._seen = np.zeros(len(self.symbols), dtype=bool)
+        self._lock = threading.Lock()
+
+    def diff(self, columns: dict) -> dict:
+        """与上一次快照比较并更新状态，返回变化的行；没有变化时各列为空数组"""
+        with self._lock:
+            keys = _symbol_keys(columns['market'], columns['code'])
+            pos = np.minimum(np.searchsorted(self._keys, keys), max(len(self._keys) - 1, 0))
+            known = (self._keys[pos] == keys) if len(self._keys) else np.zeros(len(keys), dtype=bool)
+            slots = self._order[pos[known]]
+            columns = {key: value[known] for key, value in columns.items()}
+
+            changed = ~self._seen[slots]
+            deltas = {}
+            for field in self.fields:
+                new = np.asarray(columns[field], dtype=np.float64)
+                old = self._last[field][slots]
+                changed |= ~((new == old) | (np.isnan(new) & np.isnan(old)))
+                deltas[f'{field}_delta'] = new - old
+                self._last[field][slots] = new
+            self._seen[slots] = True
+
+            changes = {key: value[changed] for key, value in columns.items()}
+            changes.update((key, value[changed]) for key, value in deltas.items())
+            return changes
+
+    def poll(self) -> dict:
+        """请求一次快照，推送并返回变化的行"""
+        changes = self.diff(self.client.snapshot(self.symbols, self.workers))
+        self._publish(changes)
+        return changes
+
+    @staticmethod
+    def _is_empty(result) -> bool:
+        return len(result['code']) == 0
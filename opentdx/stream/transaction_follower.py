@@ -0,0 +1,170 @@
+import threading
+
+import numpy as np
+
+from opentdx.const import MARKET
+from opentdx.parser import quotation
+from opentdx.utils.help import trading_day
+from opentdx.utils.log import log
+
+from .base import PollingStream
+
+FOLLOW_PAGE_SIZE = 50  # 每次轮询请求的最新成交笔数，新成交超过一页时再取全天
+TAIL_SIZE = 16         # 用于对齐的已知最后若干笔
+
+
+def _row_keys(columns: dict) -> np.ndarray:
+    """每笔成交的 (时间, 价格, 量, 笔数, 方向) 合成一个整数键，用于在新数据中定位已知的尾部"""
+    keys = np.asarray(columns['time']).astype(np.int64).astype(np.uint64)
+    price = np.round(np.asarray(columns['price'], dtype=np.float64) * 100)
+    for values in (price, columns['vol'], columns['trans'], columns['action']):
+        keys = keys * np.uint64(1000003) + np.asarray(values).astype(np.int64).astype(np.uint64)
+    return keys
+
+
+def _take(columns: dict, start: int) -> dict:
+    return {key: value[start:] for key, value in columns.items()}
+
+
+class TransactionFollower(PollingStream):
+    """
+    增量跟踪当日分笔成交：每只股票记住已收到的笔数和最后若干笔，轮询时只请求最新的一小页，
+    与已知的尾部对齐后只推送新增的成交。
+
+    - Transaction 的 start 是从最新一笔往前数的偏移，所以每次从 start=0 取最新一页，
+      在页内找到已知的最后 TAIL_SIZE 笔，之后的就是新成交；一页内找不到（新成交太多）时再取全天对齐
+    - 不满一页时这一页就是全天的成交，已知尾部应恰好结束在已收到的笔数处；满页时只有完整的 TAIL_SIZE 笔尾部
+      才在页内对齐，否则取全天，避免较短的尾部与相同的新成交（同一分钟、同价同量）误匹配而漏掉新成交
+    - 推送的结果为 {(market, code): 列式分笔}，另有 seq 列为该笔在当日的序号；交易日切换时重新开始
+    - 第一次轮询推送当日已有的全部成交，history=False 时只记录位置不推送
+
+    用法::
+
+        follower = client.follow_transactions([(MARKET.SZ, '000001')])
+        follower.subscribe(lambda trades: ...)
+        follower.start()
+    """
+    thread_name = 'TransactionFollower'
+
+    def __init__(self, client, symbols: list[tuple[MARKET, str]], interval: float = 3.0, workers: int = 1,
+                 page_size: int = FOLLOW_PAGE_SIZE, history: bool = True):
+        """
+        :param client: QuotationClient
+        :param interval: 轮询间隔（秒）
+        :param workers: 大于 1 时通过 client 的连接池并发请求
+        :param page_size: 每次轮询请求的最新成交笔数
+        :param history: 第一次轮询是否推送当日已有的成交
+        """
+        super().__init__()
+        self.client = client
+        self.symbols = list(dict.fromkeys(symbols))
+        self.interval = interval
+        self.workers = workers
+        self.page_size = page_size
+        self.history = history
+
+        self._state: dict[tuple[MARKET, str], tuple[int, np.ndarray]] = {}  # 已收到的笔数, 最后若干笔的键
+        self._day = None
+        self._lock = threading.Lock()
+
+    def position(self, market: MARKET, code: str) -> int:
+        """已收到的成交笔数，即下一笔的 seq"""
+        state = self._state.get((market, code))
+        return state[0] if state else 0
+
+    def reset(self):
+        with self._lock:
+            self._state.clear()
+
+    def poll(self) -> dict:
+        """请求一次，推送并返回 {(market, code): 新成交}，没有新成交的股票不在结果中"""
+        day = trading_day()
+        if day != self._day:
+            self.reset()
+            self._day = day
+
+        symbols = list(self.symbols)
+        if self.workers > 1 and len(symbols) > 1:
+            pool = self.client.get_pool(self.workers)
+            step = -(-len(symbols) // pool.size)
+            parts = pool.map(lambda client, group: self._poll_group(client, group), [symbols[i:i + step] for i in range(0, len(symbols), step)])
+        else:
+            parts = [self._poll_group(self.client, symbols)]
+
+        trades = {symbol: columns for part in parts for symbol, columns in part.items() if len(columns['price'])}
+        self._publish(trades)
+        return trades
+
+    def _poll_group(self, client, symbols: list) -> dict:
+        result = {}
+        known = [symbol for symbol in symbols if symbol in self._state]
+        refetch = [symbol for symbol in symbols if symbol not in self._state]
+
+        # 已有位置的股票：一次流水线请求各自最新的一页
+        pages = client.call_many(quotation.Transaction(market, code, 0, self.page_size, True) for market, code in known)
+        try:
+            for symbol, page in zip(known, pages):
+                page = self._scale(page)
+                # 不满一页时前面没有更早的成交
+                start = self._overlap(symbol, page, None if len(page['price']) >= self.page_size else 0)
+                if start is None:
+                    refetch.append(symbol)
+                    continue
+                result[symbol] = self._advance(symbol, page, start)
+        finally:
+            pages.close()
+
+        # 新加入的股票和一页内接不上的股票：取全天后对齐
+        for symbol in refetch:
+            columns = client.get_transaction(symbol[0], symbol[1], as_arrays=True) or self._scale(None)
+            first = symbol not in self._state
+            trades = self._advance(symbol, columns, 0 if first else self._overlap(symbol, columns, 0))
+            result[symbol] = trades if self.history or not first else _take(trades, len(trades['price']))
+        return result
+
+    @staticmethod
+    def _scale(page) -> dict:
+        if not page:
+            return {
+                'time': np.empty(0, dtype='timedelta64[m]'), 'price': np.empty(0), 'vol': np.empty(0, dtype=np.int64),
+                'trans': np.empty(0, dtype=np.int64), 'action': np.empty(0, dtype=np.int64), 'unknown': np.empty(0, dtype=np.int64),
+            }
+        # 与 scale_transaction_arrays 相同，价格还原为元
+        page['price'] = page['price'] / 100
+        return page
+
+    def _overlap(self, symbol, columns: dict, before: int = None):
+        """
+        已知尾部在 columns 中的结束位置，找不到时返回 None
+        :param before: columns 之前当日还有多少笔成交，已知时取预期位置（已收到的笔数 - before）及之后的第一个匹配；
+                       未知时尾部不足 TAIL_SIZE 笔不可信，返回 None
+        """
+        count, tail = self._state[symbol]
+        if len(tail) == 0:
+            return 0
+        if before is None and len(tail) < TAIL_SIZE:
+            return None
+        keys = _row_keys(columns)
+        if len(keys) < len(tail):
+            return None
+        windows = np.lib.stride_tricks.sliding_window_view(keys, len(tail))
+        ends = np.flatnonzero((windows == tail).all(axis=1)) + len(tail)
+        if before is not None:
+            ends = ends[ends >= count - before]
+        return int(ends[0]) if len(ends) else None
+
+    def _advance(self, symbol, columns: dict, start) -> dict:
+        """保存 columns[start:] 之后的位置和尾部，返回带 seq 列的新成交"""
+        with self._lock:
+            count, tail = self._state.get(symbol, (0, np.empty(0, dtype=np.uint64)))
+            if start is None:
+                # 全天数据中也找不到已知的尾部（服务器数据已重置），全部作为新成交重新开始
+                log.debug("分笔成交无法接上已知位置，重新开始 %s", symbol)
+                count, tail, start = 0, tail[:0], 0
+            trades = _take(columns, start)
+            size = len(trades['price'])
+            if size:
+                tail = np.concatenate((tail, _row_keys(trades)))[-TAIL_SIZE:]
+            self._state[symbol] = (count + size, tail)
+        trades['seq'] = np.arange(count, count + size)
+        return trades
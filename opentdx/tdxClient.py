@@ -140,7 +140,7 @@ class TdxClient:
         '''
         return self.q_client().get_index_info(code_list, code)
     
-    def stock_kline(self, market: MARKET, code: str, period: PERIOD, start = 0, count = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE) -> list[dict]:
+    def stock_kline(self, market: MARKET, code: str, period: PERIOD, start = 0, count = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE, as_arrays: bool = False) -> list[dict] | dict:
         '''
         获取K线数据
         Args:
@@ -148,9 +148,10 @@ class TdxClient:
             code: str       - 股票代码
             period: PERIOD  - K线周期
             start: int      - 起始位置，默认为0
-            count: int      - 获取数量，默认为800
+            count: int      - 获取数量，默认为800；为 0 时返回空结果，为 None 时取全部历史
             times: int      - 多周期倍数，默认为1
             adjust: ADJUST  - 复权类型
+            as_arrays: bool - 为 True 时返回 {列名: numpy 数组}
         Returns:
             List[Dict]: K线数据列表，每个元素包含：
                 - date_time: datetime   - 时间
@@ -163,7 +164,37 @@ class TdxClient:
                 - upCount?: int         - 上涨数（指数专有）
                 - downCount?: int       - 下跌数（指数专有）
         '''
-        return self.q_client().get_kline(market, code, period, start, count, times, adjust)
+        return self.q_client().get_kline(market, code, period, start, count, times, adjust, as_arrays)
+    
+    def stock_snapshot(self, symbols: list[tuple[MARKET, str]], workers: int = 4, as_frame: bool = False):
+        '''
+        全市场行情快照，自动分批并通过连接池并发请求
+        Args:
+            symbols: list[tuple[MARKET, str]] - 股票列表
+            workers: int    - 并发连接数，默认为4
+            as_frame: bool  - 为 True 时返回 DataFrame
+        Returns:
+            {列名: numpy 数组} 或 DataFrame，价格已还原，换手率缺少流通股本时为 NaN
+        '''
+        return self.q_client().snapshot(symbols, workers, as_frame)
+
+    def stock_kline_batch(self, symbols: list[tuple[MARKET, str]], period: PERIOD, count: int = 800, times: int = 1, adjust: ADJUST = ADJUST.NONE, workers: int = 4, as_frame: bool = False):
+        '''
+        批量获取多只股票的K线数据
+        Args:
+            symbols: list[tuple[MARKET, str]] - 股票列表
+            period: PERIOD  - K线周期
+            count: int      - 每只股票获取数量，默认为800
+            times: int      - 多周期倍数，默认为1
+            adjust: ADJUST  - 复权类型
+            workers: int    - 并发连接数，默认为4
+            as_frame: bool  - 为 True 时返回带 market、code 列的长表 DataFrame
+        Returns:
+            tuple: (结果, 失败)
+                - 结果: {(market, code): {列名: numpy 数组}} 或 DataFrame
+                - 失败: {(market, code): 异常}
+        '''
+        return self.q_client().get_kline_batch(symbols, period, count, times, adjust, workers, as_frame)
     
     def stock_tick_chart(self, market: MARKET, code: str, date: date = None, start: int = 0, count: int = 0xba00) -> list[dict]:
         '''
@@ -424,13 +455,14 @@ class TdxClient:
         '''
         return self.q_client().get_history_orders(market, code, date)
     
-    def stock_transaction(self, market: MARKET, code: str, date: date = None) -> list[dict]:
+    def stock_transaction(self, market: MARKET, code: str, date: date = None, as_arrays: bool = False) -> list[dict] | dict:
         '''
         获取历史成交数据
         Args:
             market: MARKET - 市场类型 (SZ: 深圳, SH: 上海, BJ: 北交所)
             code: str      - 指数代码
             date: date     - 日期，默认为None（获取实时成交数据）
+            as_arrays: bool - 为 True 时返回 {列名: numpy 数组}，action 为 0 BUY / 1 SELL / 2 NEUTRAL
         Return: 
             List[Dict]: 股票历史列表，每个元素包含：
                 - time: time        - 时间
@@ -439,7 +471,7 @@ class TdxClient:
                 - trans: int        - 成交笔数
                 - action: str       - 成交方向（SELL，BUY，NEUTRAL）
         '''
-        return self.q_client().get_transaction(market, code, date)
+        return self.q_client().get_transaction(market, code, date, as_arrays)
 
     def stock_chart_sampling(self, market: MARKET, code: str) -> list[float]:
         '''
@@ -464,7 +496,48 @@ class TdxClient:
                 - content: str | dict
         '''
         return self.q_client().get_company_info(market, code)
+
+    def stock_f10_batch(self, symbols: list[tuple[MARKET, str]], workers: int = 4):
+        '''
+        批量获取F10数据
+        Args:
+            symbols: list[tuple[MARKET, str]] - 股票列表
+            workers: int    - 并发连接数，默认为4
+        Returns:
+            tuple: (结果, 失败)
+                - 结果: {(market, code): stock_f10 的结果}
+                - 失败: {(market, code): 异常}
+        '''
+        return self.q_client().get_company_info_batch(symbols, workers)
     
+    def stock_xdxr(self, market: MARKET, code: str) -> list[dict]:
+        '''
+        获取除权除息数据（按交易日缓存在内存和磁盘）
+        Args:
+            market: MARKET - 市场类型 (SZ: 深圳, SH: 上海, BJ: 北交所)
+            code: str      - 股票代码
+        Return: 
+            List[Dict]: 除权除息列表，每个元素包含：
+                - date: datetime    - 日期
+                - name: str         - 类别
+                - fenhong: float    - 分红（每10股）
+                - peigujia: float   - 配股价
+                - songzhuangu: float - 送转股（每10股）
+                - peigu: float      - 配股（每10股）
+        '''
+        return self.q_client().get_xdxr(market, code)
+
+    def stock_finance(self, market: MARKET, code: str) -> dict:
+        '''
+        获取财务及股本数据（按交易日缓存在内存和磁盘）
+        Args:
+            market: MARKET - 市场类型 (SZ: 深圳, SH: 上海, BJ: 北交所)
+            code: str      - 股票代码
+        Return: 
+            Dict: 财务数据，其中 liutongguben 为流通股本，zongguben 为总股本
+        '''
+        return self.q_client().get_finance(market, code)
+
     def stock_block(self, block_type: BLOCK_FILE_TYPE) -> list[dict]:
         '''
         获取板块信息
@@ -609,7 +682,7 @@ class TdxClient:
         '''
         return self.eq_client().get_quotes(code_list, code)
     
-    def goods_kline(self, market: EX_MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1) -> list[dict]:
+    def goods_kline(self, market: EX_MARKET, code: str, period: PERIOD, start: int = 0, count: int = 800, times: int = 1, as_arrays: bool = False) -> list[dict] | dict:
         '''
         获取商品K线图
         Args:
@@ -619,6 +692,7 @@ class TdxClient:
             start: int              - 起始位置，默认为0
             count: int              - 获取数量，默认为800
             times: int              - 多周期倍数，默认为1
+            as_arrays: bool         - 为 True 时返回 {列名: numpy 数组}
         Returns:
             List[Dict]: K线数据列表，每个元素包含：
                 - date_time: datetime   - 时间
@@ -629,7 +703,7 @@ class TdxClient:
                 - vol: int              - 成交量
                 - amount: float         - 成交额
         '''
-        return self.eq_client().get_kline(market, code, period, start, count, times)
+        return self.eq_client().get_kline(market, code, period, start, count, times, as_arrays)
 
     def goods_history_transaction(self, market: EX_MARKET, code: str, date: date) -> list[dict]:
         '''
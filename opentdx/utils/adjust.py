@@ -0,0 +1,140 @@
+"""
+本地复权：根据除权除息（XDXR）数据计算复权因子，对不复权的 K 线做向量化调整
+
+除权参考价 = (前收盘 - 分红/10 + 配股价 * 配股/10) / (1 + 送转股/10 + 配股/10)
+每次除权的比例 ratio = 除权参考价 / 前收盘，前收盘取除权日之前最后一根 K 线的收盘价
+
+- 前复权：价格乘以该 K 线之后全部除权比例的乘积，最新价格不变
+- 后复权：价格除以该 K 线及之前全部除权比例的乘积，最早价格不变
+
+除权日在第一根 K 线当天或之前的事件没有前收盘，不参与计算
+"""
+import numpy as np
+
+from opentdx.const import ADJUST
+
+PRICE_COLUMNS = ('open', 'close', 'high', 'low')
+
+
+def xdxr_events(xdxr) -> dict:
+    """
+    从 get_xdxr() 的结果（list[dict] 或 as_arrays 列式结果）中取出除权除息事件
+    :return: {'date': datetime64[D], 'fenhong', 'peigujia', 'songzhuangu', 'peigu'}，按日期升序
+    """
+    fields = ('fenhong', 'peigujia', 'songzhuangu', 'peigu')
+    if isinstance(xdxr, dict):
+        mask = np.asarray(xdxr['category']) == 1
+        events = {'date': np.asarray(xdxr['date'], dtype='datetime64[D]')[mask]}
+        for field in fields:
+            events[field] = np.asarray(xdxr[field], dtype=np.float64)[mask]
+    else:
+        rows = [row for row in xdxr or [] if row.get('fenhong') is not None]
+        events = {'date': np.array([row['date'] for row in rows], dtype='datetime64[D]')}
+        for field in fields:
+            events[field] = np.array([row[field] for row in rows], dtype=np.float64)
+    for field in fields:
+        events[field] = np.nan_to_num(events[field])
+    order = np.argsort(events['date'], kind='stable')
+    return {key: value[order] for key, value in events.items()}
+
+
+def _segment_factors(days, close, starts, event_group, event_days, events, adjust: ADJUST) -> np.ndarray:
+    """
+    多只股票拼接后一起计算复权因子
+    :param days: 全部 K 线的日期（datetime64[D]），每只股票内升序
+    :param starts: 每只股票第一根 K 线的位置
+    :param event_group: 每个事件所属股票的序号
+    """
+    n = len(days)
+    ends = np.append(starts[1:], n)
+    if adjust == ADJUST.NONE or n == 0:
+        return np.ones(n)
+
+    # (股票序号, 日期) 组合成一个有序的键，一次 searchsorted 找到每个事件的除权日位置
+    day_num = days.astype(np.int64)
+    bar_group = np.repeat(np.arange(len(starts)), ends - starts)
+    offset = np.int64(1) << 32
+    bar_keys = bar_group * offset + day_num
+    event_keys = event_group.astype(np.int64) * offset + event_days.astype(np.int64)
+    idx = np.searchsorted(bar_keys, event_keys, side='left')
+
+    # 除权日前必须有同一只股票的 K 线作为前收盘
+    valid = idx > starts[event_group]
+    pre_close = np.where(valid, close[np.maximum(idx - 1, 0)], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ex_price = (pre_close - events['fenhong'] / 10 + events['peigujia'] * events['peigu'] / 10) / \
+            (1 + events['songzhuangu'] / 10 + events['peigu'] / 10)
+        log_ratio = np.log(ex_price / pre_close)
+    valid &= np.isfinite(log_ratio) & (pre_close > 0)
+    log_ratio = np.where(valid, log_ratio, 0.0)
+
+    # 除权日在最后一根之后的事件只影响前复权的总量
+    total = np.zeros(len(starts))
+    np.add.at(total, event_group, log_ratio)
+    inside = valid & (idx < ends[event_group])
+    step = np.zeros(n)
+    np.add.at(step, idx[inside], log_ratio[inside])
+
+    # 每只股票内的累计：总的 cumsum 减去该股票开始前的部分
+    cum = np.cumsum(step)
+    before = np.concatenate(([0.0], cum))[starts]
+    cum -= np.repeat(before, ends - starts)
+
+    if adjust == ADJUST.QFQ:
+        return np.exp(np.repeat(total, ends - starts) - cum)
+    return np.exp(-cum)
+
+
+def _apply(columns: dict, factors: np.ndarray) -> dict:
+    result = dict(columns)
+    for key in PRICE_COLUMNS:
+        if key in result:
+            result[key] = np.asarray(result[key], dtype=np.float64) * factors
+    return result
+
+
+def adjust_factors(datetimes, close, xdxr, adjust: ADJUST) -> np.ndarray:
+    """单只股票的复权因子，datetimes / close 为按时间升序的不复权 K 线"""
+    events = xdxr_events(xdxr)
+    return _segment_factors(
+        np.asarray(datetimes, dtype='datetime64[D]'), np.asarray(close, dtype=np.float64), np.array([0]),
+        np.zeros(len(events['date']), dtype=np.int64), events['date'], events, adjust,
+    )
+
+
+def adjust_kline(columns: dict, xdxr, adjust: ADJUST) -> dict:
+    """
+    对单只股票的列式 K 线（get_kline(as_arrays=True) 或 KlineStore.read() 的结果）复权，返回新的列
+    """
+    if adjust == ADJUST.NONE or not columns:
+        return columns
+    return _apply(columns, adjust_factors(columns['datetime'], columns['close'], xdxr, adjust))
+
+
+def adjust_kline_batch(bars: dict, xdxrs: dict, adjust: ADJUST) -> dict:
+    """
+    多只股票一起复权：全部 K 线拼接后一次计算
+    :param bars: {(market, code): 列式 K 线}
+    :param xdxrs: {(market, code): get_xdxr() 的结果}，缺失的视为没有除权
+    :return: {(market, code): 复权后的列式 K 线}
+    """
+    if adjust == ADJUST.NONE:
+        return bars
+    symbols = [symbol for symbol, columns in bars.items() if columns and len(columns['close'])]
+    if not symbols:
+        return dict(bars)
+
+    lengths = np.array([len(bars[symbol]['close']) for symbol in symbols])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    days = np.concatenate([np.asarray(bars[symbol]['datetime'], dtype='datetime64[D]') for symbol in symbols])
+    close = np.concatenate([np.asarray(bars[symbol]['close'], dtype=np.float64) for symbol in symbols])
+
+    event_list = [xdxr_events(xdxrs.get(symbol)) for symbol in symbols]
+    event_group = np.repeat(np.arange(len(symbols)), [len(events['date']) for events in event_list])
+    events = {key: np.concatenate([events[key] for events in event_list]) for key in event_list[0]}
+
+    factors = _segment_factors(days, close, starts, event_group, events['date'], events, adjust)
+    result = dict(bars)
+    for symbol, start, length in zip(symbols, starts, lengths):
+        result[symbol] = _apply(bars[symbol], factors[start:start + length])
+    return result
@@ -0,0 +1,197 @@
+#coding: utf-8
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from opentdx.const import MARKET, PERIOD
+from opentdx.utils.base_reader import BaseReader, TdxFileNotFoundException, TdxNotAssignVipdocPathException
+from opentdx.utils.help import to_datetime64
+
+"""
+读取通达信客户端 vipdoc 目录下的本地 K 线文件
+
+- 日线 vipdoc/{sh,sz,bj}/lday/*.day，每条 32 字节：日期、开高低收(整数，需乘系数)、成交额、成交量
+- 1 分钟线 vipdoc/*/minline/*.lc1、5 分钟线 vipdoc/*/fzline/*.lc5，每条 32 字节：日期、分钟数、开高低收、成交额、成交量
+"""
+
+DAY_DTYPE = np.dtype([
+    ('date', '<u4'),
+    ('open', '<u4'),
+    ('high', '<u4'),
+    ('low', '<u4'),
+    ('close', '<u4'),
+    ('amount', '<f4'),
+    ('vol', '<u4'),
+    ('reserved', '<u4'),
+])
+
+LC_DTYPE = np.dtype([
+    ('date', '<u2'),
+    ('minutes', '<u2'),
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f4'),
+    ('amount', '<f4'),
+    ('vol', '<u4'),
+    ('reserved', '<u4'),
+])
+
+# 文件名前缀对应的市场
+FILE_MARKETS = {'sz': MARKET.SZ, 'sh': MARKET.SH, 'bj': MARKET.BJ}
+
+# 日线价格系数：基金、债券等价格保留三位小数
+PRICE_COEFFICIENT = {
+    MARKET.SH: {'50': 0.001, '51': 0.001, '52': 0.001, '56': 0.001, '58': 0.001, '90': 0.001,
+                '01': 0.001, '10': 0.001, '11': 0.001, '12': 0.001, '13': 0.001, '14': 0.001},
+    MARKET.SZ: {'15': 0.001, '16': 0.001, '18': 0.001,
+                '10': 0.001, '11': 0.001, '12': 0.001, '13': 0.001},
+    MARKET.BJ: {},
+}
+
+
+def parse_file_name(fname):
+    """sh600000.day -> (MARKET.SH, '600000')，无法识别时返回 None"""
+    name = os.path.splitext(os.path.basename(fname))[0].lower()
+    market = FILE_MARKETS.get(name[:2])
+    if market is None or len(name) < 3:
+        return None
+    return market, name[2:]
+
+
+class BarReader(BaseReader):
+    """
+    本地 K 线文件读取的基类，子类指定 dtype / 子目录 / 扩展名
+
+    get_data() 返回 {列名: numpy 数组}，datetime 为 datetime64[m]，价格和成交额为 float64
+    get_df() 返回以 datetime 为索引的 DataFrame
+    """
+    dtype = None
+    sub_dir = None
+    suffix = None
+
+    def __init__(self, vipdoc_path=None):
+        self.vipdoc_path = vipdoc_path
+
+    def find_path(self, code_or_file, market: MARKET = None):
+        """文件名直接返回，代码则在 vipdoc 目录下查找"""
+        if os.path.isfile(code_or_file):
+            return code_or_file
+        if market is None:
+            parsed = parse_file_name(code_or_file)
+            if parsed is None:
+                raise TdxFileNotFoundException('no tdx file found for %s' % code_or_file)
+            market, code_or_file = parsed
+        if self.vipdoc_path is None:
+            raise TdxNotAssignVipdocPathException('vipdoc path not assigned')
+        prefix = market.name.lower()
+        fname = os.path.join(self.vipdoc_path, prefix, self.sub_dir, prefix + code_or_file + self.suffix)
+        if not os.path.isfile(fname):
+            raise TdxFileNotFoundException('no tdx file found: %s' % fname)
+        return fname
+
+    def list_files(self, markets=None):
+        """vipdoc 下当前类型的全部文件"""
+        if self.vipdoc_path is None:
+            raise TdxNotAssignVipdocPathException('vipdoc path not assigned')
+        files = []
+        for market in markets or FILE_MARKETS.values():
+            path = os.path.join(self.vipdoc_path, market.name.lower(), self.sub_dir)
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(self.suffix))
+        return files
+
+    def get_data(self, code_or_file, market: MARKET = None) -> dict:
+        fname = self.find_path(code_or_file, market)
+        return self.to_columns(self.unpack_array(self.dtype, fname), fname)
+
+    def get_df(self, code_or_file, exchange=None):
+        columns = self.get_data(code_or_file, exchange)
+        return pd.DataFrame(columns).set_index('datetime')
+
+    def to_columns(self, records: np.ndarray, fname: str) -> dict:
+        raise NotImplementedError('not yet')
+
+
+class DailyBarReader(BarReader):
+    """日线 .day 文件"""
+    dtype = DAY_DTYPE
+    sub_dir = 'lday'
+    suffix = '.day'
+
+    @staticmethod
+    def get_coefficient(fname):
+        parsed = parse_file_name(fname)
+        if parsed is None:
+            return 0.01
+        market, code = parsed
+        return PRICE_COEFFICIENT[market].get(code[:2], 0.01)
+
+    def to_columns(self, records: np.ndarray, fname: str) -> dict:
+        coefficient = self.get_coefficient(fname)
+        return {
+            'datetime': to_datetime64(records['date']),
+            'open': np.round(records['open'] * coefficient, 3),
+            'high': np.round(records['high'] * coefficient, 3),
+            'low': np.round(records['low'] * coefficient, 3),
+            'close': np.round(records['close'] * coefficient, 3),
+            'amount': records['amount'].astype(np.float64),
+            'vol': records['vol'].astype(np.float64),
+        }
+
+
+class MinBarReader(BarReader):
+    """1 分钟 .lc1 / 5 分钟 .lc5 文件"""
+    dtype = LC_DTYPE
+
+    def __init__(self, vipdoc_path=None, period: PERIOD = PERIOD.MIN_1):
+        super().__init__(vipdoc_path)
+        if period == PERIOD.MIN_1:
+            self.sub_dir, self.suffix = 'minline', '.lc1'
+        elif period == PERIOD.MIN_5:
+            self.sub_dir, self.suffix = 'fzline', '.lc5'
+        else:
+            raise Exception("only PERIOD.MIN_1 / PERIOD.MIN_5 are supported")
+        self.period = period
+
+    def to_columns(self, records: np.ndarray, fname: str) -> dict:
+        nums = records['date'].astype(np.int64) | (records['minutes'].astype(np.int64) << 16)
+        return {
+            'datetime': to_datetime64(nums, with_time=True),
+            # 文件中为 float32，保留三位小数去掉精度误差
+            'open': np.round(records['open'].astype(np.float64), 3),
+            'high': np.round(records['high'].astype(np.float64), 3),
+            'low': np.round(records['low'].astype(np.float64), 3),
+            'close': np.round(records['close'].astype(np.float64), 3),
+            'amount': records['amount'].astype(np.float64),
+            'vol': records['vol'].astype(np.float64),
+        }
+
+
+def load_directory(reader: BarReader, files=None, markets=None, workers=None) -> dict:
+    """
+    用多个进程并发读取整个 vipdoc 目录
+    :param reader: DailyBarReader / MinBarReader，files 为空时需要指定 vipdoc_path
+    :param files: 要读取的文件列表，默认为 reader.list_files(markets)
+    :param workers: 进程数，默认为 CPU 核数，1 表示在当前进程中读取
+    :return: {(market, code): {列名: numpy 数组}}
+    """
+    if files is None:
+        files = reader.list_files(markets)
+    keys = [parse_file_name(fname) for fname in files]
+    files = [fname for fname, key in zip(files, keys) if key is not None]
+    keys = [key for key in keys if key is not None]
+    if not files:
+        return {}
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(files) == 1:
+        results = map(reader.get_data, files)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 每个进程一次处理一批文件，减少进程间往返
+            chunksize = max(1, len(files) // (workers * 4))
+            results = list(executor.map(reader.get_data, files, chunksize=chunksize))
+    return dict(zip(keys, results))
@@ -1,7 +1,10 @@
 #coding=utf-8
 from __future__ import unicode_literals, division
+import os
 import struct
 
+import numpy as np
+
 
 class TdxFileNotFoundException(Exception):
     pass
@@ -17,5 +20,19 @@ class BaseReader(object):
         return (record_struct.unpack_from(data, offset)
                 for offset in range(0, len(data), record_struct.size))
 
+    def unpack_array(self, dtype, data):
+        """
+        按 numpy 结构化 dtype 一次解析全部定长记录，data 为文件名时以 memmap 映射文件，不读入内存
+        末尾不完整的记录被忽略
+        """
+        dtype = np.dtype(dtype)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            count = len(data) // dtype.itemsize
+            return np.frombuffer(data, dtype=dtype, count=count)
+        count = os.path.getsize(data) // dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(data, dtype=dtype, mode='r', shape=(count,))
+
     def get_df(self, code_or_file, exchange=None):
         raise NotImplementedError('not yet')
\ No newline at end of file
@@ -1,55 +1,377 @@
 """缓存管理模块"""
+import os
+import pickle
+import sqlite3
+import sys
+import threading
 import time
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
+from opentdx.utils.help import seconds_until_rollover, trading_day
+from opentdx.utils.log import log
+
+# 磁盘缓存目录，可通过环境变量 OPENTDX_CACHE_DIR 修改；
+# 磁盘缓存默认关闭，调用 enable_disk_cache() 或设置 OPENTDX_DISK_CACHE=1 开启
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'opentdx')
+
 
 @dataclass
 class CacheItem:
     """缓存项"""
     data: Any
     expire_time: float
+    size: int = 0
+
 
+def estimate_size(value: Any) -> int:
+    """粗略估算对象占用的字节数（递归统计容器内容，numpy 数组按 nbytes）"""
+    if isinstance(value, np.ndarray):
+        # 视图的 getsizeof 不包含数据部分
+        return sys.getsizeof(value) + (value.nbytes if value.base is not None else 0)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
 
-class SimpleCache:
-    """简单的内存缓存"""
 
-    def __init__(self, ttl_seconds: int = 86400):  # 默认 24 小时
-        self._cache: dict[str, CacheItem] = {}
+class LRUCache:
+    """
+    线程安全的内存缓存：按最近使用淘汰，支持条目数/字节数上限和按键的过期时间
+
+    - max_entries / max_bytes 为 None 表示不限制
+    - set() 可以为单个键指定 ttl_seconds，默认使用构造时的 ttl_seconds
+    - hits / misses / evictions / expirations 计数可通过 stats() 读取
+    """
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = estimate_size):
+        self._cache: OrderedDict[str, CacheItem] = OrderedDict()
         self._ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Optional[Any]:
         """获取缓存数据"""
-        item = self._cache.get(key)
-        if item is None:
-            return None
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None:
+                self.misses += 1
+                return None
 
-        # 检查是否过期
-        if time.time() > item.expire_time:
-            del self._cache[key]
-            return None
+            # 检查是否过期
+            if time.time() > item.expire_time:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
 
-        return item.data
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return item.data
 
-    def set(self, key: str, value: Any) -> None:
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
         """设置缓存数据"""
-        self._cache[key] = CacheItem(
-            data=value,
-            expire_time=time.time() + self._ttl
-        )
+        ttl = self._ttl if ttl_seconds is None else ttl_seconds
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            self._cache[key] = CacheItem(data=value, expire_time=time.time() + ttl, size=size)
+            self._bytes += size
+            self._evict()
 
     def delete(self, key: str) -> None:
         """删除缓存"""
-        if key in self._cache:
-            del self._cache[key]
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
 
     def clear(self) -> None:
         """清空缓存"""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+
+    def purge_expired(self) -> int:
+        """清理所有已过期的条目，返回清理数量"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, item in self._cache.items() if now > item.expire_time]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            item = self._cache.get(key)
+            return item is not None and time.time() <= item.expire_time
+
+    def _remove(self, key: str) -> None:
+        item = self._cache.pop(key)
+        self._bytes -= item.size
+
+    def _over_budget(self) -> bool:
+        return (self.max_entries is not None and len(self._cache) > self.max_entries) or \
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+
+    def _evict(self) -> None:
+        # 从最久未使用的一端淘汰，已过期的条目计入 expirations
+        now = time.time()
+        while self._over_budget() and self._cache:
+            key, item = next(iter(self._cache.items()))
+            self._remove(key)
+            if now > item.expire_time:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+
+# 兼容旧名称
+SimpleCache = LRUCache
+
+
+class DiskCache:
+    """
+    基于 SQLite 的持久化缓存，按 (namespace, key) 保存 pickle 后的数据和写入时的交易日。
+    只返回当前交易日写入的数据，打开时清理之前交易日的数据；多个进程可以共用同一个文件。
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, day TEXT NOT NULL, data BLOB NOT NULL, '
+                'PRIMARY KEY (namespace, key))'
+            )
+        self.purge()
+
+    @staticmethod
+    def _day() -> str:
+        return trading_day().isoformat()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM cache WHERE namespace = ? AND key = ? AND day = ?', (namespace, key, self._day())
+            ).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict:
+        result = {}
+        day = self._day()
+        keys = list(keys)
+        with self._lock:
+            # SQLite 对参数个数有限制，分批查询
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    'SELECT key, data FROM cache WHERE namespace = ? AND day = ? AND key IN (%s)' % ','.join('?' * len(chunk)),
+                    (namespace, day, *chunk),
+                ).fetchall()
+                result.update((key, pickle.loads(data)) for key, data in rows)
+        return result
+
+    def load(self, namespace: str) -> dict:
+        """读取某个命名空间当前交易日的全部数据"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT key, data FROM cache WHERE namespace = ? AND day = ?', (namespace, self._day())
+            ).fetchall()
+        return {key: pickle.loads(data) for key, data in rows}
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        self.set_many(namespace, {key: value})
+
+    def set_many(self, namespace: str, items: dict) -> None:
+        day = self._day()
+        rows = [(namespace, key, day, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) for key, value in items.items()]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO cache (namespace, key, day, data) VALUES (?, ?, ?, ?)', rows)
+
+    def purge(self) -> int:
+        """删除之前交易日写入的数据"""
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM cache WHERE day != ?', (self._day(),)).rowcount
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            if namespace is None:
+                self._conn.execute('DELETE FROM cache')
+            else:
+                self._conn.execute('DELETE FROM cache WHERE namespace = ?', (namespace,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_enabled = False
+_disk_cache_dir: Optional[str] = None
+_disk_cache_lock = threading.Lock()
+
+def enable_disk_cache(cache_dir: Optional[str] = None) -> None:
+    """
+    开启磁盘缓存，流通股本、除权除息等数据在同一交易日内跨进程复用
+    :param cache_dir: 缓存目录，默认为 OPENTDX_CACHE_DIR 或 ~/.cache/opentdx
+    """
+    global _disk_cache_enabled, _disk_cache_dir, _disk_cache
+    with _disk_cache_lock:
+        if cache_dir is not None and cache_dir != _disk_cache_dir and _disk_cache is not None:
+            _disk_cache.close()
+            _disk_cache = None
+        _disk_cache_enabled = True
+        _disk_cache_dir = cache_dir
+
+def disable_disk_cache() -> None:
+    global _disk_cache_enabled, _disk_cache
+    with _disk_cache_lock:
+        _disk_cache_enabled = False
+        if _disk_cache is not None:
+            _disk_cache.close()
+            _disk_cache = None
+
+def get_disk_cache_dir() -> Optional[str]:
+    """磁盘缓存目录，未开启（enable_disk_cache() 或 OPENTDX_DISK_CACHE=1）时返回 None"""
+    if not _disk_cache_enabled and os.environ.get('OPENTDX_DISK_CACHE', '0') != '1':
+        return None
+    return _disk_cache_dir or os.environ.get('OPENTDX_CACHE_DIR') or DEFAULT_CACHE_DIR
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """
+    进程内共享的磁盘缓存，第一次使用时才创建文件。
+    未开启或无法打开时返回 None
+    """
+    global _disk_cache
+    cache_dir = get_disk_cache_dir()
+    if cache_dir is None:
+        return None
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            try:
+                _disk_cache = DiskCache(os.path.join(cache_dir, 'opentdx.sqlite3'))
+            except Exception as e:
+                log.warning("打开磁盘缓存失败 %s: %s", cache_dir, e)
+                return None
+        return _disk_cache
+
+
+class PersistentCache:
+    """
+    内存 LRUCache + 磁盘缓存的两级缓存，数据在交易日切换时失效。
+    首次访问时把磁盘中当前交易日的数据预热到内存。
+    """
+
+    def __init__(self, memory: LRUCache, namespace: str):
+        self.memory = memory
+        self.namespace = namespace
+        self._warmed = None     # 已预热的磁盘缓存
+
+    def _disk(self) -> Optional[DiskCache]:
+        disk = get_disk_cache()
+        if disk is not None and self._warmed is not disk:
+            self._warmed = disk
+            ttl = seconds_until_rollover()
+            for key, value in disk.load(self.namespace).items():
+                self.memory.set(key, value, ttl)
+        return disk
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            disk = self._disk()
+            if disk is not None:
+                value = disk.get(self.namespace, key)
+                if value is not None:
+                    self.memory.set(key, value, seconds_until_rollover())
+        return value
+
+    def get_many(self, keys: list[str]) -> dict:
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                result[key] = value
+        disk = self._disk() if missing else None
+        if disk is not None:
+            ttl = seconds_until_rollover()
+            for key, value in disk.get_many(self.namespace, missing).items():
+                self.memory.set(key, value, ttl)
+                result[key] = value
+        return result
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: dict) -> None:
+        if not items:
+            return
+        ttl = seconds_until_rollover()
+        for key, value in items.items():
+            self.memory.set(key, value, ttl)
+        disk = self._disk()
+        if disk is not None:
+            try:
+                disk.set_many(self.namespace, items)
+            except Exception as e:
+                log.warning("写入磁盘缓存失败: %s", e)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.clear(self.namespace)
 
 
 # XDXR 数据缓存（除权除息）
-xdxr_cache = SimpleCache(ttl_seconds=86400)
+xdxr_cache = LRUCache(ttl_seconds=86400, max_entries=20000)
+
+# Finance 数据缓存（流通股本，值为 float）
+finance_cache = LRUCache(ttl_seconds=86400, max_entries=20000)
+
+# Finance 完整结果缓存（财务及股本信息 dict）
+finance_info_cache = LRUCache(ttl_seconds=86400, max_entries=20000)
+
+# F10 章节内容缓存，键为 "{filename}_{start}_{length}"，按字节数限制大小
+company_content_cache = LRUCache(ttl_seconds=86400, max_bytes=256 << 20)
 
-# Finance 数据缓存（股本信息）
-finance_cache = SimpleCache(ttl_seconds=86400)
+# 带磁盘持久化的 XDXR / Finance 缓存，键为 "{market}_{code}"
+xdxr_store = PersistentCache(xdxr_cache, 'xdxr')
+finance_store = PersistentCache(finance_info_cache, 'finance')
@@ -1,8 +1,11 @@
 # coding=utf-8
 
-from datetime import date, datetime
+import codecs
+from datetime import date, datetime, timedelta
 import struct
 
+import numpy as np
+
 from opentdx.const import EX_MARKET, MARKET
 from opentdx.enums import IndustryCode
 from opentdx.utils.log import log
@@ -90,6 +93,173 @@ def get_price(data, pos):
 
     return int_data, pos
 
+def _decode_price_spans(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """按 [start, end] 字节区间批量解码变长有符号整数"""
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    lengths = ends - starts + 1
+    first = buf[starts].astype(np.int64)
+    # 首字节 6 位数据位，之后每字节 7 位；整数大多只有 1~3 个字节，按字节序号逐轮累加
+    values = first & 0x3f
+    for k in range(1, int(lengths.max())):
+        idx = np.flatnonzero(lengths > k)
+        values[idx] += (buf[starts[idx] + k].astype(np.int64) & 0x7f) << (6 + 7 * (k - 1))
+    negative = (first & 0x40) != 0
+    values[negative] = -values[negative]
+    return values
+
+def get_prices(data, pos: int = 0, count: int = None) -> tuple[np.ndarray, int]:
+    """
+    get_price 的向量化版本：一次解码从 pos 开始的 count 个连续变长整数
+    :param count: None 表示解码到 data 末尾
+    :return: (int64 数组, 新的 pos)
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero((buf[pos:] & 0x80) == 0) + pos
+    if count is not None:
+        if len(ends) < count:
+            raise ValueError("not enough data for %d prices" % count)
+        ends = ends[:count]
+    if len(ends) == 0:
+        return np.zeros(0, dtype=np.int64), pos
+    starts = np.empty_like(ends)
+    starts[0] = pos
+    starts[1:] = ends[:-1] + 1
+    return _decode_price_spans(buf, starts, ends), int(ends[-1]) + 1
+
+def get_price_records(data, pos: int, count: int, fields: int, prefix: int = 0, suffix: int = 0) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    批量解码 count 条记录，每条记录为 prefix 字节定长字段 + fields 个变长整数 + suffix 字节定长字段
+    :return: (shape 为 (count, fields) 的 int64 数组, 每条记录的起始偏移, 新的 pos)
+    """
+    if prefix == 0 and suffix == 0:
+        buf = np.frombuffer(data, dtype=np.uint8)
+        values, new_pos = get_prices(data, pos, count * fields)
+        ends = np.flatnonzero((buf[pos:new_pos] & 0x80) == 0) + pos
+        offsets = np.concatenate(([pos], ends[fields - 1:-1:fields] + 1)).astype(np.int64) if count else np.zeros(0, dtype=np.int64)
+        return values.reshape(count, fields), offsets, new_pos
+
+    # 定长字段中也可能出现"结束字节"，不能直接按结束字节切分。对每个相对位置 r 计算"从 r 开始的一条记录的下一条记录起点"
+    # f(r)，再用倍增（f, f², f⁴...）一次求出全部记录的起点，不需要逐条推进
+    buf = np.frombuffer(data, dtype=np.uint8)
+    size = len(buf) - pos
+    invalid = size + 1     # 越界的哨兵位置，size 本身是合法的结束位置
+    # nxt[r]: 从 r 开始的变长整数之后的位置，即 r 及之后第一个结束字节的下一个位置
+    nxt = np.full(size + 2, invalid, dtype=np.int64)
+    nxt[:size] = np.where((buf[pos:] & 0x80) == 0, np.arange(1, size + 1), invalid)
+    nxt[:size] = np.minimum.accumulate(nxt[:size][::-1])[::-1]
+
+    def skip(r, width):
+        # 大于 size 的位置都越界
+        return np.minimum(r + width, invalid)
+
+    def walk(r):
+        """从记录起点 r 得到 (各变长整数的起点, 下一条记录的起点)"""
+        r = skip(r, prefix)
+        field_starts = []
+        for _ in range(fields):
+            field_starts.append(r)
+            r = nxt[r]
+        return field_starts, skip(r, suffix)
+
+    _, jump = walk(np.arange(size + 2, dtype=np.int64))
+    jump[invalid] = invalid
+    starts = np.zeros(count + 1, dtype=np.int64)
+    filled = 1
+    while filled < count + 1:
+        n = min(filled, count + 1 - filled)
+        starts[filled:filled + n] = jump[starts[:n]]
+        filled += n
+        if filled < count + 1:
+            jump = jump[jump]
+    if starts[-1] == invalid:
+        raise ValueError("not enough data for %d records" % count)
+
+    field_starts, _ = walk(starts[:-1])
+    value_starts = np.stack(field_starts, axis=1).ravel()
+    value_ends = nxt[value_starts] - 1
+    values = _decode_price_spans(buf, value_starts + pos, value_ends + pos)
+    return values.reshape(count, fields), starts[:-1] + pos, int(starts[-1]) + pos
+
+def add_first_base(values: np.ndarray) -> np.ndarray:
+    """分时数据的还原：首个非零值之后的元素都以它为基准（与逐条累加起始价的逻辑一致）"""
+    result = values.copy()
+    nonzero = np.flatnonzero(values)
+    if len(nonzero):
+        result[nonzero[0] + 1:] += values[nonzero[0]]
+    return result
+
+def get_uint16_at(data, offsets: np.ndarray) -> np.ndarray:
+    """按偏移批量读取小端 uint16"""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    return buf[offsets].astype(np.int64) | (buf[offsets + 1].astype(np.int64) << 8)
+
+def ymd_to_datetime64(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """年、月、日数组转换为 datetime64[D] 数组"""
+    months = (np.asarray(year, dtype=np.int64) - 1970) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return months.astype('datetime64[M]').astype('datetime64[D]') + (np.asarray(day, dtype=np.int64) - 1).astype('timedelta64[D]')
+
+def to_datetime64(nums: np.ndarray, with_time=False) -> np.ndarray:
+    """to_datetime 的向量化版本，返回 datetime64[m] 数组；日线等非分钟数据统一为 15:00"""
+    nums = np.asarray(nums, dtype=np.int64)
+    if with_time:
+        zip_data = nums & 0xFFFF
+        days = ymd_to_datetime64((zip_data >> 11) + 2004, (zip_data & 0x7FF) // 100, (zip_data & 0x7FF) % 100)
+        minutes = nums >> 16
+    else:
+        days = ymd_to_datetime64(nums // 10000, nums % 10000 // 100, nums % 100)
+        minutes = 15 * 60
+    return days.astype('datetime64[m]') + np.asarray(minutes, dtype=np.int64).astype('timedelta64[m]')
+
+def concat_columns(parts: list[dict]) -> dict:
+    """按顺序拼接多个 {列名: 数组} 结果"""
+    parts = [part for part in parts if part]
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+def columns_to_rows(columns: dict) -> list[dict]:
+    """{列名: 数组} 转换为逐行的 dict 列表"""
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*(column.tolist() for column in columns.values()))]
+
+def iter_lines(chunks, encoding: str = 'gbk', errors: str = 'replace'):
+    """
+    把逐块到达的字节按行产出（不含换行符），多字节字符被分在两块时也能正确解码
+    chunks 中的 str 不再解码，直接参与切分
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    tail = ''
+    for chunk in chunks:
+        lines = (tail + (chunk if isinstance(chunk, str) else decoder.decode(chunk))).split('\n')
+        tail = lines.pop()
+        yield from lines
+    tail += decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def trading_day(now: datetime = None) -> date:
+    """当前数据所属的交易日：9:00 前和周末归属上一个交易日（不考虑节假日）"""
+    now = now or datetime.now()
+    day = now.date()
+    if now.hour < 9:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+def seconds_until_rollover(now: datetime = None) -> float:
+    """距离 trading_day 下一次切换（下一个工作日 9:00）的秒数，周末不切换"""
+    now = now or datetime.now()
+    rollover = now.replace(hour=9, minute=0, second=0, microsecond=0)
+    if now >= rollover:
+        rollover += timedelta(days=1)
+    while rollover.weekday() >= 5:
+        rollover += timedelta(days=1)
+    return (rollover - now).total_seconds()
+
 def to_datetime(num, with_time=False) -> datetime:
     year = 0
     month = 0
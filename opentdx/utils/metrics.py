@@ -0,0 +1,194 @@
+"""
+按请求类型（解析器 + msg_id）统计的客户端指标：请求数、失败数、往返耗时分布、
+线上字节数、解压后字节数、解压耗时和解析耗时
+
+- 所有客户端默认共用 client_metrics，设置 client.metrics = None 关闭统计，也可以给某个客户端单独指定 ClientMetrics()
+- snapshot() 返回当前的统计，to_prometheus() 输出 Prometheus 文本格式，start_http_server() 提供 /metrics
+- 流水线请求的往返耗时从发送到收到响应计算，包含在连接上排队等待的时间
+"""
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# 往返耗时直方图的上界（秒）
+RTT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """单个请求类型的累计值"""
+    __slots__ = ('parser', 'msg_id', 'count', 'errors', 'rtt_counts', 'rtt_sum',
+                 'wire_bytes', 'raw_bytes', 'decompress_seconds', 'deserialize_seconds')
+
+    def __init__(self, parser: str, msg_id: int, buckets: int):
+        self.parser = parser
+        self.msg_id = msg_id
+        self.count = 0
+        self.errors = 0
+        self.rtt_counts = [0] * (buckets + 1)   # 最后一个为 +Inf
+        self.rtt_sum = 0.0
+        self.wire_bytes = 0
+        self.raw_bytes = 0
+        self.decompress_seconds = 0.0
+        self.deserialize_seconds = 0.0
+
+
+class ClientMetrics:
+    """线程安全的指标集合，enabled = False 时不记录"""
+
+    def __init__(self, buckets=RTT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.enabled = True
+        self._stats: dict[tuple[str, int], RequestStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, parser: str, msg_id: int) -> RequestStats:
+        stats = self._stats.get((parser, msg_id))
+        if stats is None:
+            stats = self._stats[(parser, msg_id)] = RequestStats(parser, msg_id, len(self.buckets))
+        return stats
+
+    def observe(self, parser, rtt: float, recv_info=None, deserialize_seconds: float = 0.0):
+        """
+        记录一次成功的请求
+        :param parser: 请求使用的解析器实例
+        :param recv_info: (线上字节数, 解压后字节数, 解压耗时)，来自客户端读取响应时的统计
+        """
+        if not self.enabled:
+            return
+        wire_bytes, raw_bytes, decompress_seconds = recv_info or (0, 0, 0.0)
+        with self._lock:
+            stats = self._get(type(parser).__name__, parser.msg_id)
+            stats.count += 1
+            stats.rtt_counts[bisect_left(self.buckets, rtt)] += 1
+            stats.rtt_sum += rtt
+            stats.wire_bytes += wire_bytes
+            stats.raw_bytes += raw_bytes
+            stats.decompress_seconds += decompress_seconds
+            stats.deserialize_seconds += deserialize_seconds
+
+    def observe_error(self, parser):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._get(type(parser).__name__, parser.msg_id).errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _quantile(self, counts: list[int], q: float) -> float:
+        """按直方图估计分位数，返回所在区间的上界（落在 +Inf 区间时为 inf）"""
+        total = sum(counts)
+        if total == 0:
+            return float('nan')
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self, as_frame: bool = False) -> list[dict] | pd.DataFrame:
+        """
+        当前统计，按总耗时从大到小排列
+        :return: [{'parser', 'msg_id', 'count', 'errors', 'rtt_sum', 'rtt_avg', 'rtt_p50', 'rtt_p90', 'rtt_p99',
+                   'rtt_buckets', 'wire_bytes', 'raw_bytes', 'compression_ratio', 'decompress_seconds', 'deserialize_seconds'}]
+        """
+        with self._lock:
+            items = [(stats, list(stats.rtt_counts)) for stats in self._stats.values()]
+        result = []
+        for stats, counts in items:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                buckets[bound] = cumulative
+            result.append({
+                'parser': stats.parser,
+                'msg_id': stats.msg_id,
+                'count': stats.count,
+                'errors': stats.errors,
+                'rtt_sum': stats.rtt_sum,
+                'rtt_avg': stats.rtt_sum / stats.count if stats.count else float('nan'),
+                'rtt_p50': self._quantile(counts, 0.5),
+                'rtt_p90': self._quantile(counts, 0.9),
+                'rtt_p99': self._quantile(counts, 0.99),
+                'rtt_buckets': buckets,
+                'wire_bytes': stats.wire_bytes,
+                'raw_bytes': stats.raw_bytes,
+                'compression_ratio': stats.raw_bytes / stats.wire_bytes if stats.wire_bytes else float('nan'),
+                'decompress_seconds': stats.decompress_seconds,
+                'deserialize_seconds': stats.deserialize_seconds,
+            })
+        result.sort(key=lambda item: item['rtt_sum'] + item['deserialize_seconds'], reverse=True)
+        if as_frame:
+            return pd.DataFrame([{key: value for key, value in item.items() if key != 'rtt_buckets'} for item in result])
+        return result
+
+    def to_prometheus(self, prefix: str = 'opentdx') -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, field):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for item in snapshot:
+                lines.append(f'{prefix}_{name}{{{_labels(item)}}} {_number(item[field])}')
+
+        metric('requests_total', 'counter', 'Number of successful requests.', 'count')
+        metric('request_errors_total', 'counter', 'Number of failed requests.', 'errors')
+
+        lines.append(f'# HELP {prefix}_rtt_seconds Request round-trip time.')
+        lines.append(f'# TYPE {prefix}_rtt_seconds histogram')
+        for item in snapshot:
+            labels = _labels(item)
+            for bound, count in item['rtt_buckets'].items():
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                lines.append(f'{prefix}_rtt_seconds_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f'{prefix}_rtt_seconds_sum{{{labels}}} {_number(item["rtt_sum"])}')
+            lines.append(f'{prefix}_rtt_seconds_count{{{labels}}} {item["count"]}')
+
+        metric('wire_bytes_total', 'counter', 'Response bytes received on the wire, including headers.', 'wire_bytes')
+        metric('raw_bytes_total', 'counter', 'Response body bytes after decompression.', 'raw_bytes')
+        metric('decompress_seconds_total', 'counter', 'Time spent in zlib decompression.', 'decompress_seconds')
+        metric('deserialize_seconds_total', 'counter', 'Time spent in parser deserialize.', 'deserialize_seconds')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(item: dict) -> str:
+    return 'parser="%s",msg_id="0x%x"' % (item['parser'], item['msg_id'])
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def start_http_server(port: int, metrics: 'ClientMetrics' = None, addr: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """在后台线程中提供 http://addr:port/metrics，返回的 server 可以 shutdown()"""
+    metrics = metrics or client_metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, name='MetricsServer', daemon=True).start()
+    return server
+
+
+# 所有客户端默认共用的统计
+client_metrics = ClientMetrics()
@@ -1,3 +1,5 @@
+import socket
+
 import pytest
 
 from opentdx.client.exQuotationClient import exQuotationClient
@@ -5,6 +7,8 @@ from opentdx.client.macQuotationClient import macQuotationClient
 from opentdx.client.quotationClient import QuotationClient
 from opentdx.tdxClient import TdxClient
 
+from .mock_server import MockTdxServer
+
 
 @pytest.fixture(scope="session")
 def tdx():
@@ -49,3 +53,30 @@ def sp_qc():
     client.sp().connect().login()
     yield client
     client.disconnect()
+
+
+@pytest.fixture(scope="session")
+def local_host():
+    """只接受连接的本地端口，供离线测试探测延迟和建立连接"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(64)
+    yield ("本地", "127.0.0.1", server.getsockname()[1])
+    server.close()
+
+
+@pytest.fixture
+def mock_server():
+    """本地模拟服务器，测试中用 mock_server.add(msg_id, response) 添加响应"""
+    with MockTdxServer() as server:
+        yield server
+
+
+@pytest.fixture
+def mock_qc(mock_server):
+    """连接到模拟服务器并已登录的 QuotationClient"""
+    client = QuotationClient(raise_exception=True)
+    client.hosts = mock_server.hosts
+    client.connect(*mock_server.address).login()
+    yield client
+    client.disconnect()
@@ -0,0 +1,225 @@
+"""
+本地模拟通达信服务器，供离线测试和压测使用
+
+- 按请求的 msg_id 回放响应：固定的 bytes、按顺序回放的 list（最后一个重复），或 callable(body) -> bytes
+- 响应使用 0x10 字节的响应头，回显请求的 customize；超过 compress_threshold 的响应体用 zlib 压缩
+- 可模拟延迟（latency）、拆包（chunk_size）和断线（disconnect_after / drop_msg_ids）
+- 设置 upstream 时作为代理转发到真实服务器，并按 msg_id 记录响应，save() 后可用 load() 回放
+
+用法::
+
+    with MockTdxServer({0x44e: struct.pack('<H', 100)}) as server:
+        client = QuotationClient(raise_exception=True)
+        client.connect(*server.address)
+"""
+import asyncio
+import os
+import struct
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime
+
+REQ_HEADER_LEN = 10
+RSP_PREFIX = 0x0074cbb1
+
+
+def login_body(now: datetime = None) -> bytes:
+    """quotation.Login 可以解析的响应体"""
+    now = now or datetime.now()
+    return struct.pack(
+        '<BHBBBBBB16s16sBIHHIHHHH5s22s64s6s30s',
+        0, now.year, now.day, now.month, now.minute, now.hour, 0, now.second,
+        b'', b'', 0, now.year * 10000 + now.month * 100 + now.day, 0, 0, 0, 0, 0, 0, 0,
+        b'', 'mock'.encode('gbk'), b'', b'', b'',
+    )
+
+
+def default_responses() -> dict:
+    """登录、心跳等连接必需的响应"""
+    return {
+        0xd: lambda body: login_body(),                # Login
+        0x4: struct.pack('<6sI', b'', 20240102),       # HeartBeat
+    }
+
+
+def pack_response(msg_id: int, customize: int, body: bytes, compress_threshold: int = None) -> bytes:
+    unzip_size = len(body)
+    zipped = 0xc
+    if compress_threshold is not None and unzip_size >= compress_threshold:
+        body = zlib.compress(body)
+        zipped = 0x1c
+    return struct.pack('<IBIBHHH', RSP_PREFIX, zipped, customize, 0, msg_id, len(body), unzip_size) + body
+
+
+class MockTdxServer:
+    """在后台线程的事件循环中运行，address 为 (ip, port)"""
+
+    def __init__(self, responses: dict = None, latency: float = 0.0, chunk_size: int = 0, disconnect_after: int = None,
+                 drop_msg_ids=(), compress_threshold: int = 64, echo_customize: bool = True, upstream: tuple = None):
+        """
+        :param responses: {msg_id: bytes | list[bytes] | callable(body) -> bytes}，会补上 default_responses()
+        :param latency: 每个响应前等待的秒数
+        :param chunk_size: 大于 0 时响应按这个大小分多次写出，模拟拆包
+        :param disconnect_after: 每个连接回复这么多个请求后断开
+        :param drop_msg_ids: 收到这些 msg_id 时不回复直接断开
+        :param compress_threshold: 响应体达到这个长度时压缩，None 表示不压缩
+        :param echo_customize: 为 False 时响应的 customize 固定为 0，模拟不回显序号的服务器
+        :param upstream: (ip, port)，设置后转发到真实服务器并记录响应
+        """
+        self.responses = default_responses()
+        self.responses.update(responses or {})
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.disconnect_after = disconnect_after
+        self.drop_msg_ids = set(drop_msg_ids)
+        self.compress_threshold = compress_threshold
+        self.echo_customize = echo_customize
+        self.upstream = upstream
+
+        self.requests = Counter()       # msg_id -> 请求数
+        self.recorded: dict[int, list[bytes]] = {}
+        self.connections = 0
+        self.address = None
+        self._replayed = Counter()
+        self._loop = None
+        self._server = None
+        self._writers = set()
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def hosts(self) -> list[tuple]:
+        """可以直接作为 client.hosts / ConnectionPool(hosts=...) 使用"""
+        return [('mock', self.address[0], self.address[1])]
+
+    def add(self, msg_id: int, response):
+        self.responses[msg_id] = response
+        return self
+
+    def respond(self, msg_id: int, body: bytes) -> bytes:
+        response = self.responses.get(msg_id)
+        if response is None:
+            raise KeyError('no response for msg_id 0x%x' % msg_id)
+        if callable(response):
+            return response(body)
+        if isinstance(response, list):
+            i = min(self._replayed[msg_id], len(response) - 1)
+            self._replayed[msg_id] += 1
+            return response[i]
+        return response
+
+    def save(self, path: str):
+        """把记录的响应保存为 {path}/{msg_id:04x}_{序号}.bin"""
+        os.makedirs(path, exist_ok=True)
+        for msg_id, bodies in self.recorded.items():
+            for i, body in enumerate(bodies):
+                with open(os.path.join(path, '%04x_%d.bin' % (msg_id, i)), 'wb') as f:
+                    f.write(body)
+
+    def load(self, path: str):
+        """加载 save() 保存的响应，同一 msg_id 的多个响应按顺序回放"""
+        files = []
+        for name in os.listdir(path):
+            msg_id, _, index = os.path.splitext(name)[0].partition('_')
+            if name.endswith('.bin'):
+                files.append((int(msg_id, 16), int(index), name))
+        loaded = {}
+        for msg_id, _, name in sorted(files):
+            with open(os.path.join(path, name), 'rb') as f:
+                loaded.setdefault(msg_id, []).append(f.read())
+        self.responses.update(loaded)
+        return self
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='MockTdxServer', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, '127.0.0.1', 0))
+        self.address = self._server.sockets[0].getsockname()[:2]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            # 断开仍在连接的客户端，结束各连接的处理协程
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        upstream = None
+        if self.upstream is not None:
+            upstream = await asyncio.open_connection(*self.upstream)
+        replied = 0
+        try:
+            while True:
+                head = await reader.readexactly(REQ_HEADER_LEN)
+                _, customize, _, zipsize, _ = struct.unpack('<BIBHH', head)
+                body = await reader.readexactly(zipsize)
+                msg_id, = struct.unpack('<H', body[:2])
+                self.requests[msg_id] += 1
+                if msg_id in self.drop_msg_ids:
+                    break
+
+                if upstream is not None:
+                    data = await self._forward(upstream, head + body, msg_id)
+                else:
+                    data = pack_response(msg_id, customize if self.echo_customize else 0, self.respond(msg_id, body[2:]), self.compress_threshold)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                await self._write(writer, data)
+                replied += 1
+                if self.disconnect_after is not None and replied >= self.disconnect_after:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, KeyError):
+            pass
+        finally:
+            if upstream is not None:
+                upstream[1].close()
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _forward(self, upstream, request: bytes, msg_id: int) -> bytes:
+        up_reader, up_writer = upstream
+        up_writer.write(request)
+        await up_writer.drain()
+        head = await up_reader.readexactly(0x10)
+        _, _, _, _, _, zipsize, unzip_size = struct.unpack('<IBIBHHH', head)
+        raw = await up_reader.readexactly(zipsize)
+        self.recorded.setdefault(msg_id, []).append(zlib.decompress(raw) if zipsize != unzip_size else raw)
+        return head + raw
+
+    async def _write(self, writer: asyncio.StreamWriter, data: bytes):
+        if self.chunk_size <= 0:
+            writer.write(data)
+        else:
+            for i in range(0, len(data), self.chunk_size):
+                writer.write(data[i:i + self.chunk_size])
+                await writer.drain()
+                # 让客户端有机会读到不完整的响应
+                await asyncio.sleep(0)
+        await writer.drain()
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import numpy as np
+
+from opentdx.const import ADJUST, MARKET
+from opentdx.utils.adjust import adjust_factors, adjust_kline, adjust_kline_batch
+
+
+def bars(closes, start='2024-01-01'):
+    datetimes = np.arange(np.datetime64(start, 'D'), np.datetime64(start, 'D') + np.timedelta64(len(closes), 'D')).astype('datetime64[m]') + np.timedelta64(900, 'm')
+    closes = np.asarray(closes, dtype=float)
+    return {'datetime': datetimes, 'open': closes, 'close': closes, 'high': closes, 'low': closes, 'vol': np.ones(len(closes))}
+
+
+def xdxr(day, fenhong=0.0, peigujia=0.0, songzhuangu=0.0, peigu=0.0):
+    return {
+        'market': MARKET.SZ, 'code': '000001', 'date': datetime.fromisoformat(day), 'name': '除权除息',
+        'fenhong': fenhong, 'peigujia': peigujia, 'songzhuangu': songzhuangu, 'peigu': peigu,
+    }
+
+
+class TestAdjust:
+    """本地复权"""
+
+    def test_dividend(self):
+        columns = bars([10, 10, 9, 9])
+        # 每 10 股派 10 元，除权参考价 9
+        events = [xdxr('2024-01-03', fenhong=10)]
+        assert np.allclose(adjust_kline(columns, events, ADJUST.QFQ)['close'], [9, 9, 9, 9])
+        assert np.allclose(adjust_kline(columns, events, ADJUST.HFQ)['close'], [10, 10, 10, 10])
+        assert adjust_kline(columns, events, ADJUST.NONE) is columns
+        assert adjust_kline(columns, events, ADJUST.QFQ)['vol'] is columns['vol']
+
+    def test_bonus_and_rights(self):
+        columns = bars([20, 10, 10, 12, 12])
+        events = [
+            xdxr('2024-01-02', songzhuangu=10),
+            xdxr('2024-01-04', peigu=2, peigujia=5),
+            xdxr('2023-12-01', fenhong=5),      # 第一根之前，没有前收盘
+            {'date': datetime(2024, 1, 5), 'fenhong': None, 'peigujia': None, 'songzhuangu': None, 'peigu': None},
+        ]
+        ratio2 = (10 + 5 * 2 / 10) / (1 + 2 / 10) / 10
+        qfq = adjust_factors(columns['datetime'], columns['close'], events, ADJUST.QFQ)
+        assert np.allclose(qfq, [0.5 * ratio2, ratio2, ratio2, 1, 1])
+        hfq = adjust_factors(columns['datetime'], columns['close'], events, ADJUST.HFQ)
+        assert np.allclose(hfq, [1, 2, 2, 2 / ratio2, 2 / ratio2])
+
+    def test_event_after_last_bar(self):
+        columns = bars([10, 10])
+        events = [xdxr('2024-01-10', fenhong=10)]
+        assert np.allclose(adjust_kline(columns, events, ADJUST.QFQ)['close'], [9, 9])
+        assert np.allclose(adjust_kline(columns, events, ADJUST.HFQ)['close'], [10, 10])
+
+    def test_batch_matches_single(self):
+        rng = np.random.default_rng(0)
+        symbols = [(MARKET.SZ, '%06d' % i) for i in range(5)]
+        all_bars = {symbol: bars(rng.uniform(5, 20, 300), '2023-01-01') for symbol in symbols}
+        all_bars[(MARKET.SH, '600000')] = {}
+        xdxrs = {
+            symbol: [xdxr(str(np.datetime64('2023-01-01') + np.timedelta64(int(day), 'D')), fenhong=rng.uniform(0, 3), songzhuangu=rng.choice([0, 5]))
+                     for day in sorted(rng.choice(np.arange(-10, 320), 4, replace=False))]
+            for symbol in symbols[1:]
+        }
+        for adjust in (ADJUST.QFQ, ADJUST.HFQ):
+            result = adjust_kline_batch(all_bars, xdxrs, adjust)
+            assert result[(MARKET.SH, '600000')] == {}
+            for symbol in symbols:
+                expected = adjust_kline(all_bars[symbol], xdxrs.get(symbol), adjust)
+                assert np.allclose(result[symbol]['close'], expected['close'])
@@ -0,0 +1,56 @@
+import asyncio
+
+from opentdx.client.asyncExQuotationClient import AsyncExQuotationClient
+from opentdx.client.asyncQuotationClient import AsyncQuotationClient
+from opentdx.const import EX_MARKET, MARKET, PERIOD
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncQuotationClient:
+    """asyncio 行情客户端"""
+
+    def test_get_count(self):
+        async def main():
+            async with AsyncQuotationClient() as client:
+                return await client.get_count(MARKET.SZ)
+        result = run(main())
+        assert isinstance(result, int)
+        assert result > 0
+
+    def test_get_kline(self):
+        async def main():
+            async with AsyncQuotationClient() as client:
+                return await client.get_kline(MARKET.SH, '000001', PERIOD.DAILY, count=10)
+        result = run(main())
+        assert isinstance(result, list)
+        assert len(result) > 0
+        assert 'datetime' in result[0]
+
+    def test_concurrent_quotes(self):
+        async def main():
+            clients = [AsyncQuotationClient() for _ in range(4)]
+            await asyncio.gather(*(c.connect() for c in clients))
+            await asyncio.gather(*(c.login() for c in clients))
+            try:
+                return await asyncio.gather(*(
+                    clients[i % len(clients)].get_quotes(MARKET.SZ, '000001') for i in range(16)
+                ))
+            finally:
+                await asyncio.gather(*(c.disconnect() for c in clients))
+        results = run(main())
+        assert len(results) == 16
+        assert all(len(r) > 0 for r in results)
+
+
+class TestAsyncExQuotationClient:
+    """asyncio 扩展行情客户端"""
+
+    def test_get_kline(self):
+        async def main():
+            async with AsyncExQuotationClient() as client:
+                return await client.get_kline(EX_MARKET.US_STOCK, 'TSLA', PERIOD.DAILY, count=10)
+        result = run(main())
+        assert isinstance(result, list)
@@ -0,0 +1,103 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from opentdx.const import MARKET, PERIOD
+from opentdx.stream import BarAggregator
+from opentdx.stream.bar_aggregator import bar_minutes
+
+SYMBOL = (MARKET.SZ, '000001')
+DAY = date(2026, 4, 10)
+
+
+def trades(rows):
+    """rows: [(分钟, 价格, 量)]"""
+    minutes, price, vol = zip(*rows)
+    return {'time': np.array(minutes).astype('timedelta64[m]'), 'price': np.array(price, dtype=np.float64), 'vol': np.array(vol)}
+
+
+def at(hour, minute):
+    return np.datetime64(DAY, 'D') + np.timedelta64(hour * 60 + minute, 'm')
+
+
+class TestBarMinutes:
+    """成交分钟对应的 K 线结束时间"""
+
+    def test_one_minute(self):
+        minutes = [9 * 60 + 25, 570, 571, 689, 690, 780, 899, 900]
+        assert bar_minutes(minutes).tolist() == [571, 571, 572, 690, 690, 781, 900, 900]
+
+    def test_sessions(self):
+        assert bar_minutes([570, 574, 575, 689, 690], 5).tolist() == [575, 575, 580, 690, 690]
+        assert bar_minutes([570, 629, 630, 690, 780, 839, 840, 900], 60).tolist() == [630, 630, 690, 690, 840, 840, 900, 900]
+
+
+class TestBarAggregator:
+    """分笔成交合成 K 线"""
+
+    def test_update(self):
+        aggregator = BarAggregator()
+        aggregator.update(*SYMBOL, trades([(565, 10.0, 5), (570, 10.2, 1), (571, 9.9, 2)]), DAY)
+        changed = aggregator.update(*SYMBOL, trades([(571, 10.1, 3), (575, 10.5, 1)]), DAY)
+
+        bars = aggregator.bars(*SYMBOL, PERIOD.MIN_1)
+        assert bars['datetime'].tolist() == [at(9, 31), at(9, 32), at(9, 36)]
+        assert bars['open'].tolist() == [10.0, 9.9, 10.5]
+        assert bars['high'].tolist() == [10.2, 10.1, 10.5]
+        assert bars['low'].tolist() == [10.0, 9.9, 10.5]
+        assert bars['close'].tolist() == [10.2, 10.1, 10.5]
+        assert bars['vol'].tolist() == [600, 500, 100]
+        assert bars['amount'][1] == pytest.approx(9.9 * 200 + 10.1 * 300)
+
+        five = aggregator.bars(*SYMBOL, PERIOD.MIN_5)
+        assert five['datetime'].tolist() == [at(9, 35), at(9, 40)]
+        assert five['open'].tolist() == [10.0, 10.5]
+        assert five['high'].tolist() == [10.2, 10.5]
+        assert five['vol'].tolist() == [1100, 100]
+        # 第二批更新了 9:32 并新增 9:36
+        assert changed[PERIOD.MIN_1]['datetime'].tolist() == [at(9, 32), at(9, 36)]
+        assert changed[PERIOD.MIN_5]['datetime'].tolist() == [at(9, 35), at(9, 40)]
+
+    def test_seed(self):
+        aggregator = BarAggregator(periods=(PERIOD.MIN_1, PERIOD.MIN_5))
+        datetimes = np.array([at(9, 31) - np.timedelta64(1, 'D'), at(9, 31), at(9, 32), at(9, 33)])
+        aggregator.seed_bars(*SYMBOL, {
+            'datetime': datetimes, 'open': np.array([1.0, 10.0, 10.1, 10.2]), 'close': np.array([1.0, 10.1, 10.2, 10.3]),
+            'high': np.array([1.0, 10.1, 10.2, 10.3]), 'low': np.array([1.0, 10.0, 10.1, 10.2]),
+            'vol': np.array([1.0, 100.0, 100.0, 100.0]), 'amount': np.array([1.0, 1000.0, 1000.0, 1000.0]),
+        })
+        # 前一日和未走完的 9:33 不保留
+        assert aggregator.bars(*SYMBOL, PERIOD.MIN_1)['datetime'].tolist() == [at(9, 31), at(9, 32)]
+
+        # 当日全部成交：9:33 之前的已由 seed 给出，忽略
+        aggregator.update(*SYMBOL, trades([(570, 10.0, 1), (571, 10.2, 1), (572, 10.4, 1), (573, 10.0, 2)]), DAY)
+        bars = aggregator.bars(*SYMBOL, PERIOD.MIN_1)
+        assert bars['datetime'].tolist() == [at(9, 31), at(9, 32), at(9, 33), at(9, 34)]
+        assert bars['vol'].tolist() == [100, 100, 100, 200]
+        five = aggregator.bars(*SYMBOL, PERIOD.MIN_5)
+        assert five['datetime'].tolist() == [at(9, 35)]
+        assert five['open'][0] == 10.0
+        assert five['high'][0] == 10.4
+        assert five['low'][0] == 10.0
+        assert five['vol'][0] == 500
+
+    def test_on_trades(self):
+        aggregator = BarAggregator(periods=(PERIOD.MIN_1,))
+        received = []
+        aggregator.subscribe(received.append)
+        aggregator.on_trades({SYMBOL: trades([(600, 10.0, 1)])}, DAY)
+        aggregator.on_trades({SYMBOL: {'price': np.empty(0)}}, DAY)
+        assert len(received) == 1
+        assert received[0][SYMBOL][PERIOD.MIN_1]['datetime'].tolist() == [at(10, 1)]
+
+    def test_growth(self):
+        aggregator = BarAggregator(periods=(PERIOD.MIN_1,))
+        minutes = list(range(570, 690)) + list(range(780, 900))
+        for minute in minutes:
+            aggregator.update(*SYMBOL, trades([(minute, 10.0, 1)]), DAY)
+        assert len(aggregator.bars(*SYMBOL, PERIOD.MIN_1)['datetime']) == 240
+
+    def test_seconds_not_supported(self):
+        with pytest.raises(Exception):
+            BarAggregator(periods=(PERIOD.SECONDS,))
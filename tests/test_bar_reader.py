@@ -0,0 +1,74 @@
+import struct
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from opentdx.const import MARKET, PERIOD
+from opentdx.utils.bar_reader import DailyBarReader, MinBarReader, load_directory
+from opentdx.utils.base_reader import TdxFileNotFoundException, TdxNotAssignVipdocPathException
+
+
+def write_day(path, days):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b''.join(
+        struct.pack('<IIIIIfII', ymd, 1000 + i, 1100 + i, 900 + i, 1050 + i, 1e6 * i, 100 * i, 0)
+        for i, ymd in enumerate(days)
+    ))
+
+
+def write_lc(path, bars):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b''.join(
+        struct.pack('<HHfffffII', (dt.year - 2004) * 2048 + dt.month * 100 + dt.day, dt.hour * 60 + dt.minute,
+                    10.01, 10.2, 9.9, 10.1, 1e5, 100, 0)
+        for dt in bars
+    ))
+
+
+class TestBarReader:
+    """本地 vipdoc K 线文件"""
+
+    def test_daily(self, tmp_path):
+        write_day(tmp_path / 'sh' / 'lday' / 'sh600000.day', [20240102, 20240103])
+        write_day(tmp_path / 'sz' / 'lday' / 'sz159915.day', [20240102])
+        reader = DailyBarReader(str(tmp_path))
+
+        columns = reader.get_data('600000', MARKET.SH)
+        assert columns['datetime'].tolist() == [datetime(2024, 1, 2, 15), datetime(2024, 1, 3, 15)]
+        assert columns['open'].tolist() == [10.0, 10.01]
+        assert columns['vol'].tolist() == [0, 100]
+        # 基金价格三位小数
+        assert reader.get_data('sz159915')['close'].tolist() == [1.05]
+
+        df = reader.get_df(str(tmp_path / 'sh' / 'lday' / 'sh600000.day'))
+        assert list(df.columns) == ['open', 'high', 'low', 'close', 'amount', 'vol']
+        assert len(df) == 2
+
+    def test_min(self, tmp_path):
+        times = [datetime(2024, 1, 2, 9, 31), datetime(2024, 1, 2, 9, 32)]
+        write_lc(tmp_path / 'sz' / 'minline' / 'sz000001.lc1', times)
+        columns = MinBarReader(str(tmp_path)).get_data('000001', MARKET.SZ)
+        assert columns['datetime'].tolist() == times
+        assert columns['open'].tolist() == [10.01, 10.01]
+        with pytest.raises(TdxFileNotFoundException):
+            MinBarReader(str(tmp_path), PERIOD.MIN_5).get_data('000001', MARKET.SZ)
+
+    def test_vipdoc_required(self):
+        with pytest.raises(TdxNotAssignVipdocPathException):
+            DailyBarReader().get_data('600000', MARKET.SH)
+
+    def test_unpack_array_partial_record(self):
+        data = struct.pack('<IIIIIfII', 20240102, 1, 2, 3, 4, 5, 6, 0) + b'\x00' * 5
+        records = DailyBarReader().unpack_array(DailyBarReader.dtype, data)
+        assert len(records) == 1
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_load_directory(self, tmp_path, workers):
+        for code in ('600000', '600519', '688981'):
+            write_day(tmp_path / 'sh' / 'lday' / f'sh{code}.day', [20240102, 20240103, 20240104])
+        write_day(tmp_path / 'sz' / 'lday' / 'sz000001.day', [20240102])
+        result = load_directory(DailyBarReader(str(tmp_path)), workers=workers)
+        assert set(result) == {(MARKET.SZ, '000001'), (MARKET.SH, '600000'), (MARKET.SH, '600519'), (MARKET.SH, '688981')}
+        assert len(result[(MARKET.SH, '600519')]['close']) == 3
+        assert result[(MARKET.SZ, '000001')]['close'].tolist() == [10.5]
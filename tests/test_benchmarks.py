@@ -0,0 +1,32 @@
+from benchmarks import bench_parsers
+
+
+class TestParserBenchmarks:
+    """基准用例的响应体能被对应的解析器完整解码"""
+
+    def test_payloads_decode(self):
+        for name, (fn, sizes, build, _) in bench_parsers.CASES.items():
+            count = sizes['small']
+            assert bench_parsers.count_records(fn(build(count))) == count, name
+
+    def test_regression_flagged(self, capsys):
+        results = {'K_Line/small': {'records': 10, 'us_per_call': 30.0, 'records_per_sec': 1.0, 'alloc_peak_kb': 1.0, 'alloc_blocks': 1}}
+        baseline = {'K_Line/small': dict(results['K_Line/small'], us_per_call=10.0)}
+        assert bench_parsers.report(results, baseline, 1.3) == ['K_Line/small']
+        assert bench_parsers.report(results, {}, 1.3) == []
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / 'baseline.json')
+        results = bench_parsers.run('get_prices', repeat=1)
+        bench_parsers.save_baseline(results, path)
+        assert set(bench_parsers.load_baseline(path)) == {'get_prices/small', 'get_prices/medium', 'get_prices/large'}
+
+    def test_transaction_speedup(self):
+        # 向量化的分笔解码要明显快于逐个 get_price 解码
+        data = bench_parsers.payloads.transaction(1800)
+        seconds = {
+            name: bench_parsers.measure(bench_parsers.CASES[name][0], data, repeat=3, min_time=0.05)['us_per_call']
+            for name in ('Transaction', 'Transaction.as_arrays', 'Transaction.get_price')
+        }
+        assert seconds['Transaction.as_arrays'] * 2 < seconds['Transaction.get_price']
+        assert seconds['Transaction'] < seconds['Transaction.get_price']
@@ -0,0 +1,145 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from opentdx.utils import cache as cache_module
+from opentdx.utils.cache import DiskCache, LRUCache, PersistentCache, SimpleCache
+
+
+class TestLRUCache:
+    """LRU + TTL 缓存"""
+
+    def test_get_set(self):
+        cache = LRUCache()
+        assert cache.get('a') is None
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_lru_eviction(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert 'b' not in cache
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_byte_budget(self):
+        cache = LRUCache(max_bytes=100, sizeof=len)
+        cache.set('a', b'x' * 60)
+        cache.set('b', b'x' * 60)
+        assert len(cache) == 1
+        assert cache.get('b') is not None
+        assert cache.stats()['bytes'] == 60
+
+    def test_ttl(self):
+        cache = LRUCache(ttl_seconds=60)
+        cache.set('a', 1, ttl_seconds=0.01)
+        cache.set('b', 2)
+        time.sleep(0.02)
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+        assert cache.stats()['expirations'] == 1
+
+    def test_purge_expired(self):
+        cache = LRUCache(ttl_seconds=0)
+        for i in range(10):
+            cache.set(str(i), i)
+        time.sleep(0.01)
+        assert cache.purge_expired() == 10
+        assert len(cache) == 0
+
+    def test_threads(self):
+        cache = LRUCache(max_entries=100)
+
+        def worker(n):
+            for i in range(2000):
+                cache.set(f'{n}_{i}', i)
+                cache.get(f'{n}_{i // 2}')
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(cache) == 100
+        assert cache.stats()['evictions'] == 8 * 2000 - 100
+
+    def test_simple_cache_alias(self):
+        cache = SimpleCache(ttl_seconds=10)
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('OPENTDX_DISK_CACHE', '1')
+    monkeypatch.setenv('OPENTDX_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cache_module, '_disk_cache', None)
+    yield cache_module.get_disk_cache()
+    cache_module.get_disk_cache().close()
+
+
+class TestDiskCache:
+    """按交易日失效的磁盘缓存"""
+
+    def test_persist_across_instances(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        disk = DiskCache(path)
+        disk.set_many('finance', {'0_000001': {'liutongguben': 1.5}, '0_000002': {'liutongguben': 2.5}})
+        disk.close()
+
+        disk = DiskCache(path)
+        assert disk.get('finance', '0_000001') == {'liutongguben': 1.5}
+        assert disk.get_many('finance', ['0_000002', '0_000003']) == {'0_000002': {'liutongguben': 2.5}}
+        assert disk.get('xdxr', '0_000001') is None
+        disk.close()
+
+    def test_trading_day_rollover(self, tmp_path, monkeypatch):
+        disk = DiskCache(str(tmp_path / 'cache.sqlite3'))
+        disk.set('xdxr', '0_000001', [1, 2, 3])
+        monkeypatch.setattr(DiskCache, '_day', staticmethod(lambda: date(2099, 1, 1).isoformat()))
+        assert disk.get('xdxr', '0_000001') is None
+        assert disk.purge() == 1
+        disk.close()
+
+    def test_disabled_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('OPENTDX_DISK_CACHE', raising=False)
+        monkeypatch.setenv('OPENTDX_CACHE_DIR', str(tmp_path))
+        monkeypatch.setattr(cache_module, '_disk_cache', None)
+        monkeypatch.setattr(cache_module, '_disk_cache_enabled', False)
+        store = PersistentCache(LRUCache(), 'finance')
+        store.set('0_000001', {'liutongguben': 1.0})
+        assert store.get('0_000001') == {'liutongguben': 1.0}
+        assert cache_module.get_disk_cache() is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_enable_disk_cache(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('OPENTDX_DISK_CACHE', raising=False)
+        monkeypatch.setattr(cache_module, '_disk_cache', None)
+        cache_module.enable_disk_cache(str(tmp_path))
+        try:
+            PersistentCache(LRUCache(), 'finance').set('0_000001', {'liutongguben': 1.0})
+            assert (tmp_path / 'opentdx.sqlite3').exists()
+        finally:
+            cache_module.disable_disk_cache()
+        assert cache_module.get_disk_cache() is None
+
+    def test_persistent_cache_warm_load(self, disk_cache):
+        disk_cache.set('finance', '0_000001', {'liutongguben': 3.0})
+        store = PersistentCache(LRUCache(), 'finance')
+        assert store.get('0_000002') is None
+        # 首次访问磁盘时预热当日全部数据
+        assert store.memory.get('0_000001') == {'liutongguben': 3.0}
+
+        store.set('0_000002', {'liutongguben': 4.0})
+        assert disk_cache.get('finance', '0_000002') == {'liutongguben': 4.0}
+        assert PersistentCache(LRUCache(), 'finance').get_many(['0_000001', '0_000002', '0_000003']) == {
+            '0_000001': {'liutongguben': 3.0},
+            '0_000002': {'liutongguben': 4.0},
+        }
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from opentdx.client.connectionPool import ConnectionPool
+from opentdx.client.quotationClient import QuotationClient
+from opentdx.const import MARKET, PERIOD
+
+
+class StubClient:
+    """只记录状态的连接，用于离线验证连接池逻辑"""
+    hosts = []
+
+    def __init__(self):
+        self.connected = False
+        self.heartbeats = 0
+
+    def connect(self, ip=None, port=7709, time_out=5):
+        self.connected = True
+        return self
+
+    def login(self):
+        return True
+
+    def doHeartBeat(self):
+        self.heartbeats += 1
+
+    def disconnect(self):
+        self.connected = False
+
+
+class TestConnectionPoolOffline:
+    """连接池借还与替换"""
+
+    def test_lease_and_release(self, local_host):
+        with ConnectionPool(StubClient, size=3, hosts=[local_host]) as pool:
+            with pool.lease() as a, pool.lease() as b:
+                assert a is not b
+                assert a.connected and b.connected
+            assert len(pool._idle) == 3
+
+    def test_lease_timeout(self, local_host):
+        with ConnectionPool(StubClient, size=1, hosts=[local_host]) as pool:
+            with pool.lease():
+                with pytest.raises(Exception):
+                    pool.acquire(timeout=0.05)
+
+    def test_dead_connection_replaced(self, local_host):
+        with ConnectionPool(StubClient, size=2, hosts=[local_host]) as pool:
+            with pool.lease() as client:
+                client.connected = False
+            assert pool._members == 1
+            with pool.lease(timeout=5), pool.lease(timeout=5):
+                pass
+            assert pool._members == 2
+
+    def test_heartbeat_idle(self, local_host):
+        with ConnectionPool(StubClient, size=1, hosts=[local_host], heartbeat_interval=0) as pool:
+            with pool.lease() as client:
+                pass
+            time.sleep(1.5)
+            assert client.heartbeats > 0
+
+    def test_unreachable_fails_waiters(self, local_host):
+        class FlakyClient(StubClient):
+            reachable = True
+
+            def connect(self, ip=None, port=7709, time_out=5):
+                return super().connect(ip, port, time_out) if self.reachable else None
+
+        with ConnectionPool(FlakyClient, size=1, hosts=[local_host]) as pool:
+            FlakyClient.reachable = False
+            with pool.lease() as client:
+                client.connected = False
+            # 唯一的连接失效且无法重新连接：等待中的请求抛出异常而不是一直阻塞
+            started = time.time()
+            with pytest.raises(Exception, match="no available server"):
+                pool.map(lambda client, x: x, range(3))
+            assert time.time() - started < 5
+
+            FlakyClient.reachable = True
+            with pool.lease(timeout=5) as client:
+                assert client.connected
+
+    def test_map(self, local_host):
+        with ConnectionPool(StubClient, size=4, hosts=[local_host]) as pool:
+            assert pool.map(lambda client, x: x * 2, range(10)) == [x * 2 for x in range(10)]
+
+
+class TestConnectionPool:
+    """行情连接池"""
+
+    def test_pool_kline(self):
+        symbols = [(MARKET.SZ, '000001'), (MARKET.SH, '600000'), (MARKET.SZ, '000002')]
+        with ConnectionPool(QuotationClient, size=3) as pool:
+            results = pool.map(lambda client, s: client.get_kline(s[0], s[1], PERIOD.DAILY, count=5), symbols)
+        assert len(results) == 3
+        assert all(len(bars) > 0 for bars in results)
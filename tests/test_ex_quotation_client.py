@@ -1,6 +1,10 @@
+import hashlib
+import struct
 from datetime import date
 
+from opentdx.client.exQuotationClient import exQuotationClient
 from opentdx.const import EX_MARKET, PERIOD
+from opentdx.parser import ex_quotation
 
 
 class TestExQuotationClientLogin:
@@ -49,6 +53,11 @@ class TestExQuotationClientData:
         assert isinstance(result, list)
         assert len(result) >= 2
 
+    def test_get_table(self, eqc):
+        result = eqc.get_table()
+        assert isinstance(result, str)
+        assert len(result) > 0
+
     def test_get_kline(self, eqc):
         result = eqc.get_kline(EX_MARKET.US_STOCK, 'TSLA', PERIOD.DAILY, count=5)
         assert isinstance(result, list)
@@ -65,3 +74,93 @@ class TestExQuotationClientData:
     def test_get_history_transaction(self, eqc):
         result = eqc.get_history_transaction(EX_MARKET.US_STOCK, 'TSLA', date(2026, 4, 10))
         assert isinstance(result, list)
+
+
+class StubTableClient(exQuotationClient):
+    """按 start 分页返回商品表文本"""
+
+    def __init__(self, text, page_size=7):
+        super().__init__()
+        self.text = text
+        self.page_size = page_size
+        self.requests = 0
+
+    def call(self, parser):
+        self.requests += 1
+        start, = struct.unpack('<I', parser.body[:4])
+        context = self.text[start:start + self.page_size]
+        return start, len(context), context
+
+
+class TestTable:
+    """商品表分页拼接和索引"""
+
+    text = ''.join('47|IF24%02d|沪深300股指%d|%d\r\n' % (i, i, i) for i in range(1, 13))
+
+    def test_get_table(self):
+        client = StubTableClient(self.text)
+        assert client.get_table() == self.text
+        assert client.get_table_detail() == self.text
+        rows = list(client.iter_table_rows())
+        assert rows[0] == ['47', 'IF2401', '沪深300股指1', '1']
+        assert len(rows) == 12
+
+    def test_table_index_cached(self):
+        client = StubTableClient(self.text)
+        index = client.get_table_index()
+        assert index['IF2412'][2] == '沪深300股指12'
+        requests = client.requests
+        assert client.get_table_index() is index
+        assert client.requests == requests
+        client.get_table_index(refresh=True)
+        assert client.requests == 2 * requests
+
+
+class StubFileClient(exQuotationClient):
+    """从内存中的文件按块返回下载数据，记录每个连接收到的请求数"""
+    files = {}          # 文件名 -> 内容
+    requests = {}       # id(client) -> 下载请求数
+
+    def connect(self, ip=None, port=7727, time_out=5):
+        self.connected = True
+        return self
+
+    def login(self, show_info=False):
+        return True
+
+    def call_many(self, parsers):
+        for parser in parsers:
+            start, size, name = struct.unpack('<II40s', parser.body)
+            data = self.files[name.rstrip(b'\x00').decode('gbk')][start:start + size]
+            self.requests[id(self)] = self.requests.get(id(self), 0) + 1
+            yield {'size': len(data), 'data': data}
+
+    def call(self, parser):
+        if isinstance(parser, ex_quotation.FileMeta):
+            name = parser.body.rstrip(b'\x00').decode('gbk')
+            data = self.files.get(name, b'')
+            return {'size': len(data), 'hash_value': hashlib.md5(data).hexdigest().encode()}
+        return next(self.call_many([parser]), None)
+
+
+class TestDownloadFile:
+    """按块并发下载"""
+
+    data = bytes(range(256)) * 1000
+
+    def test_download_with_pool(self, monkeypatch, local_host, tmp_path):
+        monkeypatch.setattr(StubFileClient, 'files', {'a.dat': self.data})
+        monkeypatch.setattr(StubFileClient, 'requests', {})
+        client = StubFileClient()
+        client.hosts = [local_host]
+        try:
+            assert client.download_file('a.dat', workers=3, verify=True) == self.data
+            # 各块由连接池中的连接下载，当前连接只请求了 FileMeta
+            assert id(client) not in StubFileClient.requests
+            assert sum(StubFileClient.requests.values()) == 9
+            path = str(tmp_path / 'a.dat')
+            assert client.download_file('a.dat', workers=3, path=path) == path
+            assert (tmp_path / 'a.dat').read_bytes() == self.data
+        finally:
+            client.disconnect()
+        assert client.download_file('a.dat') == self.data
@@ -0,0 +1,115 @@
+import random
+from datetime import date, datetime, timedelta
+import struct
+
+import numpy as np
+
+from opentdx.utils.help import add_first_base, get_price, get_price_records, get_prices, get_uint16_at, iter_lines, seconds_until_rollover, to_datetime, to_datetime64, trading_day
+
+
+def encode_price(value):
+    """get_price 的逆运算，构造测试数据"""
+    negative = value < 0
+    value = abs(value)
+    first = (value & 0x3f) | (0x40 if negative else 0)
+    value >>= 6
+    out = [first | (0x80 if value else 0)]
+    while value:
+        b = value & 0x7f
+        value >>= 7
+        out.append(b | (0x80 if value else 0))
+    return bytes(out)
+
+
+class TestPriceDecoder:
+    """变长整数的向量化解码"""
+
+    def test_get_prices_matches_get_price(self):
+        rng = random.Random(0)
+        values = [rng.randint(-10 ** 9, 10 ** 9) for _ in range(500)] + [0, 63, 64, -64, 8191, -8192]
+        data = b'\x00\x00' + b''.join(encode_price(v) for v in values)
+
+        expected = []
+        pos = 2
+        for _ in values:
+            v, pos = get_price(data, pos)
+            expected.append(v)
+
+        result, new_pos = get_prices(data, 2, len(values))
+        assert result.tolist() == expected == values
+        assert new_pos == pos == len(data)
+
+    def test_get_prices_empty(self):
+        result, pos = get_prices(b'\x01\x02', 2)
+        assert len(result) == 0
+        assert pos == 2
+
+    def test_get_price_records_with_prefix(self):
+        rng = random.Random(1)
+        records = []
+        data = b''
+        for _ in range(200):
+            # 定长字段包含小于 0x80 的字节，不能被当作变长整数的结尾
+            minutes = rng.randint(0, 0xffff)
+            fields = [rng.randint(-5000, 5000) for _ in range(3)]
+            records.append((minutes, fields))
+            data += struct.pack('<H', minutes) + b''.join(encode_price(v) for v in fields)
+
+        values, offsets, pos = get_price_records(data, 0, len(records), 3, prefix=2)
+        assert values.tolist() == [fields for _, fields in records]
+        assert get_uint16_at(data, offsets).tolist() == [minutes for minutes, _ in records]
+        assert pos == len(data)
+
+    def test_get_price_records_without_prefix(self):
+        rows = [[1, -2, 300], [0, 0, 0], [-70000, 5, 6]]
+        data = b''.join(encode_price(v) for row in rows for v in row)
+        values, offsets, pos = get_price_records(data, 0, 3, 3)
+        assert values.tolist() == rows
+        assert offsets[0] == 0
+        assert pos == len(data)
+
+    def test_add_first_base(self):
+        result = add_first_base(get_prices(b''.join(encode_price(v) for v in [0, 0, 1000, 5, -3]))[0])
+        assert result.tolist() == [0, 0, 1000, 1005, 997]
+
+    def test_to_datetime64_matches_to_datetime(self):
+        daily = [20240105, 20231229, 19991231]
+        minute = [((2024 - 2004) << 11) | 105 | ((9 * 60 + 31) << 16), ((2023 - 2004) << 11) | 1229 | ((15 * 60) << 16)]
+        for nums, with_time in ((daily, False), (minute, True)):
+            result = to_datetime64(np.array(nums), with_time).astype(datetime).tolist()
+            assert result == [to_datetime(num, with_time) for num in nums]
+
+
+class TestTradingDay:
+    """交易日归属"""
+
+    def test_trading_day(self):
+        assert trading_day(datetime(2024, 1, 3, 10, 0)) == date(2024, 1, 3)
+        assert trading_day(datetime(2024, 1, 3, 8, 59)) == date(2024, 1, 2)
+        # 周一开盘前和周末都归属上周五
+        assert trading_day(datetime(2024, 1, 8, 8, 0)) == date(2024, 1, 5)
+        assert trading_day(datetime(2024, 1, 7, 12, 0)) == date(2024, 1, 5)
+
+    def test_seconds_until_rollover(self):
+        # 与 trading_day 的切换点一致：周五收盘后的数据保留到下周一 9:00
+        for now in (datetime(2024, 1, 3, 10, 0), datetime(2024, 1, 5, 16, 0), datetime(2024, 1, 6, 8, 0), datetime(2024, 1, 8, 8, 59)):
+            rollover = now + timedelta(seconds=seconds_until_rollover(now))
+            assert rollover.hour == 9 and rollover.minute == 0
+            assert trading_day(rollover) != trading_day(now)
+            assert trading_day(rollover - timedelta(seconds=1)) == trading_day(now)
+        assert seconds_until_rollover(datetime(2024, 1, 5, 16, 0)) == (datetime(2024, 1, 8, 9, 0) - datetime(2024, 1, 5, 16, 0)).total_seconds()
+
+
+class TestIterLines:
+    """分块文本按行切分"""
+
+    def test_matches_full_decode(self):
+        data = '代码|名称\n000001|平安银行\r\n\n600000|浦发银行'.encode('gbk')
+        expected = data.decode('gbk').split('\n')
+        for size in (1, 2, 3, 7, len(data)):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            assert list(iter_lines(chunks)) == expected
+
+    def test_trailing_newline(self):
+        assert list(iter_lines([b'a\nb', b'\n'])) == ['a', 'b']
+        assert list(iter_lines([])) == []
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from opentdx.const import ADJUST, MARKET, PERIOD
+from opentdx.store import KlineStore
+from opentdx.utils import cache as cache_module
+
+from .test_quotation_client import StubQuotationClient
+
+
+class TestKlineStore:
+    """本地 K 线存储和增量同步"""
+
+    def test_sync_initial_and_incremental(self, tmp_path):
+        client = StubQuotationClient(1000)
+        store = KlineStore(str(tmp_path), client)
+        symbol = (MARKET.SZ, '000001')
+
+        assert store.sync([symbol], PERIOD.DAILY, count=900) == {symbol: 900}
+        bars = store.read(*symbol, PERIOD.DAILY)
+        assert isinstance(bars['close'], np.memmap)
+        assert bars['vol'].tolist() == list(range(100, 1000))
+        assert store.last_datetime(*symbol, PERIOD.DAILY) == bars['datetime'][-1]
+
+        # 新增 5 根 K 线，只请求最新的一小段，最后一根被覆盖
+        client.total = 1005
+        client.requests = 0
+        assert store.sync([symbol], PERIOD.DAILY) == {symbol: 6}
+        assert client.requests == 1
+        bars = store.read(*symbol, PERIOD.DAILY)
+        assert bars['vol'].tolist() == list(range(100, 1005))
+        assert np.all(np.diff(bars['datetime']) > np.timedelta64(0, 'm'))
+
+    def test_sync_large_gap(self, tmp_path):
+        client = StubQuotationClient(1000)
+        store = KlineStore(str(tmp_path), client)
+        store.sync([(MARKET.SZ, '000001')], PERIOD.DAILY, count=100)
+        client.total = 3000
+        store.sync([(MARKET.SZ, '000001')], PERIOD.DAILY)
+        assert store.read(MARKET.SZ, '000001', PERIOD.DAILY)['vol'].tolist() == list(range(900, 3000))
+
+    def test_append_and_symbols(self, tmp_path):
+        store = KlineStore(str(tmp_path))
+        assert len(store.read(MARKET.SH, '600000', PERIOD.MIN_1)['close']) == 0
+        datetimes = np.arange('2024-01-02T09:31', '2024-01-02T09:41', dtype='datetime64[m]')
+        columns = {name: np.arange(10, dtype=float) for name in ('open', 'close', 'high', 'low', 'vol', 'amount')}
+        assert store.append(MARKET.SH, '600000', PERIOD.MIN_1, {'datetime': datetimes, **columns}) == 10
+        # 重复追加时旧数据被忽略
+        assert store.append(MARKET.SH, '600000', PERIOD.MIN_1, {'datetime': datetimes[:5], **{k: v[:5] for k, v in columns.items()}}) == 0
+        # 未写完整的记录被丢弃
+        with open(tmp_path / 'MIN_1' / 'SH_600000' / 'close', 'ab') as f:
+            f.write(b'\x00' * 3)
+        assert len(store.read(MARKET.SH, '600000', PERIOD.MIN_1)['close']) == 10
+        assert store.symbols() == {PERIOD.MIN_1: [(MARKET.SH, '600000')]}
+        assert len(store) == 1
+
+    def test_append_keeps_mapped_file(self, tmp_path):
+        # 覆盖最后一根时替换文件，之前 read() 映射的数组仍然可读且内容不变
+        store = KlineStore(str(tmp_path))
+        datetimes = np.arange('2024-01-02T09:31', '2024-01-02T09:41', dtype='datetime64[m]')
+        columns = {name: np.arange(10, dtype=float) for name in ('open', 'close', 'high', 'low', 'vol', 'amount')}
+        store.append(MARKET.SH, '600000', PERIOD.MIN_1, {'datetime': datetimes, **columns})
+        old = store.read(MARKET.SH, '600000', PERIOD.MIN_1)
+        columns = {name: np.array([100.0, 101.0]) for name in columns}
+        assert store.append(MARKET.SH, '600000', PERIOD.MIN_1, {'datetime': datetimes[-1] + np.arange(2), **columns}) == 2
+        assert old['close'].tolist() == list(range(10))
+        assert store.read(MARKET.SH, '600000', PERIOD.MIN_1)['close'].tolist() == list(range(9)) + [100, 101]
+        assert not list((tmp_path / 'MIN_1' / 'SH_600000').glob('*.tmp'))
+
+    def test_root_requires_opt_in(self, tmp_path, monkeypatch):
+        # 不指定目录时不会默认写到用户目录，需要先开启磁盘缓存
+        monkeypatch.delenv('OPENTDX_DISK_CACHE', raising=False)
+        monkeypatch.setattr(cache_module, '_disk_cache_enabled', False)
+        with pytest.raises(Exception):
+            KlineStore()
+        monkeypatch.setenv('OPENTDX_DISK_CACHE', '1')
+        monkeypatch.setenv('OPENTDX_CACHE_DIR', str(tmp_path))
+        monkeypatch.setattr(cache_module, '_disk_cache_dir', None)
+        assert KlineStore().root == str(tmp_path / 'kline')
+
+    def test_read_adjusted(self, tmp_path):
+        client = StubQuotationClient(10)
+        client.get_xdxr = lambda market, code: [{
+            'date': datetime(2004, 1, 6), 'fenhong': 0.0, 'peigujia': 0.0, 'songzhuangu': 10.0, 'peigu': 0.0,
+        }]
+        store = KlineStore(str(tmp_path), client)
+        store.sync([(MARKET.SZ, '000001')], PERIOD.DAILY)
+        raw = store.read(MARKET.SZ, '000001', PERIOD.DAILY)
+        qfq = store.read(MARKET.SZ, '000001', PERIOD.DAILY, adjust=ADJUST.QFQ)
+        assert np.all(qfq['close'][5:] == raw['close'][5:])
+        assert np.allclose(qfq['close'][:5], raw['close'][:5] / 2)
@@ -0,0 +1,111 @@
+import asyncio
+import struct
+import urllib.request
+
+import pytest
+
+from opentdx.client.asyncQuotationClient import AsyncQuotationClient
+from opentdx.client.quotationClient import QuotationClient
+from opentdx.const import MARKET
+from opentdx.utils.metrics import ClientMetrics, start_http_server
+
+from .mock_server import MockTdxServer
+from .test_mock_server import COUNT, TRANSACTION, transaction_response
+
+
+def connect(server, metrics):
+    client = QuotationClient(raise_exception=True)
+    client.metrics = metrics
+    client.connect(*server.address)
+    return client
+
+
+def by_parser(metrics):
+    return {item['parser']: item for item in metrics.snapshot()}
+
+
+class TestClientMetrics:
+    """按请求类型统计耗时和字节数"""
+
+    def test_call_and_pipeline(self):
+        metrics = ClientMetrics()
+        with MockTdxServer({COUNT: struct.pack('<H', 1), TRANSACTION: transaction_response(3000)}, latency=0.002) as server:
+            client = connect(server, metrics)
+            client.get_count(MARKET.SZ)
+            client.get_transaction(MARKET.SZ, '000001', as_arrays=True)
+            client.disconnect()
+
+        stats = by_parser(metrics)
+        count = stats['Count']
+        assert count['msg_id'] == COUNT
+        assert count['count'] == 1
+        assert count['wire_bytes'] == 0x10 + 2
+        assert count['raw_bytes'] == 2
+        assert count['rtt_avg'] >= 0.002
+
+        transaction = stats['Transaction']
+        assert transaction['count'] >= 2
+        # 大响应被压缩
+        assert transaction['raw_bytes'] > transaction['wire_bytes']
+        assert transaction['decompress_seconds'] > 0
+        assert transaction['deserialize_seconds'] > 0
+        assert transaction['rtt_buckets'][float('inf')] == transaction['count']
+
+    def test_errors(self):
+        metrics = ClientMetrics()
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}, drop_msg_ids={COUNT}) as server:
+            client = connect(server, metrics)
+            with pytest.raises(Exception):
+                client.get_count(MARKET.SZ)
+        assert by_parser(metrics)['Count']['errors'] == 1
+
+    def test_disabled(self):
+        metrics = ClientMetrics()
+        metrics.enabled = False
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}) as server:
+            client = connect(server, metrics)
+            client.get_count(MARKET.SZ)
+            client.metrics = None
+            client.get_count(MARKET.SZ)
+        assert metrics.snapshot() == []
+
+    def test_async_client(self):
+        metrics = ClientMetrics()
+
+        async def main(server):
+            client = AsyncQuotationClient(raise_exception=True)
+            client.metrics = metrics
+            await client.connect(*server.address)
+            try:
+                await asyncio.gather(*(client.get_count(MARKET.SZ) for _ in range(5)))
+            finally:
+                await client.disconnect()
+
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}) as server:
+            asyncio.run(main(server))
+        assert by_parser(metrics)['Count']['count'] == 5
+
+    def test_prometheus(self):
+        metrics = ClientMetrics(buckets=(0.1, 1.0))
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}) as server:
+            client = connect(server, metrics)
+            client.get_count(MARKET.SZ)
+            client.get_count(MARKET.SH)
+            client.disconnect()
+
+        text = metrics.to_prometheus()
+        assert '# TYPE opentdx_rtt_seconds histogram' in text
+        assert 'opentdx_requests_total{parser="Count",msg_id="0x44e"} 2' in text
+        assert 'opentdx_rtt_seconds_bucket{parser="Count",msg_id="0x44e",le="+Inf"} 2' in text
+        assert 'opentdx_wire_bytes_total{parser="Count",msg_id="0x44e"} 36' in text
+
+        server = start_http_server(0, metrics, addr='127.0.0.1')
+        try:
+            with urllib.request.urlopen('http://127.0.0.1:%d/metrics' % server.server_address[1]) as response:
+                assert response.read().decode() == text
+        finally:
+            server.shutdown()
+
+    def test_snapshot_frame(self):
+        metrics = ClientMetrics()
+        assert metrics.snapshot(as_frame=True).empty
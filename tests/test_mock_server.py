@@ -0,0 +1,254 @@
+import asyncio
+import struct
+import time
+
+import pytest
+
+from opentdx.client.asyncQuotationClient import AsyncQuotationClient
+from opentdx.client.baseStockClient import PIPELINE_DEPTH, _paginate
+from opentdx.client.connectionPool import ConnectionPool
+from opentdx.client.quotationClient import QuotationClient
+from opentdx.const import CATEGORY, MARKET, PERIOD
+from opentdx.parser import quotation
+
+from .mock_server import MockTdxServer
+from .test_help import encode_price
+
+COUNT = 0x44e
+TRANSACTION = 0xfc5
+K_LINE = 0x523
+FINANCE = 0x10
+
+
+def transaction_response(total):
+    """按请求的 start/count 返回分笔成交，第 0 条为最新，vol 为序号"""
+    def respond(body):
+        start, count = struct.unpack('<HH', body[8:12])
+        rows = range(max(0, total - start - count), max(0, total - start))
+        data = struct.pack('<H', len(rows))
+        for i in rows:
+            data += struct.pack('<H', 570) + encode_price(1000 if i == rows[0] else 0) + b''.join(encode_price(v) for v in (i, 1, 0, 0))
+        return data
+    return respond
+
+
+def connect(server, **kwargs):
+    client = QuotationClient(raise_exception=True, **kwargs)
+    client.connect(*server.address)
+    return client
+
+
+class TestMockServer:
+    """客户端与本地模拟服务器的交互"""
+
+    def test_login_and_count(self, mock_server, mock_qc):
+        mock_server.add(COUNT, struct.pack('<H', 1234))
+        assert mock_qc.get_count(MARKET.SZ) == 1234
+        assert mock_server.requests[0xd] == 1
+        assert mock_server.requests[COUNT] == 1
+
+    def test_pipeline_compressed_split(self):
+        # 大响应压缩，且按 7 字节拆开写出
+        with MockTdxServer({TRANSACTION: transaction_response(5000)}, chunk_size=7, latency=0.001) as server:
+            client = connect(server)
+            columns = client.get_transaction(MARKET.SZ, '000001', as_arrays=True)
+            assert columns['vol'].tolist() == list(range(5000))
+            # 1 页满页后再请求 2 页，第 3 页不满即结束
+            assert server.requests[TRANSACTION] == 3
+            client.disconnect()
+
+    def test_nested_call_in_pipeline(self):
+        # 迭代 call_many 的结果时用同一个（带锁的）客户端发起其它请求，不会死锁或读错响应
+        with MockTdxServer({COUNT: struct.pack('<H', 3), TRANSACTION: transaction_response(100)}) as server:
+            client = connect(server, multithread=True)
+            counts = []
+            for page in client.call_many(quotation.Transaction(MARKET.SZ, '000001', 0, 10, True) for _ in range(PIPELINE_DEPTH + 2)):
+                assert len(page['vol']) == 10
+                counts.append(client.get_count(MARKET.SZ))
+            assert counts == [3] * (PIPELINE_DEPTH + 2)
+            client.disconnect()
+
+    def test_unbounded_paginate_requests(self):
+        def fetch(server):
+            client = connect(server)
+            rows = _paginate(client, lambda s, c: quotation.Transaction(MARKET.SZ, '000001', s, c), 1800, 0)
+            client.disconnect()
+            return rows
+
+        # 只有一页时只发一个请求
+        with MockTdxServer({TRANSACTION: transaction_response(100)}) as server:
+            assert len(fetch(server)) == 100
+            assert server.requests[TRANSACTION] == 1
+        # 满页后才扩大在途页数：1 页，然后 2 页（第 2 页不满）
+        with MockTdxServer({TRANSACTION: transaction_response(5000)}) as server:
+            assert len(fetch(server)) == 5000
+            assert server.requests[TRANSACTION] == 3
+
+    def test_iter_transaction_nested_call(self):
+        with MockTdxServer({COUNT: struct.pack('<H', 3), TRANSACTION: transaction_response(100)}) as server:
+            client = connect(server, multithread=True)
+            for page in client.iter_transaction(MARKET.SZ, '000001'):
+                assert client.get_count(MARKET.SZ) == 3
+            assert len(client.get_transaction(MARKET.SZ, '000001')) == 100
+            assert server.requests[TRANSACTION] == 2
+            client.disconnect()
+
+    def test_empty_kline_skips_finance(self):
+        with MockTdxServer({K_LINE: struct.pack('<H', 0)}) as server:
+            client = connect(server)
+            assert client.get_kline(MARKET.SZ, '000001', PERIOD.DAILY) == []
+            assert server.requests[K_LINE] == 1
+            assert server.requests[FINANCE] == 0
+            client.disconnect()
+
+    def test_kline_count(self):
+        # count=0 不发请求，count=None 翻页直到没有数据
+        with MockTdxServer({K_LINE: struct.pack('<H', 0)}) as server:
+            client = connect(server)
+            assert client.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=0) == []
+            assert client.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=0, as_arrays=True) == {}
+            assert server.requests[K_LINE] == 0
+            assert client.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=None) == []
+            assert server.requests[K_LINE] == 1
+            client.disconnect()
+
+    def test_unbounded_paginate_disconnect(self):
+        # 连接中途断开时分页停止，而不是不断发送空批次
+        with MockTdxServer({TRANSACTION: transaction_response(5000)}, disconnect_after=2) as server:
+            client = QuotationClient()
+            client.connect(*server.address)
+            assert client.get_transaction(MARKET.SZ, '000001') is None
+            assert server.requests[TRANSACTION] <= 3
+        with MockTdxServer({TRANSACTION: transaction_response(5000)}, disconnect_after=2) as server:
+            client = connect(server)
+            with pytest.raises(Exception):
+                client.get_transaction(MARKET.SZ, '000001')
+
+    def test_unexpected_customize(self):
+        # 服务器回显过 customize 后，无法匹配的响应视为协议错误
+        def respond(body):
+            server.echo_customize = False
+            return struct.pack('<H', 1)
+
+        with MockTdxServer({COUNT: respond}) as server:
+            client = connect(server)
+            with pytest.raises(Exception):
+                list(client.call_many(quotation.Count(MARKET.SZ) for _ in range(2)))
+            assert not client.connected
+
+    def test_fifo_without_customize(self):
+        with MockTdxServer({COUNT: [struct.pack('<H', i) for i in range(10)]}, echo_customize=False) as server:
+            client = connect(server)
+            assert list(client.call_many(quotation.Count(MARKET.SZ) for _ in range(10))) == list(range(10))
+            client.disconnect()
+
+    def test_disconnect(self):
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}, disconnect_after=1) as server:
+            client = connect(server)
+            assert client.get_count(MARKET.SZ) == 1
+            with pytest.raises(Exception):
+                client.get_count(MARKET.SZ)
+            assert not client.connected
+
+    def test_drop_msg_id(self):
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}, drop_msg_ids={COUNT}) as server:
+            client = connect(server)
+            with pytest.raises(Exception):
+                client.get_count(MARKET.SZ)
+            assert server.requests[COUNT] == 1
+
+    def test_record_and_replay(self, tmp_path):
+        with MockTdxServer({COUNT: [struct.pack('<H', 7), struct.pack('<H', 8)]}) as upstream:
+            with MockTdxServer(upstream=upstream.address) as proxy:
+                client = connect(proxy)
+                assert [client.get_count(MARKET.SZ), client.get_count(MARKET.SH)] == [7, 8]
+                client.disconnect()
+                proxy.save(str(tmp_path))
+
+        with MockTdxServer().load(str(tmp_path)) as server:
+            client = connect(server)
+            assert [client.get_count(MARKET.SZ), client.get_count(MARKET.SH)] == [7, 8]
+            client.disconnect()
+
+    def test_async_client(self):
+        async def main(server):
+            client = AsyncQuotationClient(raise_exception=True)
+            await client.connect(*server.address)
+            try:
+                return await asyncio.gather(*(client.get_count(MARKET.SZ) for _ in range(16)))
+            finally:
+                await client.disconnect()
+
+        with MockTdxServer({COUNT: struct.pack('<H', 99)}, latency=0.001) as server:
+            assert asyncio.run(main(server)) == [99] * 16
+
+    def test_async_fifo_without_customize(self):
+        async def main(server):
+            client = AsyncQuotationClient(raise_exception=True)
+            await client.connect(*server.address)
+            try:
+                return [await client.get_count(MARKET.SZ) for _ in range(3)]
+            finally:
+                await client.disconnect()
+
+        with MockTdxServer({COUNT: [struct.pack('<H', i) for i in range(3)]}, echo_customize=False) as server:
+            assert asyncio.run(main(server)) == [0, 1, 2]
+
+    def test_async_retry_relogin(self):
+        async def main(server):
+            client = AsyncQuotationClient(auto_retry=True, raise_exception=True)
+            await client.connect(*server.address)
+            try:
+                counts = [await client.get_count(MARKET.SZ) for _ in range(2)]
+                writer = client.writer
+                # 服务器已断开，重试时重新连接并登录
+                counts.append(await client.get_count(MARKET.SZ))
+                assert writer.is_closing()
+                return counts
+            finally:
+                await client.disconnect()
+
+        with MockTdxServer({COUNT: struct.pack('<H', 4)}, disconnect_after=2) as server:
+            assert asyncio.run(main(server)) == [4, 4, 4]
+            assert server.requests[0xd] == 1
+            assert server.connections == 2
+
+    def test_async_timeout(self):
+        async def main(server, raise_exception, *requests):
+            client = AsyncQuotationClient(raise_exception=raise_exception)
+            await client.connect(*server.address, time_out=0.2)
+            try:
+                started = time.perf_counter()
+                results = await asyncio.gather(*(request(client) for request in requests), return_exceptions=True)
+                assert time.perf_counter() - started < 1
+                assert not client.connected
+                return results
+            finally:
+                await client.disconnect()
+
+        # 服务器迟迟不响应时请求超时，而不是一直等待
+        with MockTdxServer({COUNT: struct.pack('<H', 1)}, latency=2) as server:
+            results = asyncio.run(main(server, True, lambda c: c.get_count(MARKET.SZ), lambda c: c.get_count(MARKET.SH)))
+            assert all(isinstance(result, Exception) for result in results)
+        # raise_exception=False 时返回 None，行情接口不会因为 None 出错
+        with MockTdxServer(latency=2) as server:
+            results = asyncio.run(main(server, False, lambda c: c.get_quotes(MARKET.SZ, '000001'), lambda c: c.get_stock_quotes_list(CATEGORY.A)))
+            assert results == [None, None]
+
+    def test_connection_pool(self):
+        with MockTdxServer({COUNT: struct.pack('<H', 5)}) as server:
+            with ConnectionPool(QuotationClient, size=3, hosts=server.hosts) as pool:
+                assert pool.map(lambda client, market: client.get_count(market), [MARKET.SZ, MARKET.SH] * 6) == [5] * 12
+            assert server.requests[0xd] == 3
+
+    def test_pool_keeps_sp_mode(self):
+        with MockTdxServer({COUNT: struct.pack('<H', 5)}) as server:
+            client = QuotationClient(raise_exception=True).sp(server.hosts)
+            pool = client.get_pool(2)
+            try:
+                with pool.lease() as member:
+                    assert member._sp_mode_enabled
+                    assert member.hosts == server.hosts
+                    assert member.get_count(MARKET.SZ) == 5
+            finally:
+                pool.close()
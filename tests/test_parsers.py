@@ -0,0 +1,93 @@
+import struct
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from opentdx.const import EX_MARKET, MARKET, PERIOD
+from opentdx.parser import ex_quotation, mac_quotation, quotation
+
+from .test_help import encode_price
+
+
+def kline_body(bars, up_down=False):
+    data = struct.pack('<H', len(bars))
+    for date_num, prices, vol, amount in bars:
+        data += struct.pack('<I', date_num) + b''.join(encode_price(p) for p in prices) + struct.pack('<ff', vol, amount)
+        if up_down:
+            data += struct.pack('<HH', 3, 4)
+    return data
+
+
+class TestKLineArrays:
+    """K 线的列式解析与逐条解析结果一致"""
+
+    bars = [(20240102 + i, (10000 + i, 30, 50, -20), 1000.0 + i, 1e6 + i) for i in range(20)]
+
+    def check(self, period, data, market=MARKET.SZ, code='000001'):
+        rows = quotation.K_Line(market, code, period).deserialize(data)
+        columns = quotation.K_Line(market, code, period, as_arrays=True).deserialize(data)
+        assert columns['datetime'].astype(datetime).tolist() == [bar['datetime'] for bar in rows]
+        for key in ('open', 'close', 'high', 'low', 'vol', 'amount'):
+            assert columns[key].tolist() == [bar[key] for bar in rows]
+        return columns
+
+    def test_stock_kline(self):
+        columns = self.check(PERIOD.DAILY, kline_body(self.bars))
+        assert 'up_count' not in columns
+
+    def test_index_kline(self):
+        columns = self.check(PERIOD.DAILY, kline_body(self.bars, up_down=True), MARKET.SH, '999999')
+        assert columns['up_count'].tolist() == [3] * len(self.bars)
+
+    def test_length_mismatch(self):
+        # 股票 K 线按请求确定布局，多余或缺少的字节直接报错，不按指数格式解析
+        data = kline_body(self.bars)
+        for bad in (data[:-3], kline_body(self.bars, up_down=True)):
+            with pytest.raises(ValueError):
+                quotation.K_Line(MARKET.SZ, '000001', PERIOD.DAILY, as_arrays=True).deserialize(bad)
+
+    def test_empty(self):
+        columns = quotation.K_Line(MARKET.SZ, '000001', PERIOD.DAILY, as_arrays=True).deserialize(struct.pack('<H', 0))
+        assert len(columns['open']) == 0
+
+    def test_ex_kline(self):
+        data = struct.pack('<B9sHHIH', 47, b'IF2406', PERIOD.DAILY.value, 1, 0, 2)
+        data += struct.pack('<IfffffIf', 20240102, 1.5, 2.5, 1.0, 2.0, 100.0, 7, 0)
+        data += struct.pack('<IfffffIf', 20240103, 2.0, 3.0, 1.5, 2.5, 200.0, 8, 0)
+        rows = ex_quotation.K_Line(EX_MARKET(47), 'IF2406', PERIOD.DAILY).deserialize(data)
+        columns = ex_quotation.K_Line(EX_MARKET(47), 'IF2406', PERIOD.DAILY, as_arrays=True).deserialize(data)
+        assert columns['date_time'].astype(datetime).tolist() == [bar['date_time'] for bar in rows]
+        assert np.array_equal(columns['close'], [bar['close'] for bar in rows])
+        assert columns['vol'].tolist() == [7, 8]
+
+
+class TestFixedWidthRecords:
+    """定长记录按结构化 dtype 解析"""
+
+    def test_symbol_bar(self):
+        data = struct.pack('<H12s10xBHHI', 0, b'000001', PERIOD.MIN_1.value, 0, 2, 0)
+        data += struct.pack('<II7f', 20240102, 9 * 3600 + 31 * 60, 1, 2, 0.5, 1.5, 100, 10, 1e8)
+        data += struct.pack('<II7f', 20240102, 2 * 3600, 1, 2, 0.5, 1.5, 100, 10, 1e8)
+        rows = mac_quotation.SymbolBar(MARKET.SZ, '000001', PERIOD.MIN_1).deserialize(data)
+        assert rows[0]['datetime'] == datetime(2024, 1, 2, 9, 31)
+        # 夜盘凌晨的 K 线归属下一个自然日
+        assert rows[1]['datetime'] == datetime(2024, 1, 3, 2, 0)
+        assert rows[0]['close'] == 1.5
+        columns = mac_quotation.SymbolBar(MARKET.SZ, '000001', PERIOD.MIN_1, as_arrays=True).deserialize(data)
+        assert columns['datetime'].astype(datetime).tolist() == [bar['datetime'] for bar in rows]
+
+    def test_xdxr(self):
+        data = struct.pack('<HB6sH', 0, 0, b'000001', 2)
+        data += struct.pack('<B6sBIB4f', 0, b'000001', 0, 20230614, 1, 2.3, 0, 0, 0)
+        data += struct.pack('<B6sBIB4f', 0, b'000001', 0, 20231101, 5, 100, 200, 150, 250)
+        rows = quotation.XDXR(MARKET.SZ, '000001').deserialize(data)
+        assert rows[0]['name'] == '除权除息'
+        assert rows[0]['date'] == datetime(2023, 6, 14, 15, 0)
+        assert rows[0]['fenhong'] == np.float32(2.3)
+        assert rows[0]['houzongguben'] is None
+        assert rows[1]['houzongguben'] == 250
+        columns = quotation.XDXR(MARKET.SZ, '000001', as_arrays=True).deserialize(data)
+        assert columns['category'].tolist() == [1, 5]
+        assert np.isnan(columns['fenhong'][1])
+        assert columns['houzongguben'][1] == 250
@@ -1,4 +1,9 @@
-from datetime import date
+import hashlib
+import io
+import struct
+from datetime import date, timedelta
+
+import numpy as np
 
 from opentdx.const import (
     BLOCK_FILE_TYPE,
@@ -6,6 +11,12 @@ from opentdx.const import (
     MARKET,
     PERIOD,
 )
+from opentdx.client.quotationClient import QuotationClient, float_shares_loaded
+from opentdx.parser import quotation
+from opentdx.utils.cache import company_content_cache, finance_cache, finance_info_cache, xdxr_cache
+
+from .test_help import encode_price
+from .test_parsers import kline_body
 
 
 class TestQuotationClientLogin:
@@ -44,6 +55,30 @@ class TestQuotationClientStock:
         assert len(result) > 0
         assert 'datetime' in result[0]
 
+    def test_get_kline_multi_page(self, qc):
+        result = qc.get_kline(MARKET.SH, '000001', PERIOD.DAILY, count=2000)
+        assert len(result) == 2000
+        assert all(a['datetime'] < b['datetime'] for a, b in zip(result, result[1:]))
+
+    def test_get_kline_as_arrays(self, qc):
+        rows = qc.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=1000)
+        columns = qc.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=1000, as_arrays=True)
+        assert len(columns['close']) == len(rows)
+        assert columns['close'].tolist() == [bar['close'] for bar in rows]
+        assert (columns['datetime'][1:] > columns['datetime'][:-1]).all()
+
+    def test_get_kline_batch(self, qc):
+        symbols = [(MARKET.SZ, '000001'), (MARKET.SH, '600000'), (MARKET.SZ, '000002')]
+        result, errors = qc.get_kline_batch(symbols, PERIOD.DAILY, count=10, workers=2)
+        assert not errors
+        assert all(len(result[symbol]['close']) == 10 for symbol in symbols)
+
+    def test_call_many(self, qc):
+        from opentdx.parser import quotation
+        result = list(qc.call_many([quotation.Count(MARKET.SZ), quotation.Count(MARKET.SH)]))
+        assert len(result) == 2
+        assert all(isinstance(r, int) and r > 0 for r in result)
+
     def test_get_quotes(self, qc):
         result = qc.get_quotes(MARKET.SZ, '000001')
         assert isinstance(result, list)
@@ -159,3 +194,342 @@ class TestQuotationClientQuotesAdjustment:
         assert result[0]['rise_speed'] == '5.00%'
         assert result[0]['handicap']['bid'][0]['price'] == 995.0
         assert 'turnover' not in result[0]
+
+
+class StubQuotationClient(QuotationClient):
+    """按请求的 start/count 从内存中的序列返回数据，第 0 条为最新"""
+    files = {}          # 文件名 -> 内容
+    fail_after = None   # 下载到第几块时断开
+
+    def __init__(self, total=2000, **kwargs):
+        super().__init__(**kwargs)
+        self.total = total
+        self.requests = 0
+        self.batches = 0
+
+    def connect(self, ip=None, port=7709, time_out=5):
+        self.connected = True
+        return self
+
+    def login(self, show_info=False):
+        return True
+
+    def _get_float_shares(self, market, code):
+        return 1000.0
+
+    def call_many(self, parsers):
+        self.batches += 1
+        for parser in parsers:
+            self.requests += 1
+            if isinstance(parser, quotation.Finance):
+                yield {'liutongguben': 1000.0}
+            elif isinstance(parser, quotation.Quotes):
+                count, = struct.unpack('<H', parser.body[8:10])
+                stocks = [struct.unpack('<B6s', parser.body[10 + i * 7:17 + i * 7]) for i in range(count)]
+                yield [self._quotes(MARKET(market), code.decode()) for market, code in stocks]
+            elif isinstance(parser, quotation.CompanyCategory):
+                code = parser.body[2:8].decode()
+                yield [{'name': name, 'filename': f'{code}.txt', 'start': i * 100, 'length': 100} for i, name in enumerate(('公司概况', '股本结构'))]
+            elif isinstance(parser, quotation.CompanyContent):
+                filename, start, length = struct.unpack('<80sII', parser.body[10:98])
+                yield {'content': '%s:%d' % (filename.rstrip(b'\x00').decode(), start)}
+            elif isinstance(parser, quotation.XDXR):
+                yield [{'date': date(2024, 1, 2), 'fenhong': 1.0}]
+            elif isinstance(parser, quotation.FileDownload):
+                if self.fail_after is not None and self.requests > self.fail_after:
+                    raise Exception("send error")
+                start, size, name = struct.unpack('<II300s', parser.body)
+                data = self.files[name.rstrip(b'\x00').decode('gbk')][start:start + size]
+                yield {'size': len(data), 'data': data}
+            elif isinstance(parser, quotation.K_Line):
+                if b'999999' in parser.body:
+                    self.connected = False
+                    raise Exception("send error")
+                start, count = struct.unpack('<HH', parser.body[12:16])
+                minute = parser.period in (PERIOD.MIN_1, PERIOD.MIN_5)
+                yield parser.deserialize(kline_body([
+                    (self._date_num(i, minute), (i, 1, 2, -1), float(i), float(i)) for i in self._range(start, count)
+                ]))
+            else:
+                start, count = struct.unpack('<HH', parser.body[8:12])
+                data = struct.pack('<H', len(self._range(start, count)))
+                for i in self._range(start, count):
+                    data += struct.pack('<H', 570 + i % 200) + encode_price(1 if i else 1000) + b''.join(encode_price(v) for v in (i, 1, i % 3, 0))
+                yield parser.deserialize(data)
+
+    def call(self, parser):
+        if isinstance(parser, quotation.FileMeta):
+            name = parser.body.rstrip(b'\x00').decode('gbk')
+            data = self.files.get(name, b'')
+            return {'size': len(data), 'hash_value': hashlib.md5(data).hexdigest().encode()}
+        return next(self.call_many([parser]), None)
+
+    @staticmethod
+    def _quotes(market, code):
+        value = int(code)
+        return {
+            'market': market, 'code': code, 'close': 1000 + value, 'open': 1000, 'high': 1100, 'low': 900, 'pre_close': 990,
+            'server_time': '09:30:00', 'neg_price': 0, 'vol': value, 'cur_vol': 1, 'amount': 1.0, 'in_vol': 0, 'out_vol': 0,
+            's_amount': 0, 'open_amount': 1, 'rise_speed': 12, 'short_turnover': 5, 'min2_amount': 0.0, 'opening_rush': 0,
+            'vol_rise_speed': 0.0, 'depth': 0.0, 'active': 0,
+            'handicap': {'bid': [{'price': 999, 'vol': 1}], 'ask': [{'price': 1001, 'vol': 1}]},
+        }
+
+    @staticmethod
+    def _date_num(i, minute):
+        day = date(2004, 1, 1) + timedelta(days=i // 240 if minute else i)
+        if minute:
+            return (day.year - 2004) << 11 | (day.month * 100 + day.day) | ((570 + i % 240) << 16)
+        return day.year * 10000 + day.month * 100 + day.day
+
+    def _range(self, start, count):
+        return range(max(0, self.total - start - count), max(0, self.total - start))
+
+
+class TestPagination:
+    """分页结果按时间顺序拼接"""
+
+    def test_iter_kline_newest_first(self):
+        client = StubQuotationClient(2000)
+        pages = list(client.iter_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=2400))
+        assert [len(page) for page in pages] == [800, 800, 400]
+        assert pages[0][-1]['vol'] == 1999
+        assert pages[-1][0]['vol'] == 0
+
+    def test_get_kline_order(self):
+        client = StubQuotationClient(20000)
+        bars = client.get_kline(MARKET.SZ, '000001', PERIOD.MIN_1, count=20000)
+        assert [bar['vol'] for bar in bars] == list(range(20000))
+        assert bars[1]['open'] == 0.001
+        columns = client.get_kline(MARKET.SZ, '000001', PERIOD.MIN_1, count=20000, as_arrays=True)
+        assert columns['vol'].tolist() == list(range(20000))
+
+    def test_get_kline_short_history(self):
+        client = StubQuotationClient(100)
+        assert len(client.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, count=2000)) == 100
+        assert client.get_kline(MARKET.SZ, '000001', PERIOD.DAILY, start=200, count=800) == []
+
+    def test_get_transaction_order(self):
+        client = StubQuotationClient(4000)
+        result = client.get_transaction(MARKET.SZ, '000001')
+        assert [item['vol'] for item in result] == list(range(4000))
+        assert client.requests == 3
+        columns = client.get_transaction(MARKET.SZ, '000001', as_arrays=True)
+        assert columns['vol'].tolist() == list(range(4000))
+        assert columns['price'].tolist() == [item['price'] for item in result]
+
+
+class TestKlineBatch:
+    """多股票批量 K 线"""
+
+    def test_batch_with_failure(self, local_host):
+        client = StubQuotationClient()
+        client.hosts = [local_host]
+        symbols = [(MARKET.SZ, '000001'), (MARKET.SH, '999999'), (MARKET.SH, '600000')]
+        try:
+            result, errors = client.get_kline_batch(symbols, PERIOD.DAILY, count=900, workers=2)
+            assert list(errors) == [(MARKET.SH, '999999')]
+            assert len(result[(MARKET.SZ, '000001')]['close']) == 900
+            assert result[(MARKET.SH, '600000')]['turnover'][-1] == round(1999 / 1000 * 100, 2)
+
+            frame, errors = client.get_kline_batch(symbols, PERIOD.DAILY, count=10, workers=2, as_frame=True)
+            assert len(frame) == 20
+            assert set(frame['code']) == {'000001', '600000'}
+        finally:
+            client.disconnect()
+
+
+class TestFloatShares:
+    """流通股本批量预取"""
+
+    @staticmethod
+    def quotes(code, vol):
+        return {
+            'market': MARKET.SZ, 'code': code, 'vol': vol,
+            'high': 1000, 'low': 900, 'open': 950, 'close': 980, 'pre_close': 960, 'neg_price': 0,
+            'open_amount': 1, 'rise_speed': 12,
+            'handicap': {'bid': [{'price': 970, 'vol': 1}], 'ask': [{'price': 990, 'vol': 1}]},
+        }
+
+    def test_quotes_adjustment_single_batch(self):
+        finance_cache.clear()
+        finance_info_cache.clear()
+        client = StubQuotationClient()
+        quotes_list = [self.quotes('%06d' % i, 5) for i in range(100)] + [self.quotes('000001', 0)]
+        client.quotes_adjustment(quotes_list)
+        # 100 只缺失的股票只发起一次流水线请求，成交量为 0 的不请求
+        assert client.batches == 1
+        assert client.requests == 100
+        assert quotes_list[0]['turnover'] == round(5 * 100 / 1000 * 100, 2)
+        assert quotes_list[0]['close'] == 9.8
+        assert 'turnover' not in quotes_list[-1]
+        # finance_cache 仍然只存流通股本，完整财务信息在 finance_info_cache
+        assert finance_cache.get(f"{MARKET.SZ.value}_000000") == 1000.0
+        assert finance_info_cache.get(f"{MARKET.SZ.value}_000000") == {'liutongguben': 1000.0}
+
+        client.quotes_adjustment([self.quotes('000002', 5)])
+        assert client.requests == 100
+
+    def test_load_float_shares_once_per_day(self):
+        finance_cache.clear()
+        finance_info_cache.clear()
+        float_shares_loaded.clear()
+        client = StubQuotationClient()
+        client.get_list = lambda market: [{'code': '000001'}, {'code': '300750'}, {'code': '159915'}]
+        assert client.load_float_shares([MARKET.SZ]) == 2
+        assert client.load_float_shares([MARKET.SZ]) == 0
+        assert finance_info_cache.get(f"{MARKET.SZ.value}_300750") == {'liutongguben': 1000.0}
+
+
+class TestDownloadFile:
+    """按块并发下载"""
+
+    data = bytes(range(256)) * 1000     # 256000 字节，9 块
+
+    def test_download_in_memory(self, monkeypatch):
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.dat': self.data})
+        client = StubQuotationClient()
+        progress = []
+        content = client.download_file('a.dat', report_hook=lambda done, total: progress.append(done), verify=True)
+        assert content == self.data
+        assert progress[-1] == len(self.data)
+        assert client.batches == 1
+        # 大小未知且没有其它选项时顺序下载
+        assert client.download_file('a.dat') == self.data
+
+    def test_verify_failed(self, monkeypatch):
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.dat': self.data})
+        client = StubQuotationClient(raise_exception=True)
+        client.get_file_meta = lambda filename: {'size': len(self.data), 'hash_value': b'0' * 32}
+        try:
+            client.download_file('a.dat', verify=True)
+        except Exception as e:
+            assert 'calling function error' in str(e)
+        else:
+            raise AssertionError
+
+    def test_unrecognized_hash_fails(self, monkeypatch):
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.dat': self.data})
+        client = StubQuotationClient()
+        client.get_file_meta = lambda filename: {'size': len(self.data), 'hash_value': b'\xff' * 32}
+        assert client.download_file('a.dat', verify=True) is None
+        assert client.download_file('a.dat') == self.data
+
+    def test_block_file_verify_opt_in(self, monkeypatch):
+        monkeypatch.setattr(StubQuotationClient, 'files', {BLOCK_FILE_TYPE.GN.value: self.data})
+        monkeypatch.setattr('opentdx.client.quotationClient.BlockReader.get_data', lambda self, content, type_: len(content))
+        client = StubQuotationClient()
+        call = client.call
+        client.call = lambda parser: dict(call(parser), hash_value=b'0' * 32) if isinstance(parser, quotation.FileMeta) else call(parser)
+        # FileMeta 的 hash_value 不一致时默认不校验
+        assert client.get_block_file(BLOCK_FILE_TYPE.GN) == len(self.data)
+        assert client.get_block_file(BLOCK_FILE_TYPE.GN, verify=True) is None
+
+    def test_resume(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.dat': self.data})
+        monkeypatch.setattr(StubQuotationClient, 'fail_after', 4)
+        path = str(tmp_path / 'a.dat')
+        client = StubQuotationClient()
+        assert client.download_file('a.dat', path=path) is None
+        assert (tmp_path / 'a.dat.part').exists()
+
+        monkeypatch.setattr(StubQuotationClient, 'fail_after', None)
+        client = StubQuotationClient()
+        assert client.download_file('a.dat', path=path, verify=True) == path
+        assert client.requests == 5
+        assert (tmp_path / 'a.dat').read_bytes() == self.data
+        assert not (tmp_path / 'a.dat.part').exists()
+
+    def test_download_with_pool(self, monkeypatch, local_host, tmp_path):
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.dat': self.data})
+        client = StubQuotationClient()
+        client.hosts = [local_host]
+        try:
+            assert client.download_file('a.dat', workers=3, verify=True) == self.data
+            path = str(tmp_path / 'a.dat')
+            assert client.download_file('a.dat', workers=3, path=path) == path
+            assert (tmp_path / 'a.dat').read_bytes() == self.data
+        finally:
+            client.disconnect()
+
+    def test_stream_to_fileobj(self, monkeypatch):
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.dat': self.data})
+        client = StubQuotationClient()
+        out = io.BytesIO()
+        assert client.download_file('a.dat', fileobj=out, verify=True) is out
+        assert out.getvalue() == self.data
+        chunks = list(client.iter_file('a.dat', len(self.data)))
+        assert [len(chunk) for chunk in chunks] == [0x7530] * 8 + [len(self.data) - 8 * 0x7530]
+
+    def test_iter_text_file(self, monkeypatch):
+        text = ''.join('%06d|股票%d|%d\n' % (i, i, i) for i in range(5000))
+        monkeypatch.setattr(StubQuotationClient, 'files', {'a.txt': text.encode('gbk')})
+        client = StubQuotationClient()
+        rows = client.iter_text_file('a.txt')
+        assert next(rows) == ['000000', '股票0', '0']
+        assert client.get_text_file('a.txt') == [line.split('|') for line in text.split('\n') if line]
+
+
+class TestCompanyInfo:
+    """F10 流水线请求和章节缓存"""
+
+    def test_get_company_info(self):
+        company_content_cache.clear()
+        xdxr_cache.clear()
+        finance_cache.clear()
+        finance_info_cache.clear()
+        client = StubQuotationClient()
+        info = client.get_company_info(MARKET.SZ, '000001')
+        assert [item['name'] for item in info] == ['公司概况', '股本结构', '除权分红', '财报']
+        assert info[1]['content'] == '000001.txt:100'
+        # 目录、章节、除权除息、财报各一次流水线
+        assert client.batches == 4
+        assert client.requests == 5
+
+        client.get_company_info(MARKET.SZ, '000001')
+        assert client.requests == 6
+
+    def test_batch(self, local_host):
+        company_content_cache.clear()
+        client = StubQuotationClient()
+        client.hosts = [local_host]
+        symbols = [(MARKET.SZ, '%06d' % i) for i in range(10)]
+        try:
+            result, errors = client.get_company_info_batch(symbols, workers=3)
+            assert errors == {}
+            assert set(result) == set(symbols)
+            assert result[(MARKET.SZ, '000007')][0]['content'] == '000007.txt:0'
+            result, errors = client.get_company_info_batch(symbols[:2], workers=1)
+            assert len(result) == 2
+        finally:
+            client.disconnect()
+
+
+class TestSnapshot:
+    """全市场快照分批请求"""
+
+    symbols = [(MARKET.SZ, '%06d' % i) for i in range(1000)]
+
+    def test_snapshot_chunks(self):
+        finance_cache.clear()
+        finance_info_cache.clear()
+        client = StubQuotationClient()
+        columns = client.snapshot(self.symbols, workers=1)
+        assert columns['code'].tolist() == [code for _, code in self.symbols]
+        assert columns['close'][5] == 10.05
+        assert columns['rise_speed'][0] == 0.12
+        assert np.isnan(columns['turnover'][0])
+        assert columns['turnover'][5] == round(5 * 100 / 1000 * 100, 2)
+        # 1000 只分 13 批，一次流水线；999 只有成交量的股票的股本一次流水线
+        assert client.batches == 2
+        assert client.requests == 13 + 999
+
+    def test_snapshot_pool(self, local_host):
+        client = StubQuotationClient()
+        client.hosts = [local_host]
+        try:
+            frame = client.snapshot(self.symbols, workers=3, as_frame=True)
+            assert frame['code'].tolist() == [code for _, code in self.symbols]
+            assert frame['bid1'][1] == 9.99
+        finally:
+            client.disconnect()
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from opentdx.const import MARKET
+from opentdx.stream import QuoteStream
+
+
+class FakeSnapshotClient:
+    """每次 snapshot 返回 frames 中的下一帧"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = 0
+
+    def snapshot(self, symbols, workers=4):
+        frame = self.frames[min(self.calls, len(self.frames) - 1)]
+        self.calls += 1
+        return {key: np.array(value) for key, value in frame.items()}
+
+
+def frame(closes, codes=('000001', '000002', '600000'), markets=(0, 0, 1)):
+    return {
+        'market': list(markets), 'code': list(codes), 'close': closes, 'vol': [100.0] * len(codes),
+    }
+
+
+SYMBOLS = [(MARKET.SZ, '000001'), (MARKET.SZ, '000002'), (MARKET.SH, '600000')]
+
+
+class TestQuoteStream:
+    """只推送变化的行"""
+
+    def test_diff(self):
+        client = FakeSnapshotClient([
+            frame([10.0, 20.0, 30.0]),
+            frame([10.0, 20.5, 30.0]),
+            # 顺序变化、多出未订阅的代码
+            frame([30.0, 20.5, 10.0, 1.0], codes=('600000', '000002', '000001', '000003'), markets=(1, 0, 0, 0)),
+        ])
+        stream = QuoteStream(client, SYMBOLS, fields=('close', 'vol'))
+        received = []
+        stream.subscribe(received.append)
+
+        first = stream.poll()
+        assert first['code'].tolist() == ['000001', '000002', '600000']
+        assert np.isnan(first['close_delta']).all()
+
+        second = stream.poll()
+        assert second['code'].tolist() == ['000002']
+        assert second['close_delta'].tolist() == [0.5]
+
+        third = stream.poll()
+        assert len(third['code']) == 0
+        assert len(received) == 2
+
+    def test_background_thread(self):
+        client = FakeSnapshotClient([frame([10.0, 20.0, 30.0])])
+        stream = QuoteStream(client, SYMBOLS, interval=0.01, fields=('close',))
+        done = threading.Event()
+        stream.subscribe(lambda changes: done.set())
+        with stream:
+            assert done.wait(2)
+        assert client.calls >= 1
+
+    def test_async_iterator(self):
+        client = FakeSnapshotClient([frame([10.0, 20.0, 30.0]), frame([10.0, 20.0, 30.0]), frame([11.0, 20.0, 30.0])])
+        stream = QuoteStream(client, SYMBOLS, interval=0, fields=('close',))
+
+        async def collect():
+            results = []
+            async for changes in stream:
+                results.append(changes['code'].tolist())
+                if len(results) == 2:
+                    break
+            return results
+
+        assert asyncio.run(collect()) == [['000001', '000002', '600000'], ['000001']]
@@ -0,0 +1,119 @@
+import struct
+
+from opentdx.const import MARKET
+from opentdx.parser import quotation
+
+from .test_help import encode_price
+from .test_quotation_client import StubQuotationClient
+
+SYMBOL = (MARKET.SZ, '000001')
+
+
+class TapeClient(StubQuotationClient):
+    """分笔成交来自 tape：[(分钟, 价格(分), 量, 笔数, 方向)]，第 0 页为最新的成交"""
+
+    def __init__(self, tape):
+        super().__init__()
+        self.tape = tape
+        self.counts = []
+
+    def call_many(self, parsers):
+        for parser in parsers:
+            if not isinstance(parser, quotation.Transaction):
+                raise Exception("unexpected parser")
+            start, count = struct.unpack('<HH', parser.body[8:12])
+            self.requests += 1
+            self.counts.append(count)
+            rows = self.tape[max(0, len(self.tape) - start - count):max(0, len(self.tape) - start)]
+            data = struct.pack('<H', len(rows))
+            last = 0
+            for minute, price, vol, trans, action in rows:
+                data += struct.pack('<H', minute) + encode_price(price - last) + b''.join(encode_price(v) for v in (vol, trans, action, 0))
+                last = price
+            yield parser.deserialize(data)
+
+
+def tape(n, offset=0):
+    return [(570 + (i + offset) // 20, 1000 + (i + offset) % 7, 100 + (i + offset) % 5, 1, (i + offset) % 2) for i in range(n)]
+
+
+class TestTransactionFollower:
+    """只推送新增的分笔成交"""
+
+    def test_incremental(self):
+        client = TapeClient(tape(3000))
+        follower = client.follow_transactions([SYMBOL])
+        received = []
+        follower.subscribe(received.append)
+
+        first = follower.poll()
+        assert first[SYMBOL]['seq'].tolist() == list(range(3000))
+        assert first[SYMBOL]['price'][0] == 10.0
+        assert follower.position(*SYMBOL) == 3000
+
+        # 没有新成交：只请求一页，不推送
+        client.requests = 0
+        assert follower.poll() == {}
+        assert client.requests == 1
+        assert len(received) == 1
+
+        # 少量新成交：一页内对齐
+        client.tape = tape(3005)
+        trades = follower.poll()[SYMBOL]
+        assert trades['seq'].tolist() == [3000, 3001, 3002, 3003, 3004]
+        expected = tape(3005)[3000:]
+        assert trades['vol'].tolist() == [row[2] for row in expected]
+        assert trades['price'].tolist() == [row[1] / 100 for row in expected]
+
+    def test_refetch_when_page_overflows(self):
+        client = TapeClient(tape(100))
+        follower = client.follow_transactions([SYMBOL], history=False)
+        assert follower.poll() == {}
+        assert follower.position(*SYMBOL) == 100
+
+        client.tape = tape(400)
+        client.counts = []
+        trades = follower.poll()[SYMBOL]
+        assert trades['seq'].tolist() == list(range(100, 400))
+        assert client.counts[0] == follower.page_size
+        assert client.counts[1] == 1800
+
+    def test_server_reset(self):
+        client = TapeClient(tape(100))
+        follower = client.follow_transactions([SYMBOL], history=False)
+        follower.poll()
+        # 服务器的成交重新开始，找不到已知尾部
+        client.tape = tape(10, offset=3)
+        trades = follower.poll()[SYMBOL]
+        assert trades['seq'].tolist() == list(range(10))
+        assert follower.position(*SYMBOL) == 10
+
+    def test_empty_day(self):
+        client = TapeClient([])
+        follower = client.follow_transactions([SYMBOL])
+        assert follower.poll() == {}
+        client.tape = tape(3)
+        assert follower.poll()[SYMBOL]['seq'].tolist() == [0, 1, 2]
+        assert follower.poll() == {}
+
+    def test_repeated_prints_not_dropped(self):
+        # 同一分钟、同价同量的成交与较短的已知尾部完全相同
+        lot = (570, 1000, 1, 1, 0)
+        client = TapeClient([lot])
+        follower = client.follow_transactions([SYMBOL])
+        assert follower.poll()[SYMBOL]['seq'].tolist() == [0]
+        client.tape = [lot] * 3
+        assert follower.poll()[SYMBOL]['seq'].tolist() == [1, 2]
+        assert follower.position(*SYMBOL) == 3
+
+    def test_short_tail_full_page_refetches(self):
+        lot = (570, 1000, 1, 1, 0)
+        client = TapeClient([lot] * 5)
+        follower = client.follow_transactions([SYMBOL], history=False)
+        follower.poll()
+        # 新成交超过一页且尾部不足 TAIL_SIZE 笔：不在页内对齐，取全天
+        client.tape = [lot] * (5 + follower.page_size)
+        client.counts = []
+        trades = follower.poll()[SYMBOL]
+        assert trades['seq'].tolist() == list(range(5, 5 + follower.page_size))
+        assert client.counts == [follower.page_size, 1800]